@@ -0,0 +1,105 @@
+#
+# Memory benchmark of the Redy representation
+# Reports the memory per neuron of a network, and the time/memory of duplicating it
+# and of creating a (joined) redundancy query.
+#
+# Usage -
+#   python benchmark_memory.py [--network FILE.nnet] [--save result.json] [--compare baseline.json]
+# `--compare` reports the change from a previous run (saved with `--save`), and fails
+# if some measure is worse by more than `--tolerance`
+#
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from redy.features import redundancy, clip
+from redy.framework import packed
+from redy.convert import import_nnet
+
+ACAS5_9 = "./examples_data/acasxu/ACASXU_experimental_v2a_5_9.nnet"
+
+# Returns (result, bytes allocated and still alive, seconds) of calling `f`
+# `f` is called twice - timed, then traced (tracing slows down allocations)
+def measure(f):
+    start = time.perf_counter()
+    f()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        result = f()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size, seconds
+
+def benchmark(path, repeat=5):
+    text = open(path, "r").read()
+    net, size, seconds = measure(lambda: import_nnet.import_nnet(text))
+    neurons = sum(net.layerSize(l) for l in range(net.layerCount()))
+
+    results = {
+        "neurons": neurons,
+        "nodes": len(net.nodes()),
+        "import_bytes_per_neuron": size / neurons,
+        "import_seconds": seconds,
+    }
+
+    def best(name, f):
+        runs = [measure(f) for _ in range(repeat)]
+        results[name + "_bytes_per_neuron"] = min(r[1] for r in runs) / neurons
+        results[name + "_seconds"] = min(r[2] for r in runs)
+
+    best("duplicate", lambda: net.duplicate("_dup"))
+
+    rt = redundancy.RedundancyTest(net, 1e-4)
+    ns = [(2, 34, "active"), (2, 39, "inactive"), (3, 0, "inactive")]
+    best("query", lambda: rt.getComparedExact(ns, "gt", 1))
+
+    arr = packed.ArrayNetwork.fromNetwork(net)
+    best("array_duplicate", lambda: arr.duplicate("_dup"))
+    best("array_clip", lambda: clip.clipNetwork(arr.duplicate("_dup"), clip.Range(firstLayer=2, firstMode=1)))
+
+    return results
+
+# Prints the change of every measure, returns the measures which are worse than `tolerance`
+# `suffixes` - measures which are checked for regressions (lower is better)
+def compare(results, baseline, tolerance, suffixes=("_bytes_per_neuron", "_seconds")):
+    worse = []
+    for k, v in results.items():
+        if k not in baseline or baseline[k] == 0: continue
+        change = (v - baseline[k]) / baseline[k]
+        print("%-32s %14.6g -> %14.6g (%+.1f%%)" % (k, baseline[k], v, 100 * change))
+        if change > tolerance and k.endswith(suffixes):
+            worse.append(k)
+    return worse
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark of the Redy representation")
+    parser.add_argument("--network", default=ACAS5_9)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = benchmark(args.network, args.repeat)
+    for k, v in results.items():
+        print("%-32s %14.6g" % (k, v))
+
+    if args.save is not None:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.compare is not None:
+        print()
+        worse = compare(results, json.load(open(args.compare, "r")), args.tolerance)
+        if len(worse) > 0:
+            print("Regressions: %s" % (", ".join(worse), ))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#
+# Benchmark of every stage of the pipeline on random (synthetic) networks
+# Reports the time and the peak memory of importing a network, duplicating, clipping
+# and modifying it, creating a compared query, exporting it and evaluating it -
+# for networks of every given size. No data files (or Marabou) are needed.
+#
+# Usage -
+#   python benchmark_pipeline.py [--sizes 10x50,20x200] [--save result.json] [--compare baseline.json]
+# Sizes are DEPTHxWIDTH (hidden layers x neurons per layer). `export_marabou` is
+# measured only if maraboupy is installed.
+# `--compare` reports the change from a previous run (saved with `--save`), and fails
+# if some measure is worse by more than `--tolerance` (see `benchmark_memory.compare`)
+#
+
+import io
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from redy.features import redundancy, clip, amend
+from redy.convert import import_nnet, export_evaluate, export_ipq, export_marabou
+
+from benchmark_memory import compare
+
+# Returns the contents of an NNET file of a random fully-connected ReLU network
+# with `depth` hidden layers of `width` neurons
+def random_nnet(depth, width, inputs=5, outputs=5, seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = [inputs] + [width] * depth + [outputs]
+    row = lambda values: ",".join("%.8g" % x for x in values) + ","
+
+    lines = ["// Random network (depth %d, width %d, seed %d)" % (depth, width, seed)]
+    lines.append(row([depth + 1, inputs, outputs, max(sizes)]))
+    lines.append(row(sizes))
+    lines.append("0,")
+    lines.append(row([-1] * inputs))
+    lines.append(row([1] * inputs))
+    lines.append(row([0] * (inputs + 1)))
+    lines.append(row([1] * (inputs + 1)))
+    for a, b in zip(sizes, sizes[1:]):
+        lines += [row(w) for w in rng.normal(size=(b, a)) / np.sqrt(a)]
+        lines += [row([x]) for x in rng.normal(size=b) * 0.1]
+    return "\n".join(lines) + "\n"
+
+# Returns (result, seconds, peak bytes) of calling `f`
+# `f` is called twice - timed, then traced (tracing slows down allocations)
+# `setup` - optional, called (not measured) before every call of `f`, whose result is passed to `f`
+def measure(f, setup=None):
+    args = () if setup is None else (setup(), )
+    start = time.perf_counter()
+    f(*args)
+    seconds = time.perf_counter() - start
+
+    args = () if setup is None else (setup(), )
+    tracemalloc.start()
+    try:
+        result = f(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+def _maraboupy():
+    try:
+        import maraboupy
+        return True
+    except ImportError:
+        return False
+
+def benchmark(depth, width, repeat=3, samples=1000):
+    text = random_nnet(depth, width)
+    results = {}
+
+    def stage(name, f, setup=None):
+        runs = [measure(f, setup) for _ in range(repeat)]
+        results[name + "_seconds"] = min(r[1] for r in runs)
+        results[name + "_peak_bytes"] = min(r[2] for r in runs)
+        return runs[0][0]
+
+    net = stage("import", lambda: import_nnet.import_nnet(text))
+    results["neurons"] = sum(net.layerSize(l) for l in range(net.layerCount()))
+
+    middle = net.layerCount() // 2
+    ns = [(middle, n, f) for n, f in zip(range(4), ["active", "inactive"] * 2)]
+    modified = {(l, n): f for l, n, f in ns}
+
+    # Stages which change their input in place get a new copy (not measured) for every run
+    duplicate = lambda: net.duplicate("_dup")
+    stage("duplicate", duplicate)
+    stage("clip", lambda dup: clip.clipNetwork(dup, clip.Range(firstLayer=1, firstMode=1)), duplicate)
+    stage("modify", lambda dup: amend.modify(dup, dict(modified)), duplicate)
+
+    rt = redundancy.RedundancyTest(net, 1e-4)
+    stage("join", lambda nets: amend.join(*nets, dict(modified)), lambda: rt.getModified(ns, returnNetwork=True))
+    stage("query", lambda: redundancy.RedundancyTest(net, 1e-4).getComparedExact(ns, "gt", 0))
+
+    view = rt.getComparedExact(ns, "gt", 0)
+    stage("export_ipq", lambda: export_ipq.export_ipq(view, io.StringIO()))
+    if _maraboupy(): stage("export_marabou", lambda: export_marabou.export_marabou(view))
+
+    network = net.toViewIO()
+    ev = stage("export_evaluate", lambda: export_evaluate.export_evaluate(network))
+    stage("forward_evaluate", lambda: ev.forwardEvaluate([0.1] * len(network.inputs)))
+    inputs = np.random.default_rng(0).uniform(-1, 1, (samples, len(network.inputs)))
+    stage("batch_evaluate", lambda: ev.batchValidate(ev.batchEvaluate(inputs)))
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the pipeline stages on random networks")
+    parser.add_argument("--sizes", default="4x50,8x100,16x200")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes.split(","):
+        depth, width = map(int, size.split("x"))
+        for k, v in benchmark(depth, width, args.repeat, args.samples).items():
+            results["%s/%s" % (size, k)] = v
+    for k, v in results.items():
+        print("%-40s %14.6g" % (k, v))
+
+    if args.save is not None:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.compare is not None:
+        print()
+        worse = compare(results, json.load(open(args.compare, "r")), args.tolerance, ("_seconds", "_peak_bytes"))
+        if len(worse) > 0:
+            print("Regressions: %s" % (", ".join(worse), ))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,12 @@
-from maraboupy import Marabou, MarabouCore
-
 from redy.features import redundancy, clip
+from redy.features.subspace import apply_subspace
+from redy.features import dispatch, split
+from redy.solvers import marabou, milp
+from redy.solvers.portfolio import Portfolio
 from redy.convert import import_nnet, export_marabou, export_evaluate
 
 ACAS5_9 = "./examples_data/acasxu/ACASXU_experimental_v2a_5_9.nnet"
 
-SPLIT = 2
-def apply_subspace(io, subspace):
-    assert type(subspace) is str
-    assert len(subspace) % len(io.inputs) == 0
-
-    subspace = list(map(int, subspace))
-    for split in range(0, len(subspace), len(io.inputs)):
-        split = subspace[split:split+len(io.inputs)]
-
-        for inp, ch in zip(io.inputs, split):
-            assert ch < SPLIT
-            l,u = inp.limit
-            sz = u-l
-            chsz = sz/float(SPLIT)
-            inp.updateLimit(l+ch*chsz,l+(ch+1)*chsz)
-
 def example_basics():
     net = import_nnet.import_nnet(open(ACAS5_9, "r").read())
     redtest = redundancy.RedundancyTest(net, 1e-4)
@@ -50,6 +36,25 @@ def example_basics():
     # Check if neuron (2, 34) is active (by finding a counter-example) (e.g. phase-redundancy)
     sum0 = redtest.getStateCheck(ns[0])
 
+    # Screen neurons by sampling the input domain first - queries are returned only for
+    # neurons which were never observed in the opposite phase, the rest come with a witness input
+    screened, witnesses = redtest.getScreenedStateChecks([(2, n, "inactive") for n in range(50)], samples=10000)
+
+    # Solve many queries in parallel (see `redy.solvers` for the available solvers)
+    for record in dispatch.Dispatcher(marabou.solve, workers=4, timeout=600).dispatch(screened.items()):
+        print(record.neuron, record.verdict)
+
+    # Solvers are interchangeable - e.g. solve small queries in-process as a MILP (without Marabou),
+    # or try the MILP first and fall back to Marabou
+    print(milp.solve(sum0, timeout=60)[0])
+    print(Portfolio(milp.solve, marabou.solve, budgets=[60, None])(com0, timeout=600)[0])
+
+    # Solve a query by adaptively splitting its input box - regions are bounded and sampled first,
+    # and only the hard ones are sent to the solver (and split again on timeout)
+    verdict, tree = split.splitSearch(com0, dispatch.Dispatcher(marabou.solve, workers=4, timeout=60))
+    print(verdict, tree.coverage())
+    print(tree) # The split tree, a region per line
+
     # Evaluate a modified network
     e = export_evaluate.export_evaluate(mod4.toViewIO())
     print(e.forwardEvaluate([0.12]*5))
@@ -63,16 +68,19 @@ def example_basics():
     #  - in the second split:
     #       - second half of #1 coordinate (1), first half of #2 coordinate (0),
     #         second half of #3 coordinate (1), ...
+    # Note: queries share nodes with the network (and with each other), so the query
+    # is duplicated before its input limits are changed
+    com2 = com2.duplicate()
     apply_subspace(com2, "0000010101")
 
-    # Run a Marabou query
+    # Run a Marabou query (directly, instead of `marabou.solve`)
     mara = export_marabou.export_marabou(com2)
     ipq = mara.getMarabouQuery() # Marabou query
-    # MarabouCore.saveQuery(ipq, "query.ipq") # If the query is needed for later or external query solving
+    # from maraboupy import MarabouCore; MarabouCore.saveQuery(ipq, "query.ipq") # If the query is needed for later or external query solving
     print(assert_no_to(mara.solve()))
 
     # Use SNC for faster queries and/or verbosity:
-    #mara.solve(options=Marabou.createOptions(verbosity=3, snc=True, numWorkers=8))
+    #from maraboupy import Marabou; mara.solve(options=Marabou.createOptions(verbosity=3, snc=True, numWorkers=8))
 
 def assert_no_to(v):
     vals, stats = v
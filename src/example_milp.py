@@ -1,5 +1,10 @@
 import re
 
+from redy.convert import import_nnet
+from redy.features import milp
+
+ACAS5_9 = "./examples_data/acasxu/ACASXU_experimental_v2a_5_9.nnet"
+
 def zipa(*lsts):
     assert len(set(map(len, lsts))) == 1
     return zip(*lsts)
@@ -45,8 +50,15 @@ def example_milp():
     #  create an ipq file using apply_subspace, export_marabou and saveQuery as done in example_basics.py)
     # 3. Parse the output, like the example below
 
-    milp = parse_milp("examples_data/milp_acasxu_5_9.txt")
-    print("Neuron 2,4 bounds: %r" % (milp[2][4], ))
+    bounds = parse_milp("examples_data/milp_acasxu_5_9.txt")
+    print("Neuron 2,4 bounds: %r" % (bounds[2][4], ))
+
+    # Alternatively, compute the bounds in-process (using SciPy's HiGHS), without Marabou.
+    # The bounds are also written into the nodes' limits.
+    # (on a sub-domain, use `apply_subspace(net.toViewIO(), ...)` first; `lp=True` for faster and looser bounds)
+    net = import_nnet.import_nnet(path=ACAS5_9)
+    bounds = milp.milpBounds(net, timeout=10, workers=8)
+    print("Neuron 2,4 bounds: %r" % (bounds[2][4], ))
 
 if __name__ == "__main__":
     example_milp()
@@ -1,5 +1,3 @@
-from maraboupy import Marabou
-
 from redy.features import redundancy
 from redy.convert import import_nnet, export_evaluate
 from redy.framework.equations import Equation
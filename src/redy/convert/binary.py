@@ -0,0 +1,197 @@
+#
+# Binary (memory-mappable) format of ViewNetwork and ViewIO
+# See `export_binary` and `import_binary`
+#
+# A file is a header followed by arrays:
+#   MAGIC, header size (8 bytes, little endian), header (JSON), arrays
+# The header has the kind ("network"/"view"), names of the nodes, and the
+# offset, dtype and shape of every array. Arrays are aligned to ALIGN bytes,
+# so they are opened in place with `np.memmap` (zero-copy, pages are shared
+# between processes which load the same file).
+#
+
+import json
+import struct
+from array import array
+
+import numpy as np
+
+from redy.framework import nodes, views, packed, equations
+
+MAGIC = b"REDYBIN1"
+ALIGN = 64
+
+# Node types of a view
+NODE, SUM, RELU, ABS = 0, 1, 2, 3
+# Equation types of a view
+compareTrans = {
+    equations.Equation.Comparator.EQ: 0,
+    equations.Equation.Comparator.GE: 1,
+    equations.Equation.Comparator.LE: 2,
+}
+compareInv = {v: k for k, v in compareTrans.items()}
+
+def _write(path, kind, header, arrays):
+    layout, offset = {}, 0
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        layout[name] = (offset, a.dtype.str, a.shape)
+        arrays[name] = a
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+    header = dict(header, kind=kind, arrays=layout)
+    raw = json.dumps(header).encode()
+
+    start = len(MAGIC) + 8 + len(raw)
+    start += -start % ALIGN
+    with open(path, "wb") as fp:
+        fp.write(MAGIC + struct.pack("<Q", len(raw)) + raw)
+        fp.write(b"\0" * (start - fp.tell()))
+        for name, a in arrays.items():
+            fp.seek(start + layout[name][0])
+            fp.write(a.tobytes())
+        fp.truncate(start + offset)
+
+# Returns (header, arrays) of a file, arrays are read-only memory maps
+def _read(path):
+    with open(path, "rb") as fp:
+        assert fp.read(len(MAGIC)) == MAGIC, "Not a Redy binary file"
+        size, = struct.unpack("<Q", fp.read(8))
+        header = json.loads(fp.read(size).decode())
+    start = len(MAGIC) + 8 + size
+    start += -start % ALIGN
+
+    arrays = {}
+    for name, (offset, dtype, shape) in header["arrays"].items():
+        if np.prod(shape) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=start + offset, shape=tuple(shape))
+    return header, arrays
+
+def _network(net):
+    layers = packed.pack(net)
+    header = {"names": [l.names for l in layers], "actNames": [l.actNames for l in layers]}
+    arrays = {}
+    for i, l in enumerate(layers):
+        if not l.isInput():
+            arrays["%d.weights" % i] = l.weights
+            arrays["%d.bias" % i] = l.bias
+        for name in ["modes", "relaxed", "lower", "upper", "actLower", "actUpper"]:
+            arrays["%d.%s" % (i, name)] = getattr(l, name)
+    return header, arrays
+
+def _view(view):
+    order = list(view.nodes)
+    index = {n: i for i, n in enumerate(order)}
+    lim = lambda x, default: default if x is None else x
+
+    types = np.zeros(len(order), dtype=np.int8)
+    lower = np.array([lim(n.limit[0], -np.inf) for n in order], dtype=float)
+    upper = np.array([lim(n.limit[1], np.inf) for n in order], dtype=float)
+    scalars = np.zeros(len(order))
+    inputOf = np.full(len(order), -1, dtype=np.int64)
+    relaxed = np.zeros(len(order), dtype=bool)
+
+    # Sources of sums, once for every shared tuple (see `NodeSum`), and the coefficients of every sum
+    group = np.full(len(order), -1, dtype=np.int64)
+    groups, groupVars = {}, []
+    coeffStarts, coeffs = [0], []
+    for i, n in enumerate(order):
+        if isinstance(n, nodes.NodeSum):
+            types[i] = SUM
+            scalars[i] = n.scalar
+            if id(n.sources) not in groups:
+                groups[id(n.sources)] = len(groupVars)
+                groupVars.append([index[v] for v in n.sources])
+            group[i] = groups[id(n.sources)]
+            coeffs.extend(n.coeffs)
+        elif isinstance(n, (nodes.NodeReLU, nodes.NodeAbs)):
+            types[i] = RELU if isinstance(n, nodes.NodeReLU) else ABS
+            inputOf[i] = index[n.input]
+            relaxed[i] = isinstance(n, nodes.NodeReLU) and n.relaxed
+        else:
+            assert type(n) == nodes.Node, "Unknown node type %r" % (n, )
+        coeffStarts.append(len(coeffs))
+
+    eqTerms = [e.terms for e in view.equations]
+    arrays = {
+        "types": types, "lower": lower, "upper": upper, "scalars": scalars,
+        "inputOf": inputOf, "relaxed": relaxed,
+        "group": group,
+        "groupStarts": np.cumsum([0] + [len(g) for g in groupVars], dtype=np.int64),
+        "groupVars": np.array([v for g in groupVars for v in g], dtype=np.int64),
+        "coeffStarts": np.array(coeffStarts, dtype=np.int64),
+        "coeffs": np.array(coeffs, dtype=float),
+        "inputs": np.array([index[n] for n in view.inputs], dtype=np.int64),
+        "outputs": np.array([index[n] for n in view.outputs], dtype=np.int64),
+        "eqTypes": np.array([compareTrans[e.comparator] for e in view.equations], dtype=np.int8),
+        "eqScalars": np.array([e.scalar for e in view.equations], dtype=float),
+        "eqStarts": np.cumsum([0] + [len(t) for t in eqTerms], dtype=np.int64),
+        "eqVars": np.array([index[v] for t in eqTerms for c, v in t], dtype=np.int64),
+        "eqCoeffs": np.array([c for t in eqTerms for c, v in t], dtype=float),
+    }
+    header = {"names": [n.name for n in order], "set": isinstance(view.nodes, (set, frozenset))}
+    return header, arrays
+
+# Saves a ViewNetwork (as packed layers, see `packed.pack`) or a ViewIO into `path`
+def export_binary(obj, path):
+    if isinstance(obj, views.ViewNetwork):
+        _write(path, "network", *_network(obj))
+    else:
+        assert isinstance(obj, views.ViewIO), "Unknown object %r" % (obj, )
+        _write(path, "view", *_view(obj))
+
+def _loadNetwork(header, arrays):
+    layers = []
+    for i, (names, actNames) in enumerate(zip(header["names"], header["actNames"])):
+        l = packed.PackedLayer(0)
+        if "%d.weights" % i in arrays:
+            l.weights, l.bias = arrays["%d.weights" % i], arrays["%d.bias" % i]
+        else:
+            l.bias = np.zeros(len(names))
+        for name in ["modes", "relaxed", "lower", "upper", "actLower", "actUpper"]:
+            setattr(l, name, arrays["%d.%s" % (i, name)])
+        l.names, l.actNames = names, actNames
+        layers.append(l)
+    return packed.ArrayNetwork(layers)
+
+def _loadView(header, arrays):
+    types, names = arrays["types"], header["names"]
+    fin = lambda x: float(x) if np.isfinite(x) else None
+    cls = {NODE: nodes.Node, SUM: nodes.NodeSum, RELU: nodes.NodeReLU, ABS: nodes.NodeAbs}
+    order = [cls[t]() for t in types.tolist()]
+    for n, name, l, u in zip(order, names, arrays["lower"].tolist(), arrays["upper"].tolist()):
+        n.name = name
+        n.limit = (fin(l), fin(u))
+
+    groupStarts, groupVars = arrays["groupStarts"], arrays["groupVars"]
+    sources = [tuple(order[v] for v in groupVars[s:e].tolist()) for s, e in zip(groupStarts[:-1], groupStarts[1:])]
+    coeffStarts, coeffs = arrays["coeffStarts"], arrays["coeffs"]
+    for i in np.flatnonzero(types == SUM).tolist():
+        n = order[i]
+        n.sources = sources[arrays["group"][i]]
+        n.coeffs = array("d", coeffs[coeffStarts[i]:coeffStarts[i+1]].tobytes())
+        n.scalar = float(arrays["scalars"][i])
+    for i in np.flatnonzero((types == RELU) | (types == ABS)).tolist():
+        order[i].input = order[arrays["inputOf"][i]]
+        if types[i] == RELU: order[i].relaxed = bool(arrays["relaxed"][i])
+
+    eqs = []
+    eqStarts, eqVars, eqCoeffs = arrays["eqStarts"], arrays["eqVars"], arrays["eqCoeffs"]
+    for k, (t, scalar) in enumerate(zip(arrays["eqTypes"].tolist(), arrays["eqScalars"].tolist())):
+        s, e = eqStarts[k], eqStarts[k+1]
+        terms = [(c, order[v]) for c, v in zip(eqCoeffs[s:e].tolist(), eqVars[s:e].tolist())]
+        eqs.append(equations.Equation(terms, compareInv[t], scalar))
+
+    ns = set(order) if header["set"] else order
+    return views.ViewIO(ns, [order[i] for i in arrays["inputs"].tolist()], [order[i] for i in arrays["outputs"].tolist()], eqs)
+
+# Loads a file saved by `export_binary`
+# A network is loaded as a (not materialized) `packed.ArrayNetwork` whose arrays are
+# memory maps of the file - nodes are created only when needed.
+# A view is loaded with new nodes (its arrays are not kept).
+def import_binary(path):
+    header, arrays = _read(path)
+    if header["kind"] == "network": return _loadNetwork(header, arrays)
+    assert header["kind"] == "view", "Unknown kind %r" % (header["kind"], )
+    return _loadView(header, arrays)
@@ -0,0 +1,67 @@
+#
+# Convert from Redy representation (ViewNetwork) into
+# an object for fast (vectorized) evaluation of many inputs at once.
+# See `export_batch`
+#
+
+import numpy as np
+
+from redy.framework import packed
+
+EPSILON = 1e-13
+
+# Converts a ViewNetwork into an object for batch evaluation
+def export_batch(net):
+    return BatchEvaluator(packed.pack(net))
+
+class BatchEvaluator(object):
+    def __init__(self, layers):
+        # List of PackedLayer, see `packed.pack`
+        self.layers = layers
+        self.inputSize = layers[0].size()
+        self.outputSize = layers[-1].size()
+
+    # Applies the activation of every neuron in `layer` on `pre` (N, layer size)
+    def activate(self, layer, pre):
+        if not (layer.modes != packed.IDENTITY).any(): return pre
+
+        # ReLU is max(x, 0), identity is max(x, -inf)
+        floor = np.where(layer.modes == packed.RELU, 0., -np.inf)
+        post = np.maximum(pre, floor)
+
+        # Fixed and "nofunc" neurons are few, so column assignment is cheap
+        const = layer.indices(packed.CONST)
+        if len(const) > 0: post[:, const] = layer.actLower[const]
+        free = layer.indices(packed.FREE)
+        if len(free) > 0: post[:, free] = np.nan # Undetermined
+        return post
+
+    # Evaluate the network with inputs `inp` of shape (N, inputs) (or a single input)
+    # Returns the outputs (N, outputs).
+    # `returnLayers` - also return a list of (pre, post) activations for every layer
+    #                  (pre - value of the input/WS node, post - value of the last node)
+    # Note: "nofunc" neurons (and everything depending on them) evaluate to NaN
+    def forwardEvaluate(self, inp, returnLayers=False):
+        x = np.asarray(inp, dtype=float)
+        single = x.ndim == 1
+        if single: x = x[None, :]
+        assert x.ndim == 2 and x.shape[1] == self.inputSize, "Unexpected input size"
+
+        acts = []
+        for layer in self.layers:
+            pre = x if layer.isInput() else x @ layer.weights.T + layer.bias
+            x = self.activate(layer, pre)
+            acts.append((pre, x))
+
+        out = x[0] if single else x
+        if not returnLayers: return out
+        return out, acts
+
+    # Given the per-layer activations returned by `forwardEvaluate`, returns
+    # a mask (N, ) of the samples in which every node is within its limits
+    def inLimits(self, acts, epsilon=EPSILON):
+        valid = np.ones(len(acts[0][0]), dtype=bool)
+        for layer, (pre, post) in zip(self.layers, acts):
+            valid &= ((pre >= layer.lower - epsilon) & (pre <= layer.upper + epsilon)).all(axis=1)
+            valid &= ((post >= layer.actLower - epsilon) & (post <= layer.actUpper + epsilon)).all(axis=1)
+        return valid
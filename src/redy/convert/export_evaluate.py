@@ -4,18 +4,34 @@
 # See `export_evaluate`
 #
 
+from collections import deque, defaultdict, namedtuple
+
+import numpy as np
+
 from redy.framework import nodes
 from redy.framework import equations
+from redy.framework import instrument
 
 EPSILON = 1e-13
 
+# Result of `Evaluator.batchValidate`. Masks are True where violated:
+# `lowerBounds`/`upperBounds` - (N, len(Evaluator.lowerBounds/upperBounds)), in dict order
+# `equations` - (N, len(Evaluator.equList))
+# `constraints` - (N, len(Evaluator.constraints))
+# `undetermined` - (N, ) samples with variables without an assignment (NaN)
+# `valid` - (N, ) samples without any violation
+# `worst` - (N, ) magnitude of the worst violation (inf for undetermined samples)
+BatchValidation = namedtuple("BatchValidation", ("lowerBounds", "upperBounds", "equations", "constraints", "undetermined", "valid", "worst"))
+
 # Converts a ViewIO into an object for evaluation
+@instrument.timed("export_evaluate", lambda args, result: args[0])
 def export_evaluate(view):
     ev = Evaluator()
 
     nl = list(view.nodes)
     
-    trans = nl.index
+    index = {n: i for i, n in enumerate(nl)}
+    trans = index.__getitem__
     ev.numVars = len(nl)
     ev.inputVars = [trans(n) for n in view.inputs]
     ev.outputVars = [trans(n) for n in view.outputs]
@@ -34,6 +50,8 @@ def export_evaluate(view):
             ev.equList.append( (0, -node.scalar, terms) )
         elif isinstance(node, nodes.NodeReLU):
             ev.constraints.append( ("relu", trans(node.input), nodev) )
+        elif isinstance(node, nodes.NodeAbs):
+            ev.constraints.append( ("absoluteValue", trans(node.input), nodev) )
         elif type(node) == nodes.Node:
             pass
         else:
@@ -54,8 +72,37 @@ def export_evaluate(view):
         ev.translate[n] = trans(n)
         ev.translate[trans(n)] = n
 
+    ev.compile()
+
+    return ev
+
+# Converts a Marabou InputQuery (`import_ipq.Query`) into an object for evaluation
+# (without building a ViewIO, so every constraint of the query is supported)
+def query_evaluate(q):
+    ev = Evaluator()
+    ev.numVars = q.numVars
+    ev.inputVars = list(q.inputVars)
+    ev.outputVars = list(q.outputVars)
+    ev.lowerBounds = dict(q.lowerBounds)
+    ev.upperBounds = dict(q.upperBounds)
+    ev.equList = list(q.equList)
+    ev.constraints = list(q.constraints)
+
+    ev.compile()
+
     return ev
 
+# Value of a piecewise-linear constraint given the value(s) of its input(s)
+def _apply(t, b):
+    if t == "relu": return max(0, b)
+    elif t == "absoluteValue": return abs(b)
+    elif t == "max": return max(b)
+    assert False, "Unknown constraint %r" % (t, )
+
+# Inputs (list of variables) of a piecewise-linear constraint
+def _inputs(t, vb):
+    return vb if t == "max" else [vb]
+
 class Evaluator(object):
     def __init__(self):
         self.translate = {}
@@ -67,8 +114,78 @@ class Evaluator(object):
         self.upperBounds = {}
 
         self.equList = [] # List of (equType, scalar, adds). equType = enum(equ, ge, le)
-        # TODO: Support other types, like abs
-        self.constraints = [] # List of ("relu", b, f)
+        self.constraints = [] # List of ("relu"/"absoluteValue", b, f) or ("max", [b...], f)
+
+        # Evaluation schedule, see `compile`
+        self.schedule = None
+        self.undetermined = []
+        self.batchSchedule = None
+
+    # Variables fixed by their bounds, as a list of (var, value)
+    def fixedVars(self):
+        return [(v, l) for v, l in self.lowerBounds.items() if self.upperBounds.get(v, None) == l]
+
+    # Computes the order in which variables are determined from the input.
+    # Every variable is determined once, by the first equation (or constraint)
+    # in which it is the only unknown. Must be called again if the equations
+    # or the constraints are changed.
+    # Variables which cannot be determined are listed in `undetermined`.
+    def compile(self):
+        known = set(self.inputVars)
+        known.update(v for v, _ in self.fixedVars())
+
+        # Number of unknown terms of every equation and where every variable is used
+        unknowns = {}
+        equUses = defaultdict(list)
+        consUses = defaultdict(list)
+        readyEqu, readyCons = deque(), deque()
+        for i, (equType, scalar, adds) in enumerate(self.equList):
+            if equType != 0: continue
+            unknowns[i] = 0
+            for v, c in adds:
+                if v in known: continue
+                unknowns[i] += 1
+                equUses[v].append(i)
+            if unknowns[i] == 1: readyEqu.append(i)
+        consUnknowns = {}
+        for i, (t, vb, vf) in enumerate(self.constraints):
+            assert t in ["relu", "absoluteValue", "max"], "Unknown constraint %r" % (t, )
+            vbs = set(_inputs(t, vb)) - known
+            consUnknowns[i] = len(vbs)
+            if len(vbs) == 0: readyCons.append(i)
+            for v in vbs: consUses[v].append(i)
+
+        def learn(v):
+            known.add(v)
+            for i in equUses[v]:
+                unknowns[i] -= 1
+                if unknowns[i] == 1: readyEqu.append(i)
+            for i in consUses[v]:
+                consUnknowns[i] -= 1
+                if consUnknowns[i] == 0: readyCons.append(i)
+
+        # Equations are preferred over constraints, as in a fixpoint evaluation
+        self.schedule = []
+        while len(readyEqu) > 0 or len(readyCons) > 0:
+            if len(readyEqu) > 0:
+                equType, scalar, adds = self.equList[readyEqu.popleft()]
+                newVars = [(v, c) for v, c in adds if v not in known]
+                if len(newVars) != 1: continue
+                nv, nc = newVars[0]
+                self.schedule.append(("equ", nv, nc, scalar, [(v, c) for v, c in adds if v != nv]))
+                learn(nv)
+            else:
+                t, vb, vf = self.constraints[readyCons.popleft()]
+                if vf in known: continue
+                self.schedule.append((t, vb, vf))
+                learn(vf)
+
+        self.undetermined = [v for v in range(self.numVars) if v not in known]
+        self.batchSchedule = None
+
+    # Nodes which cannot be determined from the input (see `compile`)
+    def undeterminedNodes(self):
+        return [self.translate.get(v, v) for v in self.undetermined]
 
     # Evaluate the network with input `inp`.
     # `validate` - should equations be validated after evaluation?
@@ -85,33 +202,18 @@ class Evaluator(object):
             d[v] = c
 
         # Set all fixed variables
-        for v,l in self.lowerBounds.items():
-            if v not in self.upperBounds: continue
-            u = self.upperBounds[v]
-            if l == u: d[v] = u
-
-        # Forward evaluate
-        while True:
-            cont = False
-
-            for equType, scalar, adds in self.equList:
-                if equType != 0: continue
-                newVars = [(v, c) for v, c in adds if v not in d]
-                if len(newVars) != 1: continue
-                nv, nc = newVars[0]
-
-                d[nv] = -(sum(d[v]*c for v, c in adds if v != nv) - scalar) / nc
-                cont = True
-            if cont: continue
-
-            for t, vb, vf in self.constraints:
-                assert t == "relu", "Only ReLU is currently supported"
-                if vb in d and vf not in d:
-                    d[vf] = max(0, d[vb])
-                    cont = True
-            if cont: continue
+        for v, c in self.fixedVars():
+            d[v] = c
 
-            break
+        # Forward evaluate (single pass over the compiled schedule)
+        if self.schedule is None: self.compile()
+        for step in self.schedule:
+            if step[0] == "equ":
+                _, nv, nc, scalar, others = step
+                d[nv] = -(sum(d[v]*c for v, c in others) - scalar) / nc
+            else:
+                t, vb, vf = step
+                d[vf] = _apply(t, [d[v] for v in vb] if t == "max" else d[vb])
 
         # Validate if required
         if validate:
@@ -129,7 +231,7 @@ class Evaluator(object):
     
     def validate(self, d):
         # Did all variables got assignments?
-        assert len(d) == self.numVars
+        assert len(d) == self.numVars, "Undetermined variables %r" % ([v for v in range(self.numVars) if v not in d], )
 
         # Are all variables are in bound?
         for v, c in self.lowerBounds.items(): assert d[v] >= c - EPSILON, v
@@ -150,7 +252,127 @@ class Evaluator(object):
 
         # Are there any violated piecewise-linear constraints?
         for t, vb, vf in self.constraints:
-            assert t == "relu", "Only ReLU is currently supported"
-            assert d[vf] == max(0, d[vb])
+            assert d[vf] == _apply(t, [d[v] for v in vb] if t == "max" else d[vb]), (t, vb, vf)
 
         # Good!
+
+    # Packs the schedule and the equations into arrays, for batch evaluation/validation
+    def _compileBatch(self):
+        if self.schedule is None: self.compile()
+
+        steps = []
+        for step in self.schedule:
+            if step[0] == "equ":
+                _, nv, nc, scalar, others = step
+                vs = np.array([v for v, c in others], dtype=np.int64)
+                cs = np.array([c for v, c in others], dtype=float)
+                steps.append(("equ", nv, nc, scalar, vs, cs))
+            elif step[0] == "max":
+                _, vb, vf = step
+                steps.append(("max", np.array(vb, dtype=np.int64), vf))
+            else:
+                steps.append(step)
+
+        # Equations as flat term arrays, summed with np.add.reduceat
+        lengths = np.array([len(adds) for _, _, adds in self.equList], dtype=np.int64)
+        equations = (
+            np.array([equType for equType, _, _ in self.equList], dtype=np.int64),
+            np.array([scalar for _, scalar, _ in self.equList], dtype=float),
+            np.array([v for _, _, adds in self.equList for v, c in adds], dtype=np.int64),
+            np.array([c for _, _, adds in self.equList for v, c in adds], dtype=float),
+            np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64),
+            lengths,
+        )
+
+        self.batchSchedule = (steps, equations)
+
+    # Evaluate the network with inputs `inp` of shape (N, inputs)
+    # Returns an assignment matrix (N, numVars), undetermined variables are NaN.
+    def batchEvaluate(self, inp):
+        inp = np.asarray(inp, dtype=float)
+        assert inp.ndim == 2 and inp.shape[1] == len(self.inputVars), "Unexpected input size"
+        if self.batchSchedule is None: self._compileBatch()
+        steps, _ = self.batchSchedule
+
+        # Variables are rows, so every step works on contiguous memory
+        x = np.full((self.numVars, len(inp)), np.nan)
+        x[self.inputVars] = inp.T
+        for v, c in self.fixedVars():
+            x[v] = c
+
+        for step in steps:
+            if step[0] == "equ":
+                _, nv, nc, scalar, vs, cs = step
+                x[nv] = -(cs @ x[vs] - scalar) / nc
+            elif step[0] == "relu":
+                _, vb, vf = step
+                x[vf] = np.maximum(x[vb], 0)
+            elif step[0] == "absoluteValue":
+                _, vb, vf = step
+                x[vf] = np.abs(x[vb])
+            else:
+                _, vb, vf = step
+                x[vf] = x[vb].max(axis=0)
+
+        return x.T
+
+    # Validates an assignment matrix `x` (N, numVars), see `BatchValidation`
+    # Note: unlike `validate`, piecewise-linear constraints are checked up to EPSILON
+    def batchValidate(self, x):
+        x = np.asarray(x, dtype=float)
+        assert x.ndim == 2 and x.shape[1] == self.numVars, "Unexpected assignment size"
+        if self.batchSchedule is None: self._compileBatch()
+        _, (equTypes, scalars, termVars, termCoeffs, starts, lengths) = self.batchSchedule
+
+        # Variables are rows (no copy for the output of `batchEvaluate`)
+        xt = np.ascontiguousarray(x.T)
+        violation = lambda m: np.where(np.isnan(m), np.inf, m).T
+
+        # Bounds
+        lowerVars = np.fromiter(self.lowerBounds.keys(), dtype=np.int64, count=len(self.lowerBounds))
+        lowers = np.fromiter(self.lowerBounds.values(), dtype=float, count=len(self.lowerBounds))
+        upperVars = np.fromiter(self.upperBounds.keys(), dtype=np.int64, count=len(self.upperBounds))
+        uppers = np.fromiter(self.upperBounds.values(), dtype=float, count=len(self.upperBounds))
+        lowerViolation = violation(lowers[:, None] - xt[lowerVars])
+        upperViolation = violation(xt[upperVars] - uppers[:, None])
+
+        # Equations, summed in chunks of samples to bound the memory of the terms matrix
+        res = np.zeros((len(self.equList), len(x)))
+        nonEmpty = lengths > 0
+        chunk = max(1, (1 << 24) // max(1, len(termVars)))
+        for i in range(0, len(x) if len(termVars) > 0 else 0, chunk):
+            terms = xt[termVars, i:i+chunk] * termCoeffs[:, None]
+            res[nonEmpty, i:i+chunk] = np.add.reduceat(terms, starts[nonEmpty], axis=0)
+        res -= scalars[:, None]
+        assert np.isin(equTypes, [0, 1, 2]).all(), equTypes
+        equTypes = equTypes[:, None]
+        equViolation = violation(np.select([equTypes == 0, equTypes == 1], [np.abs(res), -res], res))
+
+        # Piecewise-linear constraints
+        # The expected value of every constraint's output, computed for each type at once
+        types = np.array([t for t, vb, vf in self.constraints], dtype=object)
+        vfs = np.array([vf for t, vb, vf in self.constraints], dtype=np.int64)
+        expected = np.empty((len(self.constraints), len(x)))
+        for t, f in [("relu", lambda b: np.maximum(b, 0)), ("absoluteValue", np.abs)]:
+            idx = np.flatnonzero(types == t)
+            vbs = np.array([self.constraints[i][1] for i in idx], dtype=np.int64)
+            expected[idx] = f(xt[vbs])
+        idx = np.flatnonzero(types == "max")
+        if len(idx) > 0:
+            # Inputs of all max constraints as a flat array, reduced with np.maximum.reduceat
+            maxVars = [self.constraints[i][1] for i in idx]
+            vbs = np.array([v for vb in maxVars for v in vb], dtype=np.int64)
+            maxStarts = np.concatenate(([0], np.cumsum([len(vb) for vb in maxVars])[:-1])).astype(np.int64)
+            expected[idx] = np.maximum.reduceat(xt[vbs], maxStarts, axis=0)
+        consViolation = violation(np.abs(xt[vfs] - expected))
+
+        undetermined = np.isnan(xt).any(axis=0)
+        violations = [lowerViolation, upperViolation, equViolation, consViolation]
+        worst = np.max([v.max(axis=1, initial=0) for v in violations], axis=0)
+        worst[undetermined] = np.inf
+        masks = [v > EPSILON for v in violations]
+
+        valid = ~undetermined
+        for m in masks: valid &= ~m.any(axis=1)
+
+        return BatchValidation(*masks, undetermined, valid, worst)
@@ -0,0 +1,87 @@
+#
+# Convert from Redy representation (ViewIO) into
+# a Marabou InputQuery file (.ipq), without maraboupy.
+# See `export_ipq`
+#
+
+from redy.framework import nodes
+from redy.framework import equations
+from redy.framework import instrument
+from redy.framework import canonical
+from redy.convert.mitigations import constant_nodes
+
+# Marabou's Equation types
+compareTrans = {
+    equations.Equation.Comparator.EQ: 0,
+    equations.Equation.Comparator.GE: 1,
+    equations.Equation.Comparator.LE: 2,
+}
+
+def _num(x):
+    return repr(float(x))
+
+# Writes a ViewIO into `f` (a path or a file object) in the format of Marabou's
+# `saveQuery` (which `import_ipq.Query` reads), line by line.
+# Variables are numbered with the inputs first (in order), then the rest of the nodes
+# in canonical order (see `canonical.canonicalOrder`), so the same query is always
+# written the same way (even if its nodes are a set).
+# Note: like `export_marabou`, constant nodes are added to the input
+#       (see `mitigations.constant_nodes`). The real inputs are the first len(view.inputs) inputs.
+# Returns a table for conversion from ViewIO Nodes to variables and conversely
+@instrument.timed("export_ipq", lambda args, result: args[0])
+def export_ipq(view, f):
+    if not hasattr(f, "write"):
+        with open(f, "w") as fp:
+            return export_ipq(view, fp)
+
+    inputs = set(view.inputs)
+    order = list(view.inputs) + [n for n in canonical.canonicalOrder(view) if n not in inputs]
+    trans = {n: v for v, n in enumerate(order)}
+    assert len(trans) == len(view.nodes)
+
+    inputVars = [trans[n] for n in view.inputs + constant_nodes(view)]
+    outputVars = [trans[n] for n in view.outputs]
+
+    sums = [n for n in order if isinstance(n, nodes.NodeSum)]
+    constraints = [n for n in order if isinstance(n, (nodes.NodeReLU, nodes.NodeAbs))]
+    for n in order:
+        assert isinstance(n, (nodes.NodeSum, nodes.NodeReLU, nodes.NodeAbs)) or type(n) == nodes.Node, "Unknown node type %r" % (n, )
+        assert not (isinstance(n, nodes.NodeReLU) and n.relaxed), "Relaxed ReLUs can not be saved (%r)" % (n, )
+
+    w = lambda line: f.write(line + "\n")
+    w("%d" % (len(order), ))
+    w("%d" % (sum(1 for n in order if n.limit[0] is not None), ))
+    w("%d" % (sum(1 for n in order if n.limit[1] is not None), ))
+    w("%d" % (len(sums) + len(view.equations), ))
+    w("%d" % (len(constraints), ))
+
+    w("%d" % (len(inputVars), ))
+    for i, v in enumerate(inputVars): w("%d,%d" % (i, v))
+    w("%d" % (len(outputVars), ))
+    for i, v in enumerate(outputVars): w("%d,%d" % (i, v))
+
+    for n in order:
+        if n.limit[0] is not None: w("%d,%s" % (trans[n], _num(n.limit[0])))
+    for n in order:
+        if n.limit[1] is not None: w("%d,%s" % (trans[n], _num(n.limit[1])))
+
+    # WS nodes: sum(c * v) - node = -scalar
+    i = 0
+    for n in sums:
+        terms = "".join(",%d,%s" % (trans[v], _num(c)) for c, v in n.inputs)
+        w("%d,0,%s%s,%d,%s" % (i, _num(-n.scalar), terms, trans[n], _num(-1)))
+        i += 1
+    for e in view.equations:
+        terms = "".join(",%d,%s" % (trans[v], _num(c)) for c, v in e.terms)
+        w("%d,%d,%s%s" % (i, compareTrans[e.comparator], _num(e.scalar), terms))
+        i += 1
+
+    for i, n in enumerate(constraints):
+        name = "relu" if isinstance(n, nodes.NodeReLU) else "absoluteValue"
+        w("%d,%s,%d,%d" % (i, name, trans[n], trans[n.input]))
+
+    table = {}
+    for n, v in trans.items():
+        table[n] = v
+        table[v] = n
+    return table
@@ -1,57 +1,23 @@
 #
 # Convert from Redy representation (ViewIO) into
 # Marabou object for query dispatching.
-# See `export_marabou`
+# See `export_marabou` (maraboupy is loaded on first use)
 #
 
 import numpy as np
 
 from redy.framework import nodes
 from redy.framework import equations
+from redy.framework import instrument
 
-from maraboupy.MarabouNetwork import MarabouNetwork
-from maraboupy import MarabouUtils
-from maraboupy import MarabouCore
-
-def reachable_from_input(view):
-    reachable = []
-    current = view.inputs
-    while len(current) > 0:
-        new_current = []
-
-        for n in current: _reachable_from_input(view, reachable, n)
-        for eq in view.equations:
-            if eq.comparator != equations.Equation.Comparator.EQ: continue
-
-            terms = set([n for _, n in eq.terms])
-            not_reached = [n for n in terms if n not in reachable]
-            if len(not_reached) == 1: new_current.append(not_reached[0])
-
-        current = new_current
-
-    return reachable
-
-def _reachable_from_input(view, reachable, node):
-    if node in reachable: return
-    reachable.append(node)
-    for n in get_node_next(view, node): _reachable_from_input(view, reachable, n)
-
-def get_node_next(view, node):
-    outputs = []
-    for n in view.nodes:
-        if node in n.connectedTo(): outputs.append(n)
-    return outputs
+from redy.convert.mitigations import reachable_from_input, get_node_next, constant_nodes
 
 # The Marabou version we used had a bug where variables
 # unreachable from the input would get discarded (even if they
 # may affect other neurons). This adds them to the input to
-# mitigate the bug.
+# mitigate the bug. See `mitigations.constant_nodes`
 def mitigate_marabou_constant_nodes_bug(view, mnn):
-    #suspected = [node for node in view.nodes if type(node) == nodes.Node and node not in view.inputs]
-    reachable = set(reachable_from_input(view))
-
-    suspected = set(view.nodes) - reachable
-    assert all(node.limit[0] == node.limit[1] for node in suspected)
+    suspected = constant_nodes(view)
 
     old_input = list(mnn.inputVars[0].tolist())
     to_be_added = [mnn.translate[n] for n in suspected]
@@ -65,7 +31,12 @@ def mitigate_marabou_constant_nodes_bug(view, mnn):
 
 # Convert ViewIO to a Marabou object
 # Note: this method add nodes to the input. (see call to `mitigate_marabou_constant_nodes_bug` below)
+@instrument.timed("export_marabou", lambda args, result: args[0])
 def export_marabou(view):
+    from maraboupy.MarabouNetwork import MarabouNetwork
+    from maraboupy import MarabouUtils
+    from maraboupy import MarabouCore
+
     nn = MarabouNetwork()
 
     # Important note: Marabou does not preserve input order, so their's
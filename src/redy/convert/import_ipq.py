@@ -3,35 +3,97 @@
 # See `import_ipq`
 #
 
-from itertools import chain
+from array import array
+from types import MappingProxyType
+
+import numpy as np
 
 from redy.framework import nodes, views, equations
+from redy.convert.reader import LineReader
 
 NNET_COUNTER = 0
 
-def build_weighted_sum(q, var, l, netPrefix, strict):
+# Tracks which equations/ReLUs of a Query can define a new variable, given the
+# variables defined so far (`var`). Every variable is processed once, so building
+# all layers takes linear time.
+class _Worklist(object):
+    def __init__(self, q, strict):
+        self.q = q
+        self.strict = strict
+
+        self.equations = np.flatnonzero(q.equTypes == 0)
+        if strict: assert len(self.equations) == len(q.equTypes)
+
+        # Number of unknown terms of every equation, and the equations of every variable
+        # (equations using variable v are equUses[useStarts[v]:useStarts[v+1]])
+        lengths = np.diff(q.equStarts)
+        self.unknown = np.where(q.equTypes == 0, lengths, 0)
+        termEqu = np.repeat(np.arange(len(lengths)), lengths)
+        termEqu, termVars = termEqu[q.equTypes[termEqu] == 0], q.termVars[q.equTypes[termEqu] == 0]
+        order = np.argsort(termVars, kind="stable")
+        self.equUses = termEqu[order]
+        self.useStarts = np.searchsorted(termVars[order], np.arange(q.numVars + 1))
+        self.readyEqu = set(np.flatnonzero(self.unknown == 1).tolist())
+        self.touched = [] # Equations whose unknown count changed
+
+        assert all(tt == "relu" for tt, vb, vf in q.constraints)
+        self.reluUses = {}
+        for i, (tt, vb, vf) in enumerate(q.constraints):
+            self.reluUses.setdefault(vb, []).append(i)
+        self.readyRelu = set()
+
+    # Marks the variables in `vs` as defined
+    def define(self, vs):
+        uses = [self.equUses[self.useStarts[v]:self.useStarts[v+1]] for v in vs]
+        for v in vs: self.readyRelu.update(self.reluUses.get(v, ()))
+        if len(uses) == 0: return
+
+        uses = np.concatenate(uses)
+        np.subtract.at(self.unknown, uses, 1)
+        touched = np.unique(uses)
+        self.touched.append(touched)
+        self.readyEqu.update(touched[self.unknown[touched] == 1].tolist())
+
+    # Equations with a single unknown variable (in file order), as (equation, new variable, coefficient)
+    def nextEquations(self, var):
+        # Every equation has no unknown variables, a single one, or only unknown ones
+        if self.strict and len(self.touched) > 0:
+            touched = np.concatenate(self.touched)
+            assert (self.unknown[touched] <= 1).all(), "Equations have several unknown variables"
+        self.touched = []
+
+        result = []
+        for i in sorted(self.readyEqu):
+            if self.unknown[i] != 1: continue
+            start, end = self.q.equStarts[i], self.q.equStarts[i+1]
+            for v, c in zip(self.q.termVars[start:end].tolist(), self.q.termCoeffs[start:end].tolist()):
+                if v not in var: result.append((i, v, c))
+        self.readyEqu.clear()
+        return result
+
+    # ReLUs whose input is defined and output is not (in file order), as constraint numbers
+    def nextRelus(self, var):
+        result = [i for i in sorted(self.readyRelu) if self.q.constraints[i][2] not in var]
+        self.readyRelu.clear()
+        return result
+
+def build_weighted_sum(q, var, l, netPrefix, worklist):
     layer = []
     dvar = {}
     ni = 0
-    for equType, scalar, adds in q.equList:
-        if strict:
-            assert equType == 0
-        else:
-            if equType != 0: continue
-        newVars = [(v, c) for v, c in adds if v not in var]
-        if strict: assert len(newVars) in [0, 1, len(adds)]
-        if len(newVars) != 1: continue
-        nv,nc = newVars[0]
-
-        if strict:
+    for i, nv, nc in worklist.nextEquations(var):
+        if worklist.strict:
             assert nc == -1.0
         else:
             assert nc in [-1.0, 1.0] 
 
+        start, end = q.equStarts[i], q.equStarts[i+1]
+        vs, cs = q.termVars[start:end].tolist(), q.termCoeffs[start:end].tolist()
         n = nodes.NodeSum()
         n.name = "{}{:02}_w{:02}".format(netPrefix, l, ni)
-        n.scalar = -scalar # TODO: i think so
-        n.inputs = [(c, var[v]) for v,c in adds if v != nv]
+        n.scalar = -float(q.equScalars[i]) # TODO: i think so
+        n.coeffs = array("d", [c for v, c in zip(vs, cs) if v != nv])
+        n.sources = tuple(var[v] for v in vs if v != nv)
         layer.append(n)
         assert nv not in dvar
         dvar[nv] = n
@@ -39,17 +101,17 @@ def build_weighted_sum(q, var, l, netPrefix, strict):
         ni += 1
 
     var.update(dvar)
+    worklist.define(dvar)
 
     return layer
 
-def build_relu(q, var, l, netPrefix, strict):
+def build_relu(q, var, l, netPrefix, worklist):
     layer = []
     dvar = {}
     ni = 0
 
-    for tt, vb, vf in q.constraints:
-        assert tt == "relu"
-        if vb not in var or vf in var: continue
+    for i in worklist.nextRelus(var):
+        tt, vb, vf = q.constraints[i]
 
         n = nodes.NodeReLU()
         n.name = "{}{:02}_r{:02}".format(netPrefix, l, ni)
@@ -61,22 +123,24 @@ def build_relu(q, var, l, netPrefix, strict):
         ni += 1
 
     var.update(dvar)
+    worklist.define(dvar)
 
     return layer
 
-# Converts an ipq file (contents) into a ViewNetwork.
+# Converts an ipq file into a ViewNetwork.
+# `ipq` - the contents of the file (or a file object), or `path` - the path of the file
 # Note: For now, assumes a strict network structure
-def import_ipq(ipq, strict=True):
+def import_ipq(ipq=None, strict=True, path=None):
     global NNET_COUNTER
 
     netPrefix = "ipq{}_".format(NNET_COUNTER)
     NNET_COUNTER += 1
 
-    q = Query(ipq)
+    q = Query(ipq, path)
 
     # Mitigate Marabou bug. See `mitigate_marabou_constant_nodes_bug` in `export_marabou.py` for more information
     original_inputs = list(q.inputVars)
-    fixed_vars = [v for v in range(q.numVars) if v in q.lowerBounds and v in q.upperBounds and q.lowerBounds[v] == q.upperBounds[v]]
+    fixed_vars = np.flatnonzero(np.isfinite(q.lower) & (q.lower == q.upper)).tolist()
     q.inputVars += fixed_vars
 
     # Create all input Nodes
@@ -87,14 +151,17 @@ def import_ipq(ipq, strict=True):
         n.name = "{}{:02}_{:02}".format(netPrefix, 0, i)
         layers[-1].append(n)
         var[v] = n
+
+    worklist = _Worklist(q, strict)
+    worklist.define(var)
     
     # Iteratively build WS and ReLU layers
     while True:
-        layer = build_weighted_sum(q, var, len(layers), netPrefix, strict)
+        layer = build_weighted_sum(q, var, len(layers), netPrefix, worklist)
         assert layer != []
         layers += [layer]
         
-        layer = build_relu(q, var, len(layers), netPrefix, strict)
+        layer = build_relu(q, var, len(layers), netPrefix, worklist)
         if layer == []: break
         layers += [layer]
 
@@ -105,26 +172,28 @@ def import_ipq(ipq, strict=True):
 
     # Make sure all ReLUs are in the new representation
     assert all([(c[0] != "relu" or (c[1] in var and c[2] in var)) for c in q.constraints])
-    for equType, scalar, adds in q.equList:
-        assert all((v[0] in var) for v in adds), (equType, scalar, adds)
+    defined = np.zeros(q.numVars, dtype=bool)
+    defined[list(var)] = True
+    missing = q.termVars[~defined[q.termVars]]
+    assert len(missing) == 0, "Equations refer to unknown variables %r" % (missing[:10].tolist(), )
 
     # Copy neurons bounds
+    fin = lambda x: float(x) if np.isfinite(x) else None
     for v in var:
-        l = q.lowerBounds.get(v, None)
-        u = q.upperBounds.get(v, None)
-        var[v].updateLimit(l, u)
+        var[v].updateLimit(fin(q.lower[v]), fin(q.upper[v]))
 
     # Convert to layers with neurons, where each neuron is (WS, ReLU)
     combined = []
     combined.append([[x] for x in layers[0]])
     for i in range(1, len(layers)-1, 2):
         pairs = []
-        used = []
+        used = set()
+        ws = set(layers[i])
         for v in layers[i+1]:
-            assert v.input in layers[i]
+            assert v.input in ws
             pairs.append([v.input, v])
-            used.append(v)
-            used.append(v.input)
+            used.add(v)
+            used.add(v.input)
 
         for v in layers[i] + layers[i+1]:
             if v not in used: pairs.append([v])
@@ -137,65 +206,76 @@ def import_ipq(ipq, strict=True):
     vn.originalInputs = original_inputs
     return vn
 
+# Parses the next `count` lines of `read` (LineReader) as comma-separated numbers
+# Returns (values, starts) - all values, and the offset of every line in `values`
+# (with the total as the last offset)
+def _numbers(read, count):
+    block = [read().rstrip(",") for _ in range(count)]
+    starts = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum([line.count(",") + 1 for line in block], out=starts[1:])
+    values = np.array(",".join(block).split(","), dtype=float) if count > 0 else np.zeros(0)
+    assert len(values) == starts[-1], "Unexpected values"
+    return values, starts
+
+# Parses `count` lines of "index,var" into a list of variables
+def _variables(read, count, numVars):
+    values, starts = _numbers(read, count)
+    assert (np.diff(starts) == 2).all()
+    values = values.reshape(count, 2).astype(np.int64)
+    assert (values[:, 0] == np.arange(count)).all() and (values[:, 1] < numVars).all()
+    return values[:, 1].tolist()
+
+# Parses `count` lines of "var,bound" into an array of bounds (`missing` for variables without a bound)
+def _bounds(read, count, numVars, missing):
+    values, starts = _numbers(read, count)
+    assert (np.diff(starts) == 2).all()
+    values = values.reshape(count, 2)
+    vs = values[:, 0].astype(np.int64)
+    assert len(np.unique(vs)) == count
+    bounds = np.full(numVars, missing)
+    bounds[vs] = values[:, 1]
+    return bounds
+
+# A Marabou InputQuery file (.ipq), read in a single pass
+# `s` - the contents of the file (or a file object), or `path` - the path of the file
+# Bounds and equations are stored in arrays -
+#   `lower`/`upper` - bounds of every variable (-inf/inf if missing)
+#   equation i is sum(termCoeffs[k] * termVars[k]) (equTypes[i]) equScalars[i]
+#   for k in equStarts[i]:equStarts[i+1]. equType = enum(equ, ge, le)
+# `constraints` - list of ("relu"/"absoluteValue", b, f) or ("max", [b...], f)
 class Query(object):
-    def __init__(self, s):
-        s = s.splitlines()
-
-        read = lambda ll, f: (ll[1:], f(ll[0]))
-        s, self.numVars = read(s, int)
-        s, lowerBoundsCount = read(s, int)
-        s, upperBoundsCount = read(s, int)
-        s, equationsCount = read(s, int)
-        s, plConstraintsCount = read(s, int)
-
-        s, inputVarsCount = read(s, int)
-        self.inputVars = []
-        for i in range(inputVarsCount):
-            s, cur = read(s, str)
-            cur = cur.split(",")
-            assert len(cur) == 2 and int(cur[0]) == i
-            var = int(cur[1])
-            assert var < self.numVars
-            self.inputVars.append(var)
-
-        s, outputVarsCount = read(s, int)
-        self.outputVars = []
-        for i in range(outputVarsCount):
-            s, cur = read(s, str)
-            cur = cur.split(",")
-            assert len(cur) == 2 and int(cur[0]) == i
-            var = int(cur[1])
-            assert var < self.numVars
-            assert var not in self.inputVars
-            self.outputVars.append(var)
-
-        self.lowerBounds = {}
-        self.upperBounds = {}
-        for i, d in chain(enumerate([self.lowerBounds]*lowerBoundsCount),
-                          enumerate([self.upperBounds]*upperBoundsCount)):
-            s, cur = read(s, str)
-            cur = cur.split(",")
-            assert len(cur) == 2
-            v, c = int(cur[0]), float(cur[1])
-            assert v not in d
-            d[v] = c
-
-        self.equList = []
-        for i in range(equationsCount):
-            s, cur = read(s, str)
-            cur = cur.split(",")
-            assert int(cur[0]) == i
-            equType = int(cur[1])
-            scalar = float(cur[2])
-            adds = []
-            for v, c in zip(cur[3::2], cur[4::2]):
-                adds.append((int(v), float(c)))
-            self.equList.append((equType, scalar, adds))
+    def __init__(self, s=None, path=None):
+        read = LineReader(s, path)
+        self.numVars = int(read())
+        lowerBoundsCount = int(read())
+        upperBoundsCount = int(read())
+        equationsCount = int(read())
+        plConstraintsCount = int(read())
+
+        self.inputVars = _variables(read, int(read()), self.numVars)
+        self.outputVars = _variables(read, int(read()), self.numVars)
+        assert len(set(self.inputVars).intersection(self.outputVars)) == 0
+
+        self.lower = _bounds(read, lowerBoundsCount, self.numVars, -np.inf)
+        self.upper = _bounds(read, upperBoundsCount, self.numVars, np.inf)
+
+        # Equations - "index,type,scalar,var,coeff,var,coeff,..."
+        values, starts = _numbers(read, equationsCount)
+        lengths = np.diff(starts)
+        assert ((lengths >= 3) & (lengths % 2 == 1)).all()
+        assert (values[starts[:-1]] == np.arange(equationsCount)).all()
+        self.equTypes = values[starts[:-1] + 1].astype(np.int8)
+        self.equScalars = values[starts[:-1] + 2]
+        line = np.repeat(np.arange(equationsCount), lengths)
+        offset = np.arange(len(values)) - starts[:-1][line]
+        self.termVars = values[(offset >= 3) & (offset % 2 == 1)].astype(np.int64)
+        self.termCoeffs = values[(offset >= 3) & (offset % 2 == 0)]
+        self.equStarts = np.zeros(equationsCount + 1, dtype=np.int64)
+        np.cumsum((lengths - 3) // 2, out=self.equStarts[1:])
 
         self.constraints = []
         for i in range(plConstraintsCount):
-            s, cur = read(s, str)
-            cur = cur.split(",")
+            cur = read().split(",")
             assert int(cur[0]) == i
             assert cur[1] in ["relu", "absoluteValue", "max"]
 
@@ -208,3 +288,35 @@ class Query(object):
                 vf = int(cur[2])
                 vb = [int(x) for x in cur[3:]]
                 self.constraints.append((cur[1], vb, vf))
+
+        self.invalidate()
+
+    # Drops the cached compatibility views (call after changing the arrays)
+    def invalidate(self):
+        self._lowerBounds = None
+        self._upperBounds = None
+        self._equList = None
+
+    # Compatibility views of the arrays above, built on first access and cached
+    # (see `invalidate`). They are read-only - change the arrays instead
+    # {var: bound}
+    @property
+    def lowerBounds(self):
+        if self._lowerBounds is None:
+            self._lowerBounds = MappingProxyType({v: float(self.lower[v]) for v in np.flatnonzero(np.isfinite(self.lower)).tolist()})
+        return self._lowerBounds
+
+    @property
+    def upperBounds(self):
+        if self._upperBounds is None:
+            self._upperBounds = MappingProxyType({v: float(self.upper[v]) for v in np.flatnonzero(np.isfinite(self.upper)).tolist()})
+        return self._upperBounds
+
+    # Tuple of (equType, scalar, adds), where adds is a tuple of (var, coeff)
+    @property
+    def equList(self):
+        if self._equList is None:
+            vs, cs = self.termVars.tolist(), self.termCoeffs.tolist()
+            self._equList = tuple((int(t), float(scalar), tuple(zip(vs[start:end], cs[start:end])))
+                for t, scalar, start, end in zip(self.equTypes, self.equScalars, self.equStarts[:-1], self.equStarts[1:]))
+        return self._equList
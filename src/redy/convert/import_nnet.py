@@ -3,97 +3,67 @@
 # See `import_nnet`
 #
 
-from redy.framework import nodes, views
+import numpy as np
 
-NNET_COUNTER = 0
+from redy.framework import views, packed
+from redy.convert.reader import LineReader
 
-class LineReader(object):
-    def __init__(self, data):
-        self.data = data.splitlines()
+NNET_COUNTER = 0
 
-    def __call__(self):
-        while True:
-            assert len(self.data) > 0
-            line, self.data = self.data[0], self.data[1:]
-            line = line.strip()
-            if not line.startswith("//"): break
-        return line.split(",")[:-1]
+def _fields(line):
+    return line.split(",")[:-1]
 
 # Based on Marabou's MarabouNetworkNNet loader
-# Converts an NNET file (contents) into a ViewNetwork
-def import_nnet(data):
+# Converts an NNET file into a ViewNetwork
+# `data` - the contents of the file (or a file object), or `path` - the path of the file
+# `lazy` - return an ArrayNetwork (see `packed.ArrayNetwork`), nodes are created only when needed
+# The file is read in a single pass, and every layer's weights are parsed at once
+def import_nnet(data=None, lazy=False, path=None):
     global NNET_COUNTER
 
     netPrefix = "nnet{}_".format(NNET_COUNTER)
     NNET_COUNTER += 1
 
-    read = LineReader(data)
+    read = LineReader(data, path, comment="//")
 
     # numLayers does not include input layer
-    numLayers, inputSize, _, _ = [int(x) for x in read()]
+    numLayers, inputSize, _, _ = [int(x) for x in _fields(read())]
 
-    layerSizes = [int(x) for x in read()]
+    layerSizes = [int(x) for x in _fields(read())]
     assert len(layerSizes) == numLayers+1
 
     read() # Symmetric? Unused
 
-    inputMinimums = [float(x) for x in read()]
-    inputMaximums = [float(x) for x in read()]
-    means = [float(x) for x in read()]
-    ranges = [float(x) for x in read()]
-
-    weights = []
-    biases = []
-    for layernum in range(numLayers):
-        previousLayerSize = layerSizes[layernum]
-        currentLayerSize = layerSizes[layernum + 1]
-        # weights
-        weights.append([])
-        biases.append([])
-        # weights
-        for i in range(currentLayerSize):
-            aux = [float(x) for x in read()]
-            weights[layernum].append([])
-            for j in range(previousLayerSize):
-                weights[layernum][i].append(aux[j])
-        # biases
-        for i in range(currentLayerSize):
-            x = float(read()[0])
-            biases[layernum].append(x)
-
-    for i in range(inputSize):
-        inputMinimums[i] = (inputMinimums[i] - means[:-1][i]) / ranges[:-1][i]
-        inputMaximums[i] = (inputMaximums[i] - means[:-1][i]) / ranges[:-1][i]
-    
-    layers = [[] for _ in range(len(layerSizes))]
-    for i, (imin, imax) in enumerate(zip(inputMinimums, inputMaximums)):
-        n = nodes.Node()
-        n.name = "{}{:02}_{:02}".format(netPrefix, 0, i)
-        n.updateLimit(imin, imax)
-        layers[0].append([n])
-
-    for l, (ws, bs) in enumerate(zip(weights, biases), 1):
-        lastLayerOutputs = [ns[-1] for ns in layers[l-1]]
-        lastLayer = ( l == (len(layers)-1) )
-
-        for n, (wsn, b) in enumerate(zip(ws, bs)):
-            name = netPrefix + "{:02}_{:02}".format(l, n)
-
-            n = nodes.NodeSum()
-            n.inputs = list(zip(wsn, lastLayerOutputs))
-            n.scalar = b
-
-            if not lastLayer:
-                n.name = name + "_b"
-
-                nr = nodes.NodeReLU()
-                nr.name = name + "_f"
-                nr.input = n
-                nr.updateLimit(lower=0)
-
-                layers[l].append([n, nr])
-            else:
-                n.name = name
-                layers[l].append([n])
-
-    return views.ViewNetwork(layers)
+    inputMinimums = np.array([float(x) for x in _fields(read())])
+    inputMaximums = np.array([float(x) for x in _fields(read())])
+    means = np.array([float(x) for x in _fields(read())])
+    ranges = np.array([float(x) for x in _fields(read())])
+
+    layer = packed.PackedLayer(inputSize)
+    layer.lower = (inputMinimums - means[:inputSize]) / ranges[:inputSize]
+    layer.upper = (inputMaximums - means[:inputSize]) / ranges[:inputSize]
+    layer.actLower, layer.actUpper = layer.lower, layer.upper
+    layer.names = layer.actNames = ["{}{:02}_{:02}".format(netPrefix, 0, i) for i in range(inputSize)]
+    layers = [layer]
+
+    for l in range(1, numLayers+1):
+        previousLayerSize, currentLayerSize = layerSizes[l-1], layerSizes[l]
+        lastLayer = ( l == numLayers )
+
+        layer = packed.PackedLayer(currentLayerSize, previousLayerSize)
+        layer.weights = read.rows(currentLayerSize, previousLayerSize)
+        layer.bias = read.rows(currentLayerSize, 1)[:, 0]
+
+        names = [netPrefix + "{:02}_{:02}".format(l, n) for n in range(currentLayerSize)]
+        if not lastLayer:
+            layer.modes[:] = packed.RELU
+            layer.actLower = np.zeros(currentLayerSize)
+            layer.names = [name + "_b" for name in names]
+            layer.actNames = [name + "_f" for name in names]
+        else:
+            layer.names = layer.actNames = names
+        layers.append(layer)
+
+    net = packed.ArrayNetwork(layers)
+    if lazy: return net
+    return views.ViewNetwork(net.layers)
@@ -0,0 +1,56 @@
+#
+# Workarounds for bugs of the Marabou version we used, shared by the exporters
+# (without depending on maraboupy). See `constant_nodes`
+#
+
+from redy.framework import equations
+from redy.framework import instrument
+
+# Returns the nodes which are determined by the input (in the order they are reached) -
+# nodes connected to the input, and nodes determined by EQ equations of the view
+# in which every other node is reachable. Linear in the size of the view.
+def reachable_from_input(view):
+    reachable = set()
+    order = []
+
+    # Number of unreached nodes of every EQ equation, and the equations of every node
+    eqs = [set(n for _, n in eq.terms) for eq in view.equations if eq.comparator == equations.Equation.Comparator.EQ]
+    unreached = [len(terms) for terms in eqs]
+    uses = {}
+    for i, terms in enumerate(eqs):
+        for n in terms: uses.setdefault(n, []).append(i)
+
+    def reach(node):
+        if node in reachable: return
+        reachable.add(node)
+        order.append(node)
+        stack.append(node)
+
+    stack = []
+    for n in view.inputs: reach(n)
+    for i, terms in enumerate(eqs):
+        if unreached[i] == 1: [reach(n) for n in terms]
+
+    while len(stack) > 0:
+        node = stack.pop()
+        for n in view.successors(node): reach(n)
+        for i in uses.get(node, []):
+            unreached[i] -= 1
+            if unreached[i] == 1: [reach(n) for n in eqs[i] if n not in reachable]
+
+    return order
+
+def get_node_next(view, node):
+    return list(view.successors(node))
+
+# The Marabou version we used had a bug where variables unreachable from the
+# input would get discarded (even if they may affect other neurons).
+# Returns these nodes (which must be fixed by their limits), to be added to the input.
+@instrument.timed("constant_nodes", lambda args, result: args[0])
+def constant_nodes(view):
+    #suspected = [node for node in view.nodes if type(node) == nodes.Node and node not in view.inputs]
+    reachable = set(reachable_from_input(view))
+
+    suspected = [node for node in view.nodes if node not in reachable]
+    assert all(node.limit[0] == node.limit[1] for node in suspected)
+    return suspected
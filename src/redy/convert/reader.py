@@ -0,0 +1,59 @@
+#
+# Helpers for reading text formats (NNET, IPQ) in a single streaming pass
+# See `LineReader`
+#
+
+import io
+
+import numpy as np
+
+# Returns an iterator over the lines of a file - given exactly one of
+# `data` - the contents (string) or a file object
+# `path` - the path of the file
+def lines(data=None, path=None):
+    assert (data is None) != (path is None), "Expected either data or a path"
+    if path is not None:
+        with open(path, "r") as fp:
+            yield from fp
+    elif hasattr(data, "read"):
+        yield from data
+    else:
+        yield from io.StringIO(data)
+
+# Reads lines (stripped) one by one from the contents, a file object or a path (see `lines`)
+# `comment` - prefix of lines to skip (or None)
+class LineReader(object):
+    def __init__(self, data=None, path=None, comment=None):
+        self.it = lines(data, path)
+        self.comment = comment
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            line = next(self.it).strip()
+            if self.comment is None or not line.startswith(self.comment): return line
+
+    # Returns the next line, asserts there is one
+    def __call__(self):
+        line = next(self, None)
+        assert line is not None, "Unexpected end of file"
+        return line
+
+    # Returns the next `count` lines parsed as comma-separated numbers (array of shape (count, width))
+    # Every line must have at least `width` values, only the first `width` are used
+    def rows(self, count, width):
+        block = [self().rstrip(",") for _ in range(count)]
+        if all(line.count(",") == width - 1 for line in block):
+            values = np.array(",".join(block).split(","), dtype=float) if count > 0 else np.zeros(0)
+            assert values.size == count * width, "Expected %d values per line" % (width, )
+            return values.reshape(count, width)
+
+        # Some lines have extra values (or missing ones)
+        result = np.empty((count, width))
+        for i, line in enumerate(block):
+            row = np.array(line.split(","), dtype=float) if line != "" else np.zeros(0)
+            assert row.size >= width, "Expected %d values, got %d" % (width, row.size)
+            result[i] = row[:width]
+        return result
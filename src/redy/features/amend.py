@@ -4,12 +4,16 @@
 
 from redy.framework.nodes import Node
 from redy.framework.equations import Equation
-from redy.framework.views import ViewIO
+from redy.framework.views import ViewIO, assertClosed, translateNodes
+from redy.framework import packed, instrument
 
 # Given network `net` and a list of neurons `neurons` = {(layer, neuron): f, ...}
 # where f \in {active, inactive, nofunc}
 # replaces the given neurons' activation function to the function given
 def modify(net, neurons):
+    if isinstance(net, packed.ArrayNetwork) and not net.materialized():
+        return _modifyPacked(net, neurons)
+
     for (li, ni), f in neurons.items():
         neuron = net.layers[li][ni]
         if f == "active":
@@ -31,14 +35,48 @@ def modify(net, neurons):
             if n == neuron[-1]: return neuront[-1]
             else: return n
         if li < net.layerCount()-1:
-            for n in net.layers[li+1]:
-                n[0].translate(translate)
+            translateNodes([n[0] for n in net.layers[li+1]], translate)
+
+    # Make sure nothing wrong was done
+    net.sanity()
+
+    return net
+
+# modify for an ArrayNetwork, without creating nodes
+def _modifyPacked(net, neurons):
+    copied = set()
+    for (li, ni), f in neurons.items():
+        layer = net.packed[li]
+        if li not in copied:
+            # Arrays may be shared with duplicates of the network
+            layer.modes, layer.relaxed = layer.modes.copy(), layer.relaxed.copy()
+            layer.lower, layer.upper = layer.lower.copy(), layer.upper.copy()
+            layer.actLower, layer.actUpper = layer.actLower.copy(), layer.actUpper.copy()
+            layer.names, layer.actNames = layer.names[:], layer.actNames[:]
+            copied.add(li)
+
+        if f == "active":
+            layer.modes[ni] = packed.IDENTITY
+            layer.actLower[ni], layer.actUpper[ni] = layer.lower[ni], layer.upper[ni]
+        elif f == "inactive":
+            layer.modes[ni] = packed.CONST
+            layer.actLower[ni], layer.actUpper[ni] = 0, 0
+        elif f == "nofunc":
+            assert layer.modes[ni] != packed.IDENTITY, "Neuron (%d, %d) has no function" % (li, ni)
+            layer.modes[ni] = packed.FREE
+        else:
+            assert False, "Unknown function %s" % (f, )
+        layer.relaxed[ni] = False
+
+        if layer.actNames[ni] is not None: layer.actNames[ni] = layer.actNames[ni] + "_" + f
+        if f == "active": layer.names[ni] = layer.actNames[ni]
 
     # Make sure nothing wrong was done
     net.sanity()
 
     return net
 
+@instrument.timed("join")
 def _join(net, mod, neurons):
     # Remove the identical neurons from the modified network and join it with the original
     firstDupLayer = min(l for l, n in neurons)
@@ -54,7 +92,8 @@ def _join(net, mod, neurons):
             table[orig[0]] = repl[0]
             orig[0] = repl[0]
     dup[0] = [ns for i, ns in enumerate(dup[0]) if (firstDupLayer, i) in neurons]
-    [node.translate(lambda x: ( table[x] if x in table else x )) for l in mod.layers for n in l for node in n]
+    # Layers before `firstDupLayer` are dropped (and may be shared with `net`, see `RedundancyTest`)
+    translateNodes([node for l in dup for n in l for node in n], lambda x: ( table[x] if x in table else x ))
 
     return dup
 
@@ -87,7 +126,7 @@ def compareExact(net, mod, neurons, comparator, output, epsilon):
     nodes = set()
     [nodes.add(node) for l in net.layers for n in l for node in n]
     [nodes.add(node) for l in dup for n in l for node in n]
-    for node in nodes: assert nodes.issuperset(node.connectedTo())
+    with instrument.stage("sanity"): assertClosed(nodes)
 
     # Return
     inputs = [ns[0] for ns in net.layers[0]]
@@ -105,7 +144,7 @@ def join(net, mod, neurons):
     nodes = set()
     [nodes.add(node) for l in net.layers for n in l for node in n]
     [nodes.add(node) for l in dup for n in l for node in n]
-    for node in nodes: assert nodes.issuperset(node.connectedTo())
+    with instrument.stage("sanity"): assertClosed(nodes)
 
     # Return
     inputs = [ns[0] for ns in net.layers[0]]
@@ -155,7 +194,7 @@ def compareMinimum(net, mod, neurons, output, counteroutput, epsilon):
     nodes = set()
     [nodes.add(node) for l in net.layers for n in l for node in n]
     [nodes.add(node) for l in dup for n in l for node in n]
-    for node in nodes: assert nodes.issuperset(node.connectedTo())
+    with instrument.stage("sanity"): assertClosed(nodes)
 
     # Return
     inputs = [ns[0] for ns in net.layers[0]]
@@ -0,0 +1,114 @@
+#
+# Bank of counterexamples (satisfying inputs) of queries, used for discharging
+# other queries on the same network without solving them
+# See `CounterexampleBank`
+#
+
+import os
+import json
+import weakref
+
+import numpy as np
+
+from redy import solvers
+from redy.framework import canonical
+from redy.convert import export_evaluate
+
+# Bump when the entries (or the key) change meaning
+BANK_VERSION = 2
+
+# Inputs which satisfied queries of a network in a subspace (see `features.subspace`).
+# A SAT input of one query (e.g. a state check of some neuron) often satisfies other
+# queries of the network (e.g. other neurons in the same phase), which are then
+# discharged as SAT by evaluation (see `discharge`, and `bank` of `features.dispatch`).
+# The bank of every (network, subspace) is stored in the file `path` (if given), which is
+# shared between the banks of all networks and subspaces (and between processes) - every
+# line is a JSON [key, input], and new inputs are only appended.
+# Inputs of other sizes (e.g. counterexamples of clipped queries) are not banked.
+class CounterexampleBank(object):
+    def __init__(self, network, subspace=None, path=None):
+        self.key = "%d_%s_%s" % (BANK_VERSION, canonical.fingerprintNetwork(network), subspace or "")
+        self.path = path
+        self.inputs = np.zeros((0, network.layerSize(0)))
+        # Compiled evaluators of the queries checked so far
+        self._evaluators = weakref.WeakKeyDictionary()
+        if path is not None and os.path.exists(path):
+            entries = self._load()
+            if len(entries) > 0: self.inputs = np.array(entries, dtype=float)
+        self._known = set(map(tuple, self.inputs))
+        self._saved = len(self.inputs)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    # Inputs of this bank in `path` (lines of other keys, and partially written lines, are skipped)
+    def _load(self):
+        entries = []
+        with open(self.path, "r") as fp:
+            for line in fp:
+                try:
+                    key, x = json.loads(line)
+                except (ValueError, TypeError):
+                    continue
+                if key == self.key and len(x) == self.inputs.shape[1]: entries.append(x)
+        return entries
+
+    # Appends the inputs which were not saved yet into `path`, in a single write
+    # (so banks of other processes sharing the file are not overwritten)
+    def save(self):
+        if self.path is None or self._saved == len(self.inputs): return
+        data = "".join(json.dumps([self.key, x]) + "\n" for x in self.inputs[self._saved:].tolist())
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data.encode())
+        finally:
+            os.close(fd)
+        self._saved = len(self.inputs)
+
+    # Adds inputs (list of inputs, or a single input) to the bank
+    # Returns the number of new inputs (inputs of another size are not added)
+    def add(self, inputs):
+        inputs = np.atleast_2d(np.asarray(inputs, dtype=float))
+        if inputs.shape[1] != self.inputs.shape[1]: return 0
+        new = []
+        for x in inputs:
+            if tuple(x) in self._known: continue
+            self._known.add(tuple(x))
+            new.append(x)
+        if len(new) == 0: return 0
+        self.inputs = np.concatenate([self.inputs, new])
+        self.save()
+        return len(new)
+
+    def _evaluator(self, view):
+        if view not in self._evaluators:
+            self._evaluators[view] = export_evaluate.export_evaluate(view)
+        return self._evaluators[view]
+
+    # Returns an input (out of `inputs`, by default the whole bank) which satisfies
+    # `view` (ViewIO), or None. None is returned for queries with another number of inputs
+    # (e.g. clipped queries, whose inputs are not the network inputs).
+    def witness(self, view, inputs=None):
+        inputs = self.inputs if inputs is None else np.atleast_2d(np.asarray(inputs, dtype=float))
+        if len(inputs) == 0 or len(view.inputs) != inputs.shape[1]: return None
+        ev = self._evaluator(view)
+        valid = ev.batchValidate(ev.batchEvaluate(inputs)).valid
+        if not valid.any(): return None
+        return inputs[valid.argmax()].tolist()
+
+    # Given queries {key: view}, returns (views, witnesses) - the queries which no input
+    # of the bank satisfies, and for every discharged query a satisfying input
+    # (see `RedundancyTest.getScreenedStateChecks`)
+    def discharge(self, views, inputs=None):
+        remaining, witnesses = {}, {}
+        for key, view in views.items():
+            witness = self.witness(view, inputs)
+            if witness is None: remaining[key] = view
+            else: witnesses[key] = witness
+        return remaining, witnesses
+
+    # Adds the counterexample of a solved query (see `redy.solvers`)
+    # Returns whether a new input was added
+    def record(self, verdict, counterexample):
+        if verdict != solvers.SAT or counterexample is None: return False
+        return self.add(counterexample) > 0
@@ -0,0 +1,291 @@
+#
+# Functions for computing sound bounds of the neurons of a network
+#
+
+from collections import namedtuple
+
+import numpy as np
+
+from redy.framework import packed, nodes
+
+# Neurons (layer, neuron) whose ReLU is stable over the whole input domain
+Stability = namedtuple("Stability", ("active", "inactive"))
+
+# Result of `linearBounds`:
+# `exprs` - {node: (LL, cL, LU, cU)} such that LL @ x + cL <= node <= LU @ x + cU
+#           where x are the inputs of the view
+# `bounds` - {node: (lower, upper)}
+# `feasible` - False if some node can not be within its limits (the view has no solution)
+LinearBounds = namedtuple("LinearBounds", ("exprs", "bounds", "feasible"))
+
+# M @ v, where v may contain infinite values (0 * inf is taken as 0)
+def _dot(M, v):
+    finite = np.isfinite(v)
+    r = M @ np.where(finite, v, 0.)
+    if finite.all(): return r
+
+    signs = M * np.where(finite, 0., np.sign(v))
+    r[(signs > 0).any(axis=-1)] = np.inf
+    r[(signs < 0).any(axis=-1)] = -np.inf
+    return r
+
+# Bounds of W x + b given lower <= x <= upper
+def _affine(W, b, lower, upper):
+    Wp, Wn = np.maximum(W, 0), np.minimum(W, 0)
+    return _dot(Wp, lower) + _dot(Wn, upper) + b, _dot(Wp, upper) + _dot(Wn, lower) + b
+
+# Bounds of the activation nodes of `layer` given bounds of its input/WS nodes
+def _activate(layer, lower, upper):
+    actLower, actUpper = lower.copy(), upper.copy()
+
+    relu = layer.modes == packed.RELU
+    actLower[relu] = np.maximum(lower[relu], 0)
+    actUpper[relu] = np.maximum(upper[relu], 0)
+
+    const = layer.modes == packed.CONST
+    actLower[const] = actUpper[const] = layer.actLower[const]
+
+    free = layer.modes == packed.FREE
+    actLower[free], actUpper[free] = -np.inf, np.inf
+
+    return np.maximum(actLower, layer.actLower), np.minimum(actUpper, layer.actUpper)
+
+# Interval bounds of a list of PackedLayer (see `packed.pack`)
+# `box` - optional input box (list of (lower, upper)), instead of the input limits
+# Returns a list of (lower, upper, actLower, actUpper) arrays, one per layer
+def intervals(layers, box=None):
+    result = []
+    for layer in layers:
+        if layer.isInput():
+            lower, upper = layer.lower, layer.upper
+            if box is not None:
+                boxLower, boxUpper = np.array(box, dtype=float).T
+                lower, upper = np.maximum(lower, boxLower), np.minimum(upper, boxUpper)
+        else:
+            lower, upper = _affine(layer.weights, layer.bias, actLower, actUpper)
+            lower, upper = np.maximum(lower, layer.lower), np.minimum(upper, layer.upper)
+
+        actLower, actUpper = _activate(layer, lower, upper)
+        result.append((lower, upper, actLower, actUpper))
+
+    return result
+
+# Linear relaxation of the activations of `layer` given bounds of its input/WS nodes
+# Returns (lowerSlope, lowerOffset, upperSlope, upperOffset) such that
+#   lowerSlope * x + lowerOffset <= act(x) <= upperSlope * x + upperOffset
+# Relaxed ReLUs get the same (triangle) relaxation as regular ReLUs.
+def _relax(layer, lower, upper):
+    n = layer.size()
+    ls, lo, us, uo = np.ones(n), np.zeros(n), np.ones(n), np.zeros(n)
+
+    relu = layer.modes == packed.RELU
+    inactive = relu & (upper <= 0)
+    ls[inactive] = us[inactive] = 0
+
+    unstable = relu & (lower < 0) & (upper > 0)
+    bounded = unstable & np.isfinite(lower) & np.isfinite(upper)
+    l, u = lower[bounded], upper[bounded]
+    us[bounded] = u / (u - l)
+    uo[bounded] = -l * u / (u - l)
+    ls[bounded] = (u > -l).astype(float) # DeepPoly heuristic, both slopes are sound
+
+    # Unbounded ReLUs: relu(x) <= u, relu(x) <= x - l or nothing
+    unbounded = unstable & ~bounded
+    ls[unbounded] = 0
+    us[unbounded] = np.where(np.isfinite(upper[unbounded]), 0., np.where(np.isfinite(lower[unbounded]), 1., 0.))
+    uo[unbounded] = np.where(np.isfinite(upper[unbounded]), upper[unbounded], np.where(np.isfinite(lower[unbounded]), -lower[unbounded], np.inf))
+
+    const = layer.modes == packed.CONST
+    ls[const] = us[const] = 0
+    lo[const] = uo[const] = layer.actLower[const]
+
+    free = layer.modes == packed.FREE
+    ls[free] = us[free] = 0
+    lo[free], uo[free] = layer.actLower[free], layer.actUpper[free]
+
+    return ls, lo, us, uo
+
+# Back-substitutes the WS nodes of layer `k` down to the input of the network
+# `relaxations` - relaxations (see `_relax`) of every layer before `k`
+# Returns (LL, cL, LU, cU) such that LL @ x + cL <= WS <= LU @ x + cU
+def _backsubstitute(layers, relaxations, k):
+    LL, cL = layers[k].weights, layers[k].bias
+    LU, cU = LL, cL
+    for j in range(k-1, -1, -1):
+        ls, lo, us, uo = relaxations[j]
+
+        # Substitute the activations of layer j by their relaxation
+        LLp, LLn = np.maximum(LL, 0), np.minimum(LL, 0)
+        LUp, LUn = np.maximum(LU, 0), np.minimum(LU, 0)
+        cL = cL + _dot(LLp, lo) + _dot(LLn, uo)
+        cU = cU + _dot(LUp, uo) + _dot(LUn, lo)
+        LL = LLp * ls + LLn * us
+        LU = LUp * us + LUn * ls
+
+        if layers[j].isInput(): break
+
+        # Substitute the WS nodes of layer j
+        cL = cL + LL @ layers[j].bias
+        cU = cU + LU @ layers[j].bias
+        LL = LL @ layers[j].weights
+        LU = LU @ layers[j].weights
+
+    return LL, cL, LU, cU
+
+# Symbolic (DeepPoly/CROWN-style) bounds of a list of PackedLayer (see `packed.pack`)
+# Every WS node is bounded by back-substituting linear relaxations of the
+# previous layers down to the input. Bounds are never looser than `intervals`.
+# `box` - optional input box (list of (lower, upper)), instead of the input limits
+# Returns a list of (lower, upper, actLower, actUpper) arrays, one per layer
+def symbolic(layers, box=None):
+    result = intervals(layers[:1], box)
+    inLower, inUpper = result[0][:2]
+    relaxations = [_relax(layers[0], inLower, inUpper)]
+
+    for k in range(1, len(layers)):
+        layer = layers[k]
+        _, _, actLower, actUpper = result[-1]
+        lower, upper = _affine(layer.weights, layer.bias, actLower, actUpper)
+
+        LL, cL, LU, cU = _backsubstitute(layers, relaxations, k)
+        symLower, _ = _affine(LL, cL, inLower, inUpper)
+        _, symUpper = _affine(LU, cU, inLower, inUpper)
+
+        lower = np.maximum(np.maximum(lower, symLower), layer.lower)
+        upper = np.minimum(np.minimum(upper, symUpper), layer.upper)
+
+        actLower, actUpper = _activate(layer, lower, upper)
+        result.append((lower, upper, actLower, actUpper))
+        relaxations.append(_relax(layer, lower, upper))
+
+    return result
+
+# Returns the stable ReLUs given bounds of every layer (see `intervals`)
+def stability(layers, bounds):
+    active, inactive = [], []
+    for li, (layer, (lower, upper, _, _)) in enumerate(zip(layers, bounds)):
+        relu = layer.modes == packed.RELU
+        active += [(li, int(ni)) for ni in np.flatnonzero(relu & (lower >= 0))]
+        inactive += [(li, int(ni)) for ni in np.flatnonzero(relu & (upper <= 0))]
+    return Stability(active, inactive)
+
+# Writes bounds of every layer (see `intervals`) into the layers' nodes
+def _update(layers, bounds):
+    for layer, (lower, upper, actLower, actUpper) in zip(layers, bounds):
+        layer.updateLimits(lower, upper, actLower, actUpper)
+
+# Computes interval bounds for every node of `net` (ViewNetwork, possibly clipped)
+# and tightens the nodes' limits accordingly.
+# Returns the stable ReLUs (Stability)
+# `update` - should the bounds be written into the nodes' limits?
+def intervalBounds(net, update=True):
+    layers = packed.pack(net)
+    bounds = intervals(layers)
+    if update: _update(layers, bounds)
+    return stability(layers, bounds)
+
+# Computes symbolic (DeepPoly/CROWN-style) bounds for every node of `net`
+# (ViewNetwork, possibly clipped or modified) and tightens the nodes' limits accordingly.
+# Returns the stable ReLUs (Stability)
+# `update` - should the bounds be written into the nodes' limits?
+def symbolicBounds(net, update=True):
+    layers = packed.pack(net)
+    bounds = symbolic(layers)
+    if update: _update(layers, bounds)
+    return stability(layers, bounds)
+
+# Lower bound of LL @ x + cL and upper bound of LU @ x + cU given lower <= x <= upper
+def _concrete(LL, cL, LU, cU, lower, upper):
+    l, _ = _affine(LL[None, :], np.array([cL]), lower, upper)
+    _, u = _affine(LU[None, :], np.array([cU]), lower, upper)
+    return l[0], u[0]
+
+# Linear bounds of sum(c * v) + scalar given linear bounds of every v (see `LinearBounds`)
+def _combine(terms, exprs, scalar, size):
+    if len(terms) == 0: return np.zeros(size), scalar, np.zeros(size), scalar
+    cs = np.array([c for c, v in terms], dtype=float)
+    LL, cL, LU, cU = zip(*[exprs[v] for c, v in terms])
+    LL, LU, cL, cU = np.array(LL), np.array(LU), np.array(cL), np.array(cU)
+    cp, cn = np.maximum(cs, 0), np.minimum(cs, 0)
+    return (cp @ LL + cn @ LU, _dot(cp[None, :], cL)[0] + _dot(cn[None, :], cU)[0] + scalar,
+            cp @ LU + cn @ LL, _dot(cp[None, :], cU)[0] + _dot(cn[None, :], cL)[0] + scalar)
+
+# Linear relaxation of an activation node given the bounds of its input
+# (`expr` - linear bounds of the input, see `LinearBounds`)
+def _relaxNode(node, expr, lower, upper, size):
+    LL, cL, LU, cU = expr
+    zero = np.zeros(size)
+    if isinstance(node, nodes.NodeAbs):
+        if lower >= 0: return expr
+        if upper <= 0: return -LU, -cU, -LL, -cL
+        if not (np.isfinite(lower) and np.isfinite(upper)): return zero, 0., zero, np.inf
+        # Chord from (lower, -lower) to (upper, upper)
+        slope = (upper + lower) / (upper - lower)
+        UL, UC = (LU, cU) if slope >= 0 else (LL, cL)
+        return zero, 0., slope * UL, slope * UC - lower - slope * lower
+
+    if upper <= 0: return zero, 0., zero, 0.
+    if lower >= 0: return expr
+    if not np.isfinite(lower) or not np.isfinite(upper):
+        return zero, 0., zero, upper
+    slope = upper / (upper - lower)
+    alpha = 1. if upper > -lower else 0. # DeepPoly heuristic
+    return alpha * LL, alpha * cL, slope * LU, slope * (cU - lower)
+
+# Symbolic bounds of every node of a ViewIO (not necessarily layered), by forward
+# propagation of linear bounds in terms of the inputs (in topological order).
+# Suits views with few inputs, e.g. joined queries of `redundancy.RedundancyTest`,
+# where the shared parts of the networks cancel out.
+# `box` - optional input box (list of (lower, upper)), instead of the input limits
+# Returns LinearBounds
+def linearBounds(view, box=None):
+    size = len(view.inputs)
+    lim = lambda node: (-np.inf if node.limit[0] is None else node.limit[0], np.inf if node.limit[1] is None else node.limit[1])
+    inLower, inUpper = np.array([lim(n) for n in view.inputs], dtype=float).reshape(-1, 2).T
+    if box is not None:
+        boxLower, boxUpper = np.array(box, dtype=float).reshape(-1, 2).T
+        inLower, inUpper = np.maximum(inLower, boxLower), np.minimum(inUpper, boxUpper)
+
+    exprs, bounds = {}, {}
+    feasible = bool((inLower <= inUpper).all())
+    for i, n in enumerate(view.inputs):
+        unit = np.eye(size)[i]
+        exprs[n] = (unit, 0., unit, 0.)
+        bounds[n] = (inLower[i], inUpper[i])
+
+    for node in view.topologicalOrder():
+        if node in exprs: continue
+
+        if isinstance(node, nodes.NodeSum):
+            expr = _combine(node.inputs, exprs, node.scalar, size)
+        elif isinstance(node, (nodes.NodeReLU, nodes.NodeAbs)):
+            expr = _relaxNode(node, exprs[node.input], *bounds[node.input], size)
+        elif type(node) == nodes.Node:
+            l, u = lim(node)
+            expr = (np.zeros(size), l, np.zeros(size), u)
+        else:
+            assert False, "Unknown node type %r" % (node, )
+
+        lower, upper = _concrete(*expr, inLower, inUpper)
+        if isinstance(node, (nodes.NodeReLU, nodes.NodeAbs)):
+            l, u = bounds[node.input]
+            if isinstance(node, nodes.NodeReLU):
+                lower, upper = max(lower, l, 0.), min(upper, max(u, 0.))
+            else:
+                lower, upper = max(lower, l, -u, 0.), min(upper, max(-l, u))
+        l, u = lim(node)
+        lower, upper = max(lower, l), min(upper, u)
+        if lower > upper: feasible = False
+
+        exprs[node] = expr
+        bounds[node] = (lower, upper)
+
+    return LinearBounds(exprs, bounds, feasible)
+
+# Bounds of the left-hand side of every equation of `view` given its LinearBounds `lb`
+# (see `linearBounds`). Yields (equation, (LL, cL, LU, cU), (lower, upper))
+def equationBounds(view, lb):
+    box = np.array([lb.bounds[n] for n in view.inputs], dtype=float).reshape(-1, 2)
+    for e in view.equations:
+        expr = _combine(e.terms, lb.exprs, 0., len(view.inputs))
+        yield e, expr, _concrete(*expr, box[:, 0], box[:, 1])
@@ -0,0 +1,109 @@
+#
+# Persistent (on-disk) cache of query results
+#
+
+import os
+import json
+import time
+import tempfile
+
+from redy import solvers
+from redy.framework import canonical
+
+# Bump when the entries (or the fingerprint) change meaning
+CACHE_VERSION = 2
+
+# Caches solver results of queries (ViewIO) in a directory, keyed by the
+# canonical fingerprint of the query (see `canonical.fingerprint`).
+# Entries are written atomically, so a cache directory may be shared between
+# processes (e.g. parallel workers or campaigns).
+# Only definite results (SAT/UNSAT) are stored.
+# `maxBytes` - evict the oldest entries when the cache is larger
+# `maxAge` - evict entries older than `maxAge` seconds (by the modification time of their files)
+class QueryCache(object):
+    def __init__(self, path, maxBytes=None, maxAge=None, evictEvery=64):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.maxAge = maxAge
+        self.evictEvery = evictEvery
+        self.puts = 0
+        os.makedirs(path, exist_ok=True)
+        self.evict()
+
+    def key(self, view):
+        return "%d_%s" % (CACHE_VERSION, canonical.fingerprint(view))
+
+    def _file(self, key):
+        return os.path.join(self.path, key[-2:], key + ".json")
+
+    # Returns the cached (verdict, counterexample, stats) of `view`, or None
+    # `key` - optional precomputed key (see `key`)
+    def get(self, view, key=None):
+        f = self._file(self.key(view) if key is None else key)
+        try:
+            with open(f, "r") as fp:
+                if self.maxAge is not None and time.time() - os.fstat(fp.fileno()).st_mtime > self.maxAge:
+                    return None
+                entry = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        return entry["verdict"], entry["counterexample"], entry["stats"]
+
+    # Stores the result of `view`. Returns whether it was stored
+    # `key` - optional precomputed key (see `key`)
+    def put(self, view, verdict, counterexample, stats, key=None):
+        if verdict not in [solvers.SAT, solvers.UNSAT]: return False
+
+        f = self._file(self.key(view) if key is None else key)
+        os.makedirs(os.path.dirname(f), exist_ok=True)
+        entry = {
+            "verdict": verdict,
+            "counterexample": None if counterexample is None else [float(x) for x in counterexample],
+            "stats": stats,
+        }
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(f), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(entry, fp, default=repr)
+            os.replace(tmp, f)
+        except:
+            os.unlink(tmp)
+            raise
+
+        self.puts += 1
+        if self.puts % self.evictEvery == 0: self.evict()
+        return True
+
+    def _entries(self):
+        for root, dirs, files in os.walk(self.path):
+            for name in files:
+                if not name.endswith(".json"): continue
+                f = os.path.join(root, name)
+                try:
+                    st = os.stat(f)
+                except OSError:
+                    continue
+                yield f, st.st_size, st.st_mtime
+
+    # Removes expired entries, and the oldest entries above `maxBytes`
+    def evict(self):
+        if self.maxBytes is None and self.maxAge is None: return
+
+        now = time.time()
+        entries = []
+        for f, size, mtime in self._entries():
+            if self.maxAge is not None and now - mtime > self.maxAge:
+                self._remove(f)
+            else:
+                entries.append((mtime, size, f))
+
+        if self.maxBytes is None: return
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, f in sorted(entries):
+            if total <= self.maxBytes: break
+            self._remove(f)
+            total -= size
+
+    def _remove(self, f):
+        try: os.unlink(f)
+        except OSError: pass # Removed by another process
@@ -0,0 +1,146 @@
+#
+# Resumable pruning campaigns - checking many neurons for redundancy,
+# one after the other, and removing the redundant ones as they are found
+# See `Campaign`
+#
+
+import os
+import json
+import time
+import tempfile
+
+from redy import solvers
+from redy.framework import canonical, instrument
+from redy.features import amend, redundancy
+
+# Bump when the checkpoint changes meaning
+CHECKPOINT_VERSION = 1
+
+# Check of phase-redundancy - the neuron is never in the opposite phase
+# (see `RedundancyTest.getStateCheck`)
+# A check is a function (test, neuron) -> list of queries (ViewIO), where `test` is a
+# RedundancyTest of the working network and `neuron` is (layer, neuron, function).
+# The neuron is redundant if all of the queries are UNSAT.
+def phaseCheck(test, neuron):
+    return [test.getStateCheck(neuron)]
+
+# Returns a check of forward-redundancy - modifying the neuron changes none of
+# `outputs` by more than epsilon (see `RedundancyTest.getComparedExact`)
+def exactCheck(outputs):
+    def check(test, neuron):
+        return [test.getComparedExact([neuron], comparator, output) for output in outputs for comparator in ["gt", "lt"]]
+    return check
+
+# Checks candidate neurons of `network` one by one (see `phaseCheck`, `exactCheck`),
+# and modifies the redundant ones in a working copy of the network (see `amend.modify`),
+# so later checks are made against the already-pruned network.
+# Progress is saved to the JSON file `path` after every candidate, and a campaign created
+# with an existing checkpoint resumes from it (for the same network and epsilon).
+# Usage -
+#   campaign = Campaign(net, 1e-4, "campaign.json", Dispatcher(marabou.solve, timeout=600))
+#   campaign.run()
+#   campaign.network # The pruned network
+# `dispatcher` - the queries of every candidate are solved in parallel (see `features.dispatch`),
+#                give it a QueryCache to avoid solving queries of an interrupted candidate again
+# `candidates` - list of (layer, neuron), by default all of the hidden neurons
+# `functions` - functions tried for every candidate, in order, until one is found redundant
+class Campaign(object):
+    def __init__(self, network, epsilon, path, dispatcher, check=phaseCheck, candidates=None, functions=("inactive", "active")):
+        self.original = network
+        self.epsilon = epsilon
+        self.path = path
+        self.dispatcher = dispatcher
+        self.check = check
+        self.functions = functions
+        if candidates is None:
+            candidates = [(l, n) for l in range(1, network.layerCount()-1) for n in range(network.layerSize(l))]
+        self.candidates = [tuple(c) for c in candidates]
+
+        self.fingerprint = canonical.fingerprintNetwork(network)
+        # (layer, neuron) -> function of the neurons modified so far
+        self.modified = {}
+        # Checked candidates - (layer, neuron) -> {"function", "verdicts", "time"}
+        self.results = {}
+        if os.path.exists(path): self.load()
+
+        self.network = amend.modify(network.duplicate(), dict(self.modified)) if len(self.modified) > 0 else network.duplicate()
+        self.test = redundancy.RedundancyTest(self.network, epsilon)
+
+    def load(self):
+        with open(self.path, "r") as fp:
+            state = json.load(fp)
+        assert state["version"] == CHECKPOINT_VERSION, "Checkpoint version %r" % (state["version"], )
+        assert state["network"] == self.fingerprint, "Checkpoint of another network"
+        assert state["epsilon"] == self.epsilon, "Checkpoint with epsilon %r" % (state["epsilon"], )
+        self.modified = {(l, n): f for l, n, f in state["modified"]}
+        self.results = {(r["layer"], r["neuron"]): r for r in state["results"]}
+
+    # Writes the checkpoint (atomically)
+    def save(self):
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "network": self.fingerprint,
+            "epsilon": self.epsilon,
+            "modified": [[l, n, f] for (l, n), f in self.modified.items()],
+            "results": list(self.results.values()),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(state, fp, indent=1)
+            os.replace(tmp, self.path)
+        except:
+            os.unlink(tmp)
+            raise
+
+    # Candidates which were not checked yet
+    def remaining(self):
+        return [c for c in self.candidates if c not in self.results]
+
+    # Solves the queries of `neuron`, returns the verdicts
+    # (stops at the first query which is not UNSAT)
+    # Stages of the queries are recorded for `neuron` (see `framework.instrument`)
+    def _solve(self, neuron):
+        with instrument.query(neuron):
+            queries = [((neuron, i), view) for i, view in enumerate(self.check(self.test, neuron))]
+        verdicts = []
+        results = self.dispatcher.dispatch(queries)
+        try:
+            for record in results:
+                verdicts.append(record.verdict)
+                if record.verdict != solvers.UNSAT: break
+        finally:
+            results.close()
+            # Drop the records of the cancelled queries
+            while self.dispatcher.next() is not None: pass
+        return verdicts
+
+    # Checks a single candidate, and modifies it if it is redundant
+    # Returns the function it was modified with (or None)
+    def step(self, candidate):
+        l, n = candidate
+        start = time.time()
+        result = {"layer": l, "neuron": n, "function": None, "verdicts": {}}
+        for f in self.functions:
+            verdicts = self._solve((l, n, f))
+            result["verdicts"][f] = verdicts
+            if len(verdicts) > 0 and all(v == solvers.UNSAT for v in verdicts):
+                result["function"] = f
+                self.modified[candidate] = f
+                amend.modify(self.network, {candidate: f})
+                self.test.invalidate()
+                break
+        result["time"] = time.time() - start
+
+        self.results[candidate] = result
+        self.save()
+        return result["function"]
+
+    # Checks the remaining candidates (at most `limit` of them)
+    # Returns the modified neurons ((layer, neuron) -> function)
+    def run(self, limit=None):
+        for i, candidate in enumerate(self.remaining()):
+            if limit is not None and i >= limit: break
+            self.step(candidate)
+        return self.modified
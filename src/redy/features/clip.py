@@ -4,7 +4,11 @@
 
 from collections import namedtuple
 
+import numpy as np
+
 from redy.framework.nodes import Node
+from redy.framework.views import translateNodes
+from redy.framework import packed
 
 Range = namedtuple("Range", ("firstLayer", "firstMode", "lastLayer", "lastMode"), defaults=(0, 0, None, 0))
 
@@ -13,6 +17,8 @@ Range = namedtuple("Range", ("firstLayer", "firstMode", "lastLayer", "lastMode")
 def clipNetwork(net, rng): 
     if rng.lastLayer is None:
         rng = Range(rng.firstLayer, rng.firstMode, net.layerCount()-1, rng.lastMode)
+    if isinstance(net, packed.ArrayNetwork) and not net.materialized():
+        return _clipPacked(net, rng)
 
     # Clip the network
     layers = net.layers[rng.firstLayer:rng.lastLayer+1]
@@ -32,7 +38,7 @@ def clipNetwork(net, rng):
     def translate(neuron):
         if neuron in inputs: return inputs[neuron]
         return neuron
-    [n.translate(translate) for n in net.nodes()]
+    translateNodes(net.nodes(), translate)
 
     # Finalize
     net.layers = layers
@@ -40,3 +46,32 @@ def clipNetwork(net, rng):
 
     return net
 
+
+# Turns the neurons of a PackedLayer into single (identity) nodes,
+# keeping the first node (firstMode=0) or the activation node (firstMode=1)
+def _identity(layer, mode):
+    if mode == 1:
+        layer.lower, layer.upper, layer.names = layer.actLower, layer.actUpper, layer.actNames
+    layer.actLower, layer.actUpper, layer.actNames = layer.lower, layer.upper, layer.names
+    layer.modes = np.full(layer.size(), packed.IDENTITY, dtype=np.int8)
+    layer.relaxed = np.zeros(layer.size(), dtype=bool)
+
+# clipNetwork for an ArrayNetwork, without creating nodes
+def _clipPacked(net, rng):
+    layers = [l.duplicate() for l in net.packed[rng.firstLayer:rng.lastLayer+1]]
+
+    # The first layer becomes the input layer
+    first = layers[0]
+    if rng.firstMode == 1:
+        assert (first.modes != packed.IDENTITY).all(), "Clipping a neuron without activation"
+        _identity(first, 1)
+    first.weights, first.bias = None, np.zeros(first.size())
+    first.actNames = [n if m == packed.IDENTITY else a for n, a, m in zip(first.names, first.actNames, first.modes)]
+
+    if rng.lastMode == 0: _identity(layers[-1], 0)
+
+    # Finalize
+    net.packed = layers
+    net.sanity()
+
+    return net
@@ -0,0 +1,186 @@
+#
+# Parallel dispatching of queries (ViewIO) to a solver
+#
+
+import os
+import time
+from collections import deque, namedtuple
+import multiprocessing
+from multiprocessing.connection import wait
+
+from redy import solvers
+from redy.framework import instrument
+
+# A solved (or timed-out/cancelled) query
+# `neuron` - the key the query was submitted with
+# `verdict`, `counterexample` - see `redy.solvers`
+# `stats` - solver statistics, with the wall time of the query in "time"
+Record = namedtuple("Record", ("neuron", "verdict", "counterexample", "stats"))
+
+def _work(solver, view, timeout, conn):
+    try:
+        result = solver(view, timeout)
+    except Exception as e:
+        result = (solvers.ERROR, None, {"error": repr(e)})
+    conn.send(result)
+    conn.close()
+
+# Solves queries in a bounded number of worker processes.
+# Every query runs in its own process, so it can be killed on timeout or cancellation.
+# Usage -
+#   for record in Dispatcher(solver, workers=8, timeout=600).dispatch(queries): ...
+# where `queries` is an iterable of (neuron, view) and `solver` is a solver (see `redy.solvers`)
+# `cache` - optional QueryCache (see `features.cache`), cached queries are not solved again
+# `bank` - optional CounterexampleBank (see `features.bank`), queries satisfied by an input
+#          of the bank are not solved, and every SAT counterexample discharges the queued queries
+class Dispatcher(object):
+    def __init__(self, solver, workers=None, timeout=None, grace=5, cache=None, bank=None):
+        self.solver = solver
+        self.cache = cache
+        self.bank = bank
+        self.workers = workers or os.cpu_count()
+        self.timeout = timeout
+        # Seconds after the timeout before a worker is killed
+        # (to let the solver report a timeout by itself)
+        self.grace = grace
+
+        self.queue = deque()  # (neuron, view, timeout, cache key)
+        self.running = {}     # conn -> (neuron, process, start, timeout, cache key)
+        self.done = deque()   # Records which were not returned yet
+
+    # Adds a query. `timeout` overrides the dispatcher's timeout
+    def submit(self, neuron, view, timeout=None):
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(view)
+            cached = self.cache.get(view, key)
+            if cached is not None:
+                verdict, counterexample, stats = cached
+                self.done.append(Record(neuron, verdict, counterexample, dict(stats, time=0., cached=True)))
+                if self.bank is not None: self.bank.record(verdict, counterexample)
+                return
+        if self.bank is not None:
+            witness = self.bank.witness(view)
+            if witness is not None:
+                self.done.append(Record(neuron, solvers.SAT, witness, {"time": 0., "bank": True}))
+                return
+        self.queue.append((neuron, view, self.timeout if timeout is None else timeout, key))
+
+    # Number of queries which were submitted and not returned yet
+    def pending(self):
+        return len(self.queue) + len(self.running) + len(self.done)
+
+    # Cancels a submitted query (queued or running). Returns whether it was found
+    def cancel(self, neuron):
+        for item in self.queue:
+            if item[0] == neuron:
+                self.queue.remove(item)
+                self.done.append(Record(neuron, solvers.CANCELLED, None, {"time": 0.}))
+                return True
+        for conn, (n, process, start, timeout, key) in list(self.running.items()):
+            if n == neuron:
+                self._kill(conn, solvers.CANCELLED)
+                return True
+        return False
+
+    # Cancels every submitted query
+    def cancelAll(self):
+        for neuron, view, timeout, key in self.queue:
+            self.done.append(Record(neuron, solvers.CANCELLED, None, {"time": 0.}))
+        self.queue.clear()
+        for conn in list(self.running): self._kill(conn, solvers.CANCELLED)
+
+    # Removes the queued queries which are satisfied by `counterexample`
+    def _discharge(self, counterexample):
+        for item in list(self.queue):
+            neuron, view = item[:2]
+            witness = self.bank.witness(view, [counterexample])
+            if witness is None: continue
+            self.queue.remove(item)
+            self.done.append(Record(neuron, solvers.SAT, witness, {"time": 0., "bank": True}))
+
+    def _kill(self, conn, verdict):
+        neuron, process, start, timeout, key = self.running.pop(conn)
+        process.terminate()
+        process.join()
+        conn.close()
+        self.done.append(Record(neuron, verdict, None, {"time": time.time() - start}))
+        instrument.add("solve", neuron, time.time() - start)
+
+    def _start(self):
+        while len(self.running) < self.workers and len(self.queue) > 0:
+            neuron, view, timeout, key = self.queue.popleft()
+            recv, send = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_work, args=(self.solver, view, timeout, send), daemon=True)
+            process.start()
+            send.close()
+            self.running[recv] = (neuron, process, time.time(), timeout, key)
+
+    # Waits for running queries (up to `wait` seconds) and collects finished/timed-out ones
+    def _poll(self, waitTime):
+        for conn in wait(list(self.running), waitTime):
+            neuron, process, start, timeout, key = self.running[conn]
+            try:
+                verdict, counterexample, stats = conn.recv()
+            except EOFError:
+                # Worker died without an answer (joined first, so its exit code is set)
+                process.join()
+                verdict, counterexample, stats = solvers.ERROR, None, {"exitcode": process.exitcode}
+            del self.running[conn]
+            process.join()
+            conn.close()
+            stats = dict(stats)
+            stats["time"] = time.time() - start
+            if self.cache is not None: self.cache.put(None, verdict, counterexample, stats, key)
+            self.done.append(Record(neuron, verdict, counterexample, stats))
+            instrument.add("solve", neuron, stats["time"])
+            if self.bank is not None and self.bank.record(verdict, counterexample):
+                self._discharge(counterexample)
+
+        now = time.time()
+        for conn, (neuron, process, start, timeout, key) in list(self.running.items()):
+            if timeout is not None and now - start > timeout + self.grace:
+                self._kill(conn, solvers.TIMEOUT)
+
+    # Time to wait for the closest deadline of a running query
+    def _waitTime(self):
+        deadlines = [start + timeout + self.grace for neuron, process, start, timeout, key in self.running.values() if timeout is not None]
+        if len(deadlines) == 0: return None
+        return max(0., min(deadlines) - time.time())
+
+    # Returns the next finished Record, blocking until one is available
+    # (None if nothing is pending)
+    def next(self):
+        while len(self.done) == 0:
+            self._start()
+            if len(self.running) == 0: return None
+            self._poll(self._waitTime())
+        return self.done.popleft()
+
+    # Yields Records as the submitted queries finish. Running queries are
+    # killed if the generator is closed before completion.
+    def results(self):
+        try:
+            while True:
+                record = self.next()
+                if record is None: return
+                yield record
+        finally:
+            if len(self.running) > 0 or len(self.queue) > 0: self.cancelAll()
+
+    # Solves a stream of (neuron, view) and yields Records as they finish.
+    # The stream is consumed lazily (a few queries ahead of the workers).
+    def dispatch(self, queries):
+        queries = iter(queries)
+        try:
+            while True:
+                while len(self.queue) + len(self.running) < 2 * self.workers:
+                    item = next(queries, None)
+                    if item is None: break
+                    self.submit(*item)
+
+                record = self.next()
+                if record is None: return
+                yield record
+        finally:
+            if len(self.running) > 0 or len(self.queue) > 0: self.cancelAll()
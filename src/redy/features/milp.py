@@ -0,0 +1,139 @@
+#
+# In-process LP/MILP bound tightening of networks (using SciPy's HiGHS,
+# which is loaded on first use)
+# See `milpBounds`
+#
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from redy.framework import packed
+from redy.features import bounds
+
+# The model of the worker processes, see `_init`
+_model = None
+
+# Encodes the first layers of a list of PackedLayer, given bounds of every layer
+# (see `bounds.intervals`), as a MILP over the variables [WS/input, activation, phase] of
+# every layer. Unstable ReLUs use a big-M encoding with a binary phase variable, which is
+# continuous (the triangle relaxation) for relaxed ReLUs or if `lp`.
+# Returns (offsets, A, rowLower, rowUpper, varLower, varUpper, integrality) where `offsets`
+# are the indices of the first activation variable of every layer
+def _encode(layers, layerBounds, lp):
+    from scipy import sparse
+
+    offsets, varLower, varUpper, integrality = [], [], [], []
+    rows, rowLower, rowUpper = [], [], []
+    def row(coeffs, lower, upper):
+        rows.append(coeffs)
+        rowLower.append(lower)
+        rowUpper.append(upper)
+
+    size = 0
+    prev = None
+    for layer, (lower, upper, actLower, actUpper) in zip(layers, layerBounds):
+        n = layer.size()
+        ws, act, phase = size, size + n, size + 2 * n
+        size += 3 * n
+        offsets.append(act)
+        varLower += [lower, actLower, np.zeros(n)]
+        varUpper += [upper, actUpper, np.ones(n)]
+
+        # ws - W @ prev = bias
+        if not layer.isInput():
+            for i in range(n):
+                coeffs = {prev + j: -c for j, c in enumerate(layer.weights[i]) if c != 0}
+                coeffs[ws + i] = 1.
+                row(coeffs, layer.bias[i], layer.bias[i])
+
+        unstable = np.zeros(n, dtype=bool)
+        for i in range(n):
+            mode = layer.modes[i]
+            if mode == packed.IDENTITY or (mode == packed.RELU and lower[i] >= 0):
+                row({act + i: 1., ws + i: -1.}, 0., 0.)
+            elif mode == packed.RELU and upper[i] > 0:
+                assert np.isfinite(lower[i]) and np.isfinite(upper[i]), "Unbounded ReLU input (%d)" % (i, )
+                unstable[i] = True
+                # act >= ws, act <= ws - lower * (1 - phase), act <= upper * phase
+                row({act + i: 1., ws + i: -1.}, 0., np.inf)
+                row({act + i: 1., ws + i: -1., phase + i: -lower[i]}, -np.inf, -lower[i])
+                row({act + i: 1., phase + i: -upper[i]}, -np.inf, 0.)
+            # Otherwise (inactive ReLU, CONST, FREE) the activation is bounded only by its limits
+        integral = np.zeros(n, dtype=np.uint8) if lp else (unstable & ~layer.relaxed).astype(np.uint8)
+        integrality += [np.zeros(2 * n, dtype=np.uint8), integral]
+        prev = act
+
+    entries = [(r, v, c) for r, coeffs in enumerate(rows) for v, c in coeffs.items()]
+    r, v, c = zip(*entries) if len(entries) > 0 else ((), (), ())
+    A = sparse.csr_matrix((c, (r, v)), shape=(len(rows), size))
+
+    return (offsets, A, np.array(rowLower), np.array(rowUpper),
+            np.concatenate(varLower), np.concatenate(varUpper), np.concatenate(integrality))
+
+def _init(model):
+    global _model
+    _model = model
+
+# Minimizes `objective` @ x over `_model` (x are the activation variables of the last layer)
+# Returns a lower bound of the minimum - the best of the MILP's dual bound and the LP relaxation's
+# optimum (-inf if the LP is unbounded). The MILP's objective is not used, it is only within the
+# solver's relative gap of the minimum, so it may be above it.
+def _minimize(objective, timeout):
+    from scipy.optimize import milp, LinearConstraint, Bounds
+
+    offsets, A, rowLower, rowUpper, varLower, varUpper, integrality = _model
+    c = np.zeros(A.shape[1])
+    c[offsets[-1]:offsets[-1]+len(objective)] = objective
+    solve = lambda integrality, options: milp(c, constraints=LinearConstraint(A, rowLower, rowUpper),
+                                              bounds=Bounds(varLower, varUpper), integrality=integrality, options=options)
+
+    res = solve(0, {} if timeout is None else {"time_limit": timeout})
+    bound = res.fun if res.status == 0 else -np.inf
+    if not integrality.any() or res.status != 0: return bound
+
+    res = solve(integrality, {} if timeout is None else {"time_limit": timeout})
+    if res.get("mip_dual_bound") is not None: return max(bound, res.mip_dual_bound)
+    return bound
+
+# (lower, upper) of every WS node of `layer` given the model of the previous layers
+def _layerBounds(layer, timeout, pool):
+    tasks = [(sign * layer.weights[i], timeout) for i in range(layer.size()) for sign in [1, -1]]
+    results = list(pool.map(_minimize, *zip(*tasks))) if pool is not None else [_minimize(*t) for t in tasks]
+    results = np.array(results).reshape(-1, 2)
+    return results[:, 0] + layer.bias, -results[:, 1] + layer.bias
+
+# Computes LP/MILP bounds for every node of `net` (ViewNetwork, possibly clipped or modified),
+# layer by layer - the WS nodes of every layer are minimized and maximized over a big-M MILP
+# encoding of the previous layers (see `_encode`), which uses the bounds of those layers
+# (starting from `bounds.symbolic` and the nodes' limits).
+# `lp` - use the LP relaxation instead of the MILP (faster and looser)
+# `timeout` - time limit (seconds) of every minimization/maximization, the best bound found
+#             by then is used
+# `workers` - number of processes solving neurons of a layer in parallel
+# `update` - should the bounds be written into the nodes' limits?
+# Returns the bounds, a list (per layer) of (lower, upper) of the input/WS node of every neuron
+# (like `example_milp.parse_milp`, see `example_relax`)
+def milpBounds(net, lp=False, timeout=None, workers=1, update=True):
+    layers = packed.pack(net)
+    layerBounds = bounds.symbolic(layers)
+    assert np.isfinite(layerBounds[0][0]).all() and np.isfinite(layerBounds[0][1]).all(), "Input is not bounded"
+
+    workers = workers or os.cpu_count()
+    for k in range(1, len(layers)):
+        model = _encode(layers[:k], layerBounds[:k], lp)
+        if workers > 1:
+            with ProcessPoolExecutor(workers, initializer=_init, initargs=(model, )) as pool:
+                lower, upper = _layerBounds(layers[k], timeout, pool)
+        else:
+            _init(model)
+            lower, upper = _layerBounds(layers[k], timeout, None)
+
+        oldLower, oldUpper, _, _ = layerBounds[k]
+        lower, upper = np.maximum(lower, oldLower), np.minimum(upper, oldUpper)
+        layerBounds[k] = (lower, upper) + bounds._activate(layers[k], lower, upper)
+
+    if update: bounds._update(layers, layerBounds)
+
+    return [[(float(l), float(u)) for l, u in zip(lower, upper)] for lower, upper, _, _ in layerBounds]
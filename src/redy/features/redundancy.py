@@ -4,15 +4,30 @@
 
 from redy.framework.nodes import Node
 from redy.framework.equations import Equation
-from redy.framework.views import ViewIO
-from redy.features import amend, clip
-
+from redy.framework.views import ViewIO, ViewNetwork, translateNodes
+from redy.framework import instrument
+from redy.features import amend, clip, screen
+from redy.features.subspace import apply_subspace, subspace_box
+
+# Queries (and networks) returned by RedundancyTest are built on top of cached
+# clipped copies of the network ("bases") and share their nodes: unmodified
+# layers are shared by reference, and only the modified neurons and the layers
+# after them are copied (so building a query costs the size of the change).
+# Use `duplicate` before changing the limits of a returned view or network in place
+# (e.g. `apply_subspace`, `bounds` or `milp.milpBounds`), and `invalidate` after
+# changing the network.
 class RedundancyTest(object):
     def __init__(self, network, epsilon):
         # neurons = list of (layer, neuron, mode)
         self.network = network
         self.epsilon = epsilon
+        self.invalidate()
+
+    # Drops the cached bases (call after changing `network`)
+    def invalidate(self):
+        self._bases = {}
 
+    @instrument.timed("duplicateAndClip")
     def duplicateAndClip(self, rng, suffix="_dup"):
         net = self.network.duplicate(suffix)
 
@@ -24,15 +39,52 @@ class RedundancyTest(object):
         
         return net
 
+    # The network and the modified network clipped at (firstLayer, firstMode)
+    # (and not at the end), see `_view`
+    def _base(self, firstLayer, firstMode):
+        key = (firstLayer, firstMode)
+        if key not in self._bases:
+            rng = clip.Range(firstLayer, firstMode, self.network.layerCount()-1, 1)
+            self._bases[key] = (self.duplicateAndClip(rng), self.duplicateAndClip(rng, suffix="_mod"))
+        return self._bases[key]
+
+    # Returns a network of the layers of `base` up to `lastLayer` (clipped at `lastMode`).
+    # Nodes are shared with `base`, except for the neurons `copied` of layer `firstCopy`
+    # and all of the layers after it, which are copies (so they can be modified).
+    # Copied sums share their coefficients, and the sources of every layer are
+    # translated once (see `translateNodes`).
+    def _view(self, base, lastLayer, lastMode, firstCopy=None, copied=()):
+        layers = base.layers[:lastLayer+1]
+        layers[-1] = [ns[:lastMode+1] for ns in layers[-1]]
+        if firstCopy is None: return ViewNetwork(layers)
+
+        table = {}
+        def copy(ns):
+            new = [n.duplicate() for n in ns]
+            table.update(zip(ns, new))
+            return new
+        layers[firstCopy] = [(copy(ns) if i in copied else ns) for i, ns in enumerate(layers[firstCopy])]
+        for l in range(firstCopy+1, len(layers)):
+            layers[l] = [copy(ns) for ns in layers[l]]
+        translateNodes(table.values(), lambda n: table.get(n, n))
+
+        return ViewNetwork(layers)
+
+    @instrument.timed("prep")
     def _prep(self, neurons, rng):
         if rng.lastLayer is None:
             rng = clip.Range(rng.firstLayer, rng.firstMode, self.network.layerCount()-1, rng.lastMode)
         assert all((1 <= l < (self.network.layerCount()-1)) for l,n,f in neurons)
         assert all(( (rng.firstLayer <= l <= rng.lastLayer) and (0 <= n < self.network.layerSize(l)) ) for l, n, f in neurons)
+        assert 0 <= rng.firstLayer < rng.lastLayer < self.network.layerCount()
 
-        net = self.duplicateAndClip(rng)
-        mod = self.duplicateAndClip(rng, suffix="_mod")
+        # Only the modified neurons (and the layers after them) are copied
+        netBase, modBase = self._base(rng.firstLayer, rng.firstMode)
         neurons = {(l-rng.firstLayer, n): f for l, n, f in neurons}
+        lastLayer = rng.lastLayer - rng.firstLayer
+        firstDupLayer = min((l for l, n in neurons), default=None)
+        net = self._view(netBase, lastLayer, rng.lastMode)
+        mod = self._view(modBase, lastLayer, rng.lastMode, firstDupLayer, set(n for l, n in neurons if l == firstDupLayer))
         amend.modify(mod, neurons)
         return net, mod, neurons
 
@@ -95,23 +147,21 @@ class RedundancyTest(object):
     # `returnNetwork` - allows to return NetworkViews of the networks joined in the ViewIO (`view`)
     # `strict` - if true, checks in a way with 0 False-Positives (x >= -e or x <= e)
     #            otherwise, checks in a way with 0 False-Negatives (x >= e or x <= -e)
+    @instrument.timed("stateCheck")
     def getStateCheck(self, neuron, rng=clip.Range(), returnNetwork=False, strict=False):
         assert (rng.lastLayer, rng.lastMode) in [(None, 0), (self.network.layerCount()-1, 0)]
 
         l,n,f = neuron
-        rng = clip.Range(firstLayer=rng.firstLayer, firstMode=rng.firstMode, lastLayer=l, lastMode=0)
+        assert rng.firstLayer < l < self.network.layerCount()
         l -= rng.firstLayer
 
-        clipped = self.duplicateAndClip(rng)
+        clipped = self._view(self._base(rng.firstLayer, rng.firstMode)[0], l, 0)
         clipped.layers[-1] = clipped.layers[-1][n:n+1]
 
         assert len(clipped.layers[-1][0]) == 1
         vb = clipped.layers[-1][0][0]
 
-        if not strict:
-            comp, eps = (Equation.Comparator.GE, self.epsilon) if f == "inactive" else (Equation.Comparator.LE, -self.epsilon)
-        else:
-            comp, eps = (Equation.Comparator.GE, -self.epsilon) if f == "inactive" else (Equation.Comparator.LE, self.epsilon)
+        comp, eps = self._stateCondition(f, strict)
         equations = [Equation([
             (1, vb)
         ], comp, eps)]
@@ -123,3 +173,51 @@ class RedundancyTest(object):
         if returnNetwork: return view, clipped
         else: return view
 
+
+    # The condition (comparator, scalar) on the WS node checked by `getStateCheck`
+    def _stateCondition(self, f, strict):
+        if not strict:
+            return (Equation.Comparator.GE, self.epsilon) if f == "inactive" else (Equation.Comparator.LE, -self.epsilon)
+        else:
+            return (Equation.Comparator.GE, -self.epsilon) if f == "inactive" else (Equation.Comparator.LE, self.epsilon)
+
+    # Given a list of neurons, samples the input domain and returns state check
+    # queries (see `getStateCheck`) only for neurons which were never observed
+    # satisfying their query (e.g. never seen in the opposite phase).
+    # `neurons` - a list of (layer, neuron, function)
+    # `samples` - number of inputs to sample
+    # `rng` - optional clipping range, see examples
+    # `subspace` - optional input subspace (see `subspace.apply_subspace`),
+    #              applied on both the sampling and the returned queries
+    # `strict` - see `getStateCheck`
+    # `seed` - sampling seed
+    # Returns (views, witnesses) - a dict from neuron to its query, and a dict from
+    # every discarded neuron to an input which satisfies its query
+    def getScreenedStateChecks(self, neurons, samples=10000, rng=clip.Range(), subspace=None, strict=False, seed=None):
+        assert (rng.lastLayer, rng.lastMode) in [(None, 0), (self.network.layerCount()-1, 0)]
+        if len(neurons) == 0: return {}, {}
+
+        lastLayer = max(l for l, n, f in neurons)
+        net = self._view(self._base(rng.firstLayer, rng.firstMode)[0], lastLayer - rng.firstLayer, 0)
+
+        box = screen.inputBox(net)
+        if subspace is not None: box = subspace_box(box, subspace)
+        observation = screen.observe(net, screen.sampleBox(box, samples, seed))
+
+        views, witnesses = {}, {}
+        for neuron in neurons:
+            l, n, f = neuron
+            comp, eps = self._stateCondition(f, strict)
+            comp = "ge" if comp == Equation.Comparator.GE else "le"
+            witness = screen.findWitness(observation, (l - rng.firstLayer, n), comp, eps)
+            if witness is not None:
+                witnesses[neuron] = witness
+                continue
+
+            view = self.getStateCheck(neuron, rng, strict=strict)
+            if subspace is not None:
+                view = view.duplicate()
+                apply_subspace(view, subspace)
+            views[neuron] = view
+
+        return views, witnesses
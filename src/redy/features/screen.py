@@ -0,0 +1,55 @@
+#
+# Functions for screening neurons by sampling, before querying a solver
+#
+
+from collections import namedtuple
+
+import numpy as np
+
+from redy.convert import export_batch
+
+# Result of `observe`:
+# `inputs` - the sampled inputs (N, inputs)
+# `pre` - per layer, values of the input/WS nodes (N, layer size)
+# `feasible` - per layer, a mask (N, ) of samples where all nodes up to the
+#              layer (including the layer's input/WS nodes) are within limits
+Observation = namedtuple("Observation", ("inputs", "pre", "feasible"))
+
+# Returns the input box of a network (list of (lower, upper))
+def inputBox(net):
+    box = [ns[0].limit for ns in net.layers[0]]
+    assert all((l is not None and u is not None) for l, u in box), "Input is not bounded"
+    return box
+
+# Samples `count` inputs uniformly from `box` (list of (lower, upper))
+def sampleBox(box, count, seed=None):
+    lower, upper = np.array(box, dtype=float).T
+    return np.random.default_rng(seed).uniform(lower, upper, (count, len(box)))
+
+# Evaluates `net` on `inputs` and records the values of every neuron
+def observe(net, inputs):
+    ev = export_batch.export_batch(net)
+    _, acts = ev.forwardEvaluate(inputs, returnLayers=True)
+
+    pre, feasible = [], []
+    valid = np.ones(len(inputs), dtype=bool)
+    for layer, (p, a) in zip(ev.layers, acts):
+        valid = valid & ((p >= layer.lower - export_batch.EPSILON) & (p <= layer.upper + export_batch.EPSILON)).all(axis=1)
+        pre.append(p)
+        feasible.append(valid)
+        valid = valid & ((a >= layer.actLower - export_batch.EPSILON) & (a <= layer.actUpper + export_batch.EPSILON)).all(axis=1)
+
+    return Observation(np.asarray(inputs, dtype=float), pre, feasible)
+
+# Given an observation and a neuron's state check condition, returns a
+# witness input (or None) where the WS node of `neuron` satisfies the condition
+# `neuron` - (layer, neuron) in the observed network
+# `comparator` - "ge" or "le"
+# `threshold` - the value compared with
+def findWitness(observation, neuron, comparator, threshold):
+    l, n = neuron
+    values = observation.pre[l][:, n]
+    hit = (values >= threshold) if comparator == "ge" else (values <= threshold)
+    hit &= observation.feasible[l]
+    if not hit.any(): return None
+    return observation.inputs[np.argmax(hit)]
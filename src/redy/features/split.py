@@ -0,0 +1,174 @@
+#
+# Adaptive input splitting (branch and bound) of a query
+# See `splitSearch`
+#
+
+from collections import deque
+
+import numpy as np
+
+from redy import solvers
+from redy.framework import equations
+from redy.convert import export_evaluate
+from redy.features import bounds, screen
+
+# A sub-box of the input domain of a query, and a node of the split tree
+# `path` - the splits leading to the region, a tuple of (input, half), where half is 0 (lower) or 1 (upper)
+# `verdict` - of the region (for a split region - of its children, see `resolve`), None if not decided
+# `method` - how a leaf was decided: "bounds", "sample" or "solver"
+# `dim` - the input the region was (or will be) split along
+class Region(object):
+    def __init__(self, box, path=()):
+        self.box = box
+        self.path = path
+        self.verdict = None
+        self.method = None
+        self.counterexample = None
+        self.stats = None
+        self.dim = None
+        self.children = []
+
+    def depth(self):
+        return len(self.path)
+
+    def decide(self, verdict, method, counterexample=None, stats=None):
+        self.verdict, self.method = verdict, method
+        self.counterexample, self.stats = counterexample, stats
+
+    # Splits the region into two halves along `dim`, returns the children
+    def split(self, dim):
+        self.dim = dim
+        l, u = self.box[dim]
+        mid = (l + u) / 2.
+        for half, r in enumerate([(l, mid), (mid, u)]):
+            box = list(self.box)
+            box[dim] = r
+            self.children.append(Region(box, self.path + ((dim, half), )))
+        return self.children
+
+    def leaves(self):
+        if len(self.children) == 0: return [self]
+        return [r for c in self.children for r in c.leaves()]
+
+    # Sets (and returns) the verdict of split regions from their children -
+    # SAT if some child is SAT, UNSAT if all children are UNSAT,
+    # otherwise TIMEOUT if some child timed-out (or UNKNOWN)
+    def resolve(self):
+        if len(self.children) == 0:
+            return solvers.UNKNOWN if self.verdict is None else self.verdict
+        verdicts = [c.resolve() for c in self.children]
+        if solvers.SAT in verdicts: self.verdict = solvers.SAT
+        elif all(v == solvers.UNSAT for v in verdicts): self.verdict = solvers.UNSAT
+        elif solvers.TIMEOUT in verdicts: self.verdict = solvers.TIMEOUT
+        else: self.verdict = solvers.UNKNOWN
+        return self.verdict
+
+    # Fraction of the region's volume which was proved UNSAT
+    def coverage(self):
+        if len(self.children) == 0: return 1. if self.verdict == solvers.UNSAT else 0.
+        return sum(c.coverage() for c in self.children) / len(self.children)
+
+    def __repr__(self):
+        path = " ".join("x%d%s" % (d, "<" if h == 0 else ">") for d, h in self.path)
+        return "Region(%s: %s)" % (path or "root", self.verdict)
+
+    # Returns the tree as text, a line per region (indented by depth)
+    def format(self, indent=0):
+        lines = ["%s%r %s" % ("  " * indent, self, self.method or "")]
+        lines.extend(c.format(indent + 1) for c in self.children)
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.format()
+
+# Whether the bounds prove that the view has no solution
+def _refuted(view, lb):
+    if not lb.feasible: return True
+    for e, expr, (lower, upper) in bounds.equationBounds(view, lb):
+        if e.comparator == equations.Equation.Comparator.GE and upper < e.scalar: return True
+        if e.comparator == equations.Equation.Comparator.LE and lower > e.scalar: return True
+        if e.comparator == equations.Equation.Comparator.EQ and not (lower <= e.scalar <= upper): return True
+    return False
+
+# The input with the largest influence on the equations - the sum of the absolute
+# coefficients of the input in the equations' linear bounds, times its width.
+# The widest input if the equations do not depend on the inputs.
+def _influence(view, lb, box):
+    width = np.array([u - l for l, u in box], dtype=float)
+    smear = np.zeros(len(box))
+    for e, (LL, cL, LU, cU), _ in bounds.equationBounds(view, lb):
+        smear += (np.abs(LL) + np.abs(LU)) * width
+    return int(np.argmax(smear if smear.any() else width))
+
+# Returns a copy of `view` restricted to `box`
+def _restrict(view, box):
+    q = view.duplicate()
+    for n, (l, u) in zip(q.inputs, box):
+        n.updateLimit(l, u)
+    return q
+
+# Solves a query (ViewIO, e.g. of `redundancy.RedundancyTest`) by adaptively splitting its input box.
+# Every region is first bounded (see `bounds.linearBounds`) and sampled -
+#  - regions where the bounds refute the equations are UNSAT ("bounds")
+#  - regions with a valid sample are SAT ("sample")
+#  - other regions are split (along the most influential input) up to `splitDepth`,
+#    and below it - sent to the solver of `dispatcher` (see `features.dispatch`), in parallel.
+#    Regions which the solver did not decide (timeout etc.) are split again, up to `maxDepth`.
+# Without a dispatcher, regions are split up to `maxDepth` and the undecided leaves are UNKNOWN.
+# Stops at the first SAT region (cancelling the rest).
+# `box` - the input box (list of (lower, upper)), by default the input limits
+# `samples` - inputs sampled in every region
+# Returns (verdict, root Region). The verdict is SAT, UNSAT or - when some regions were
+# not decided - TIMEOUT/UNKNOWN, where the tree tells which regions were proved
+# (see `Region.coverage`).
+def splitSearch(view, dispatcher=None, box=None, splitDepth=4, maxDepth=12, samples=64, seed=None):
+    if box is None: box = [n.limit for n in view.inputs]
+    assert all((l is not None and u is not None) for l, u in box), "Input is not bounded"
+
+    ev = export_evaluate.export_evaluate(view)
+    rng = np.random.default_rng(seed)
+    root = Region(list(box))
+    work = deque([root])
+    found = None
+
+    while found is None:
+        while len(work) > 0 and found is None:
+            region = work.popleft()
+            lb = bounds.linearBounds(view, region.box)
+            if _refuted(view, lb):
+                region.decide(solvers.UNSAT, "bounds")
+                continue
+
+            if samples > 0:
+                inputs = screen.sampleBox(region.box, samples, rng)
+                valid = ev.batchValidate(ev.batchEvaluate(inputs)).valid
+                if valid.any():
+                    region.decide(solvers.SAT, "sample", inputs[valid.argmax()].tolist())
+                    found = region
+                    continue
+
+            dim = _influence(view, lb, region.box)
+            if region.depth() < min(splitDepth, maxDepth) or (dispatcher is None and region.depth() < maxDepth):
+                work.extend(region.split(dim))
+            elif dispatcher is None:
+                region.decide(solvers.UNKNOWN, "bounds")
+            else:
+                region.dim = dim
+                dispatcher.submit(region, _restrict(view, region.box))
+
+        if found is not None or dispatcher is None: break
+        record = dispatcher.next()
+        if record is None: break
+
+        region = record.neuron
+        region.decide(record.verdict, "solver", record.counterexample, record.stats)
+        if record.verdict == solvers.SAT:
+            found = region
+        elif record.verdict in [solvers.TIMEOUT, solvers.UNKNOWN, solvers.ERROR] and region.depth() < maxDepth:
+            work.extend(region.split(region.dim))
+
+    if found is not None and dispatcher is not None:
+        dispatcher.cancelAll()
+        while dispatcher.next() is not None: pass
+
+    return root.resolve(), root
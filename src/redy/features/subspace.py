@@ -0,0 +1,34 @@
+#
+# Functions for restricting a network/query into a sub-domain of its input
+#
+
+SPLIT = 2
+
+# Given a box (list of (lower, upper), one per input) and a subspace, returns
+# the restricted box.
+# Subdomain is represented in a string of digits. In the case of 5 inputs,
+# each 5 digits corresponds to a split where each digit corresponds to a coordinate,
+# instructing which range (out of SPLIT) of the coordinate to take.
+def subspace_box(box, subspace):
+    assert type(subspace) is str
+    assert len(subspace) % len(box) == 0
+
+    box = list(box)
+    subspace = list(map(int, subspace))
+    for split in range(0, len(subspace), len(box)):
+        split = subspace[split:split+len(box)]
+
+        for i, ch in enumerate(split):
+            assert ch < SPLIT
+            l,u = box[i]
+            sz = u-l
+            chsz = sz/float(SPLIT)
+            box[i] = (l+ch*chsz, l+(ch+1)*chsz)
+
+    return box
+
+# Restricts the inputs of `io` (ViewIO) into the given subspace (see `subspace_box`)
+def apply_subspace(io, subspace):
+    box = subspace_box([inp.limit for inp in io.inputs], subspace)
+    for inp, (l, u) in zip(io.inputs, box):
+        inp.updateLimit(l, u)
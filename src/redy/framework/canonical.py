@@ -0,0 +1,155 @@
+#
+# Canonical serialization of Redy representation (ViewIO, ViewNetwork)
+# The serialization depends only on the structure and the numeric content
+# of the view - not on node names or object identity.
+# See `serialize`, `fingerprint`, `canonicalOrder`, `layerHashes` and `dedup`
+#
+
+import hashlib
+
+from redy.framework import nodes
+
+def _num(x):
+    return "-" if x is None else float(x).hex()
+
+# Normalized terms - coefficients of the same node are summed, zeros are dropped
+def _terms(terms, ids):
+    coeffs = {}
+    for c, v in terms:
+        coeffs[ids[v]] = coeffs.get(ids[v], 0) + c
+    return ",".join("%s*%s" % (_num(c), i) for i, c in coeffs.items() if c != 0)
+
+# Nodes `node` depends on (ignoring zero coefficients)
+def _connected(node):
+    if isinstance(node, nodes.NodeSum): return [v for c, v in zip(node.coeffs, node.sources) if c != 0]
+    return node.connectedTo()
+
+# Describes `node` given canonical ids of the nodes it is connected to
+def _describe(node, ids):
+    limit = "%s:%s" % tuple(map(_num, node.limit))
+    if isinstance(node, nodes.NodeSum):
+        return "S[%s](%s)%s" % (limit, _terms(node.inputs, ids), _num(node.scalar))
+    elif isinstance(node, nodes.NodeReLU):
+        return "R[%s](%s)%s" % (limit, ids[node.input], "r" if node.relaxed else "")
+    elif isinstance(node, nodes.NodeAbs):
+        return "A[%s](%s)" % (limit, ids[node.input])
+    elif type(node) == nodes.Node:
+        return "N[%s]" % (limit, )
+    else:
+        assert False, "Unknown node type %r" % (node, )
+
+# Assigns ids to every node reachable from `roots` (in post-order, so a node
+# always gets an id after the nodes it is connected to)
+def _number(roots, ids, order):
+    for root in roots:
+        if root in ids: continue
+        stack = [(root, iter(_connected(root)))]
+        while len(stack) > 0:
+            node, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                stack.pop()
+                if node not in ids:
+                    ids[node] = len(order)
+                    order.append(node)
+            elif child not in ids:
+                stack.append((child, iter(_connected(child))))
+
+# Structural hashes of `roots` (and everything they are connected to),
+# used for ordering nodes which are not reachable from the outputs/equations
+def _merkle(roots, ids):
+    hashes = {}
+    order = []
+    _number(roots, dict(ids), order)
+    get = lambda n: ("I%d" % (ids[n], )) if n in ids else hashes[n]
+    for node in order:
+        # Dependencies are described by position (their hashes follow), sources with
+        # only zero coefficients are dropped by `_terms`
+        positions = {}
+        for n in _connected(node) + list(node.connectedTo()): positions.setdefault(n, len(positions))
+        desc = _describe(node, positions)
+        deps = ",".join(get(n) for n in _connected(node))
+        hashes[node] = hashlib.sha256((desc + deps).encode()).hexdigest()
+    return hashes
+
+# Returns the nodes of a ViewIO in canonical order - a post-order walk from the inputs,
+# the outputs and the equations (in their order), then the rest of the nodes ordered
+# by their structure. Every node comes after the nodes it is connected to, and the
+# order does not depend on names or object identity (e.g. iteration order of a set).
+def canonicalOrder(view):
+    ids, order = {}, []
+    _number(view.inputs, ids, order)
+    _number(view.outputs, ids, order)
+    _number([v for e in view.equations for c, v in e.terms], ids, order)
+
+    # Nodes not reachable from the above, ordered by their structure
+    rest = [n for n in view.nodes if n not in ids]
+    if len(rest) > 0:
+        hashes = _merkle(rest, ids)
+        _number(sorted(rest, key=hashes.get), ids, order)
+    return order
+
+# Returns the canonical serialization of a ViewIO (list of lines).
+# Nodes are numbered by their canonical order (see `canonicalOrder`), so two views
+# which differ only in names or object identity have the same serialization.
+# Terms are normalized (see `_terms`), so e.g. modifying a neuron whose outgoing
+# weights are all zero only adds unconnected nodes.
+def serialize(view):
+    order = canonicalOrder(view)
+    ids = {n: i for i, n in enumerate(order)}
+
+    lines = ["inputs %s" % (",".join(str(ids[n]) for n in view.inputs), )]
+    lines += [_describe(n, ids) for n in order]
+    lines += ["outputs %s" % (",".join(str(ids[n]) for n in view.outputs), )]
+    for e in view.equations:
+        lines.append("E%s(%s)%s" % (e.comparator.name, _terms(e.terms, ids), _num(e.scalar)))
+    return lines
+
+def _hash(lines):
+    h = hashlib.sha256()
+    for line in lines:
+        h.update(line.encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+# Returns a hash (hex string) of the canonical serialization of a ViewIO
+def fingerprint(view):
+    return _hash(serialize(view))
+
+# Returns cumulative hashes of the layers of a ViewNetwork - the k-th hash
+# depends only on layers 0..k, so networks sharing a prefix share hashes.
+# Nodes are referred to by their (layer, position) in the network.
+# `previous` - optional hashes of the first `start` layers (e.g. of the network
+#              before it was modified from layer `start`), which are not recomputed
+def layerHashes(net, previous=None, start=0):
+    assert start == 0 or (previous is not None and len(previous) >= start)
+    ids = {}
+    hashes = list(previous[:start]) if start > 0 else []
+    for li, layer in enumerate(net.layers):
+        for ni, ns in enumerate(layer):
+            for k, node in enumerate(ns):
+                ids[node] = "%d.%d.%d" % (li, ni, k)
+        if li < start: continue
+
+        lines = [hashes[-1] if li > 0 else "layers"]
+        lines += ["/".join(_describe(node, ids) for node in ns) for ns in layer]
+        hashes.append(_hash(lines))
+
+    return hashes
+
+# Returns a hash of the canonical serialization of a ViewNetwork
+def fingerprintNetwork(net):
+    return layerHashes(net)[-1]
+
+# Collapses identical views (ViewIO) in a batch
+# Returns (unique, index) - the distinct views (first occurrences), and for
+# every view the index of its representative in `unique`
+def dedup(views):
+    unique, index, seen = [], [], {}
+    for view in views:
+        key = fingerprint(view)
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(view)
+        index.append(seen[key])
+    return unique, index
@@ -10,6 +10,8 @@ class Equation(object):
         EQ = auto()
         GE = auto()
 
+    __slots__ = ("terms", "comparator", "scalar")
+
     def __init__(self, terms, comparator, scalar):
         # term0*termC + ... >=/<=/== scalar
         self.terms = terms
@@ -0,0 +1,177 @@
+#
+# Opt-in instrumentation of the pipeline stages (building, exporting and solving queries)
+# Usage -
+#   with instrument.Recorder() as recorder:
+#       campaign.run()
+#   recorder.save("stages.csv") # Or .json
+#   print(recorder.aggregate())
+# Stages are recorded only while a Recorder is active, otherwise `timed` functions
+# are called directly (a single check per call).
+#
+
+import sys
+import csv
+import json
+import time
+import functools
+
+from redy.framework import nodes, views
+
+# The active Recorder (or None)
+_recorder = None
+
+FIELDS = ("query", "stage", "parent", "seconds", "nodes", "equations", "relus", "blocks")
+
+# Returns (nodes, equations, ReLUs) of a ViewIO, a ViewNetwork, a list of layers
+# or a tuple (of which the first element is counted)
+def counts(obj):
+    if isinstance(obj, tuple) and len(obj) > 0: return counts(obj[0])
+    if isinstance(obj, views.ViewIO): ns, equations = obj.nodes, len(obj.equations)
+    elif isinstance(obj, views.ViewNetwork): ns, equations = obj.nodes(), 0
+    elif isinstance(obj, list): ns, equations = [n for l in obj for neuron in l for n in neuron], 0
+    else: return None, None, None
+    return len(ns), equations, sum(1 for n in ns if isinstance(n, nodes.NodeReLU))
+
+# A stage being recorded, see `Recorder.stage`
+class _Stage(object):
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.record = dict.fromkeys(FIELDS)
+        self.record["stage"] = name
+        self.record["query"] = recorder.query
+
+    # Counts the nodes of the stage's result (see `counts`)
+    def count(self, obj):
+        self.record["nodes"], self.record["equations"], self.record["relus"] = counts(obj)
+
+    def __enter__(self):
+        stack = self.recorder.stack
+        self.record["parent"] = stack[-1].record["stage"] if len(stack) > 0 else None
+        stack.append(self)
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["seconds"] = time.perf_counter() - self.start
+        # Net number of allocated memory blocks
+        self.record["blocks"] = sys.getallocatedblocks() - self.blocks
+        self.recorder.stack.pop()
+        self.recorder.records.append(self.record)
+        return False
+
+# Does nothing, see `stage`
+class _NoStage(object):
+    def count(self, obj):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_STAGE = _NoStage()
+
+# Records the stages of the pipeline while active (`with recorder:` or `start`/`stop`)
+# Every record is a dict of FIELDS - the query (see `query`) and the stage which contains it
+# (or None), the wall time, the nodes, equations and ReLUs of the stage's result, and the net
+# number of memory blocks allocated.
+# Times of stages include the stages they contain.
+class Recorder(object):
+    def __init__(self):
+        self.records = []
+        self.stack = []
+        self.query = None
+        self.previous = None
+
+    def start(self):
+        global _recorder
+        self.previous, _recorder = _recorder, self
+
+    def stop(self):
+        global _recorder
+        _recorder, self.previous = self.previous, None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    # Records a stage which was measured elsewhere (e.g. a query solved in another process)
+    def add(self, name, query, seconds, **fields):
+        record = dict.fromkeys(FIELDS)
+        record.update(fields, stage=name, query=query, seconds=seconds)
+        self.records.append(record)
+
+    # Returns {stage: {"count", "seconds", "maxSeconds", "nodes", "blocks"}} - the number of times
+    # every stage was recorded, their total and maximal seconds, and total nodes and blocks
+    def aggregate(self):
+        result = {}
+        for r in self.records:
+            a = result.setdefault(r["stage"], {"count": 0, "seconds": 0., "maxSeconds": 0., "nodes": 0, "blocks": 0})
+            a["count"] += 1
+            a["seconds"] += r["seconds"]
+            a["maxSeconds"] = max(a["maxSeconds"], r["seconds"])
+            a["nodes"] += r["nodes"] or 0
+            a["blocks"] += r["blocks"] or 0
+        return result
+
+    # Writes the records into `path` - CSV, or JSON (records and aggregate) if it ends with .json
+    def save(self, path):
+        with open(path, "w", newline="") as fp:
+            if path.endswith(".json"):
+                json.dump({"records": self.records, "aggregate": self.aggregate()}, fp, indent=1, default=repr)
+                return
+            writer = csv.DictWriter(fp, FIELDS)
+            writer.writeheader()
+            for r in self.records:
+                writer.writerow(dict(r, query=None if r["query"] is None else repr(r["query"])))
+
+# Returns a context of a stage of the active Recorder (does nothing if there is none)
+# Usage -
+#   with instrument.stage("export") as s:
+#       ...
+#       s.count(view) # Optional
+def stage(name):
+    if _recorder is None: return _NO_STAGE
+    return _recorder.stage(name)
+
+# Sets the query which the stages recorded in the context belong to
+class query(object):
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.recorder = _recorder
+        if self.recorder is None: return self
+        self.previous, self.recorder.query = self.recorder.query, self.key
+        return self
+
+    def __exit__(self, *exc):
+        if self.recorder is not None: self.recorder.query = self.previous
+        return False
+
+# Records a stage of the active Recorder (see `Recorder.add`)
+def add(name, query, seconds, **fields):
+    if _recorder is not None: _recorder.add(name, query, seconds, **fields)
+
+# Decorator of a function which is a stage named `name`. The result of the function
+# is counted (see `counts`), or `subject(args, result)` if given.
+def timed(name, subject=None):
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if _recorder is None: return f(*args, **kwargs)
+            with _recorder.stage(name) as s:
+                result = f(*args, **kwargs)
+                s.count(result if subject is None else subject(args, result))
+            return result
+        return wrapper
+    return decorator
@@ -4,9 +4,15 @@
 # NodeSum - Weighted Sum Neuron
 # NodeReLU - ReLU Neuron
 # NodeAbs - Absolute Value Neuron
+# Nodes use __slots__ (no per-instance __dict__), as networks and queries
+# are made of many of them
 #
 
+from array import array
+
 class Node(object):
+    __slots__ = ("limit", "name")
+
     def __init__(self):
         self.limit = (None, None)
         self.name = None
@@ -38,28 +44,47 @@ class Node(object):
         return []
 
 class NodeSum(Node):
+    __slots__ = ("coeffs", "sources", "scalar")
+
     def __init__(self):
         super().__init__()
-        # List of (coeff, neuron)
-        self.inputs = []
+        # Coefficients (array of doubles) and input nodes (tuple), stored separately
+        # for compactness. Both are never changed in place, so they may be shared
+        # between nodes. See `inputs` for a tuple of (coeff, neuron)
+        self.coeffs = array("d")
+        self.sources = ()
         self.scalar = 0
 
+    # Tuple of (coeff, neuron). It is built on every access, so it cannot be changed
+    # in place - assign `inputs` (or `coeffs` and `sources`) instead
+    @property
+    def inputs(self):
+        return tuple(zip(self.coeffs, self.sources))
+
+    @inputs.setter
+    def inputs(self, inputs):
+        self.coeffs = array("d", [c for c, n in inputs])
+        self.sources = tuple(n for c, n in inputs)
+
     def duplicate(self):
         n = NodeSum()
         n.copyFrom(self)
         return n
     def copyFrom(self, n):
         super().copyFrom(n)
-        self.inputs = n.inputs[:]
+        self.coeffs = n.coeffs
+        self.sources = n.sources
         self.scalar = n.scalar
 
     def translate(self, trans):
-        self.inputs = [(c, trans(n)) for c,n in self.inputs]
+        self.sources = tuple(map(trans, self.sources))
 
     def connectedTo(self):
-        return [v for c,v in self.inputs]
+        return list(self.sources)
 
 class NodeReLU(Node):
+    __slots__ = ("input", "relaxed")
+
     def __init__(self):
         super().__init__()
         self.input = None
@@ -81,6 +106,8 @@ class NodeReLU(Node):
         return [self.input]
 
 class NodeAbs(Node):
+    __slots__ = ("input", )
+
     def __init__(self):
         super().__init__()
         self.input = None
@@ -0,0 +1,225 @@
+#
+# Packed (array) representation of a ViewNetwork
+# PackedLayer - Weights, biases, activation modes and limits of a single layer
+# ArrayNetwork - ViewNetwork backed by PackedLayers, with lazily created Nodes
+# See `pack`
+#
+
+from array import array
+
+import numpy as np
+
+from redy.framework import nodes, views
+
+# Activation modes of a packed neuron
+IDENTITY = 0 # No activation node (output neurons, "active" neurons)
+RELU = 1     # NodeReLU (relaxed or not)
+CONST = 2    # Plain Node with a fixed value ("inactive" neurons)
+FREE = 3     # Plain Node without a function ("nofunc" neurons)
+
+def _limit(node):
+    l, u = node.limit
+    return (-np.inf if l is None else l), (np.inf if u is None else u)
+
+class PackedLayer(object):
+    def __init__(self, size, inputSize=None):
+        # weights[i, j] - coefficient of neuron j (previous layer) in neuron i
+        # Input layers has no weights
+        self.weights = None if inputSize is None else np.zeros((size, inputSize))
+        self.bias = np.zeros(size)
+
+        self.modes = np.full(size, IDENTITY, dtype=np.int8)
+        self.relaxed = np.zeros(size, dtype=bool)
+
+        # Limits of the first node (input/WS) and of the activation node.
+        # Missing limits are -inf/inf. For IDENTITY neurons both are the same node.
+        self.lower = np.full(size, -np.inf)
+        self.upper = np.full(size, np.inf)
+        self.actLower = np.full(size, -np.inf)
+        self.actUpper = np.full(size, np.inf)
+
+        # Names of the first node and of the activation node of every neuron
+        self.names = [None] * size
+        self.actNames = [None] * size
+
+        # The neurons (list of nodes) the layer was packed from, if any
+        self.neurons = None
+
+    def size(self):
+        return len(self.bias)
+
+    def isInput(self):
+        return self.weights is None
+
+    def indices(self, mode):
+        return np.flatnonzero(self.modes == mode)
+
+    # Tightens the limits of the layer (and of the nodes it was packed from)
+    # Each argument is an array of the layer size, or None
+    # Arrays are replaced (never changed in place), so they may be shared between layers
+    def updateLimits(self, lower=None, upper=None, actLower=None, actUpper=None):
+        lower = self.lower if lower is None else np.maximum(self.lower, lower)
+        upper = self.upper if upper is None else np.minimum(self.upper, upper)
+        actLower = self.actLower if actLower is None else np.maximum(self.actLower, actLower)
+        actUpper = self.actUpper if actUpper is None else np.minimum(self.actUpper, actUpper)
+
+        # An identity neuron is a single node
+        ident = self.modes == IDENTITY
+        self.lower = np.where(ident, np.maximum(lower, actLower), lower)
+        self.upper = np.where(ident, np.minimum(upper, actUpper), upper)
+        self.actLower = np.where(ident, self.lower, actLower)
+        self.actUpper = np.where(ident, self.upper, actUpper)
+
+        if self.neurons is None: return
+        fin = lambda x: float(x) if np.isfinite(x) else None
+        for i, ns in enumerate(self.neurons):
+            ns[0].updateLimit(fin(self.lower[i]), fin(self.upper[i]))
+            if len(ns) > 1: ns[-1].updateLimit(fin(self.actLower[i]), fin(self.actUpper[i]))
+
+    # Returns a copy of the layer (weights and biases are shared, as they are never changed in place)
+    def duplicate(self, suffix=""):
+        l = PackedLayer(0)
+        l.weights, l.bias = self.weights, self.bias
+        l.modes, l.relaxed = self.modes.copy(), self.relaxed.copy()
+        l.lower, l.upper, l.actLower, l.actUpper = self.lower, self.upper, self.actLower, self.actUpper
+        rename = lambda names: [None if n is None else n + suffix for n in names]
+        l.names, l.actNames = rename(self.names), rename(self.actNames)
+        return l
+
+    # Creates the Nodes of the layer given the last nodes of the previous layer's neurons
+    def materialize(self, previous=None):
+        previous = None if previous is None else tuple(previous)
+        fin = lambda x: float(x) if np.isfinite(x) else None
+        neurons = []
+        for i in range(self.size()):
+            if self.isInput():
+                first = nodes.Node()
+            else:
+                first = nodes.NodeSum()
+                first.coeffs = array("d", self.weights[i].tobytes())
+                first.sources = previous
+                first.scalar = float(self.bias[i])
+            first.name = self.names[i]
+            first.limit = (fin(self.lower[i]), fin(self.upper[i]))
+
+            mode = self.modes[i]
+            if mode == IDENTITY:
+                neurons.append([first])
+                continue
+            elif mode == RELU:
+                act = nodes.NodeReLU()
+                act.input = first
+                act.relaxed = bool(self.relaxed[i])
+            else:
+                assert mode in [CONST, FREE], mode
+                act = nodes.Node()
+            act.name = self.actNames[i]
+            act.limit = (fin(self.actLower[i]), fin(self.actUpper[i]))
+            neurons.append([first, act])
+
+        return neurons
+
+# Converts a ViewNetwork into a list of PackedLayer.
+# Every neuron must be [Node] (input layer), [NodeSum] or [NodeSum/Node, activation]
+# where activation is a NodeReLU or a plain Node (see `amend.modify`).
+# WS nodes may only refer to the last node of neurons in the previous layer.
+# For an ArrayNetwork (which was not materialized) returns its own layers.
+def pack(net):
+    if isinstance(net, ArrayNetwork) and not net.materialized():
+        return net.packed
+
+    layers = []
+    prev = None
+    for li, layer in enumerate(net.layers):
+        pl = PackedLayer(len(layer), None if li == 0 else len(prev))
+        pl.neurons = layer
+
+        for ni, ns in enumerate(layer):
+            first = ns[0]
+            assert 1 <= len(ns) <= 2, "Unexpected neuron %r" % (ns, )
+
+            if li == 0:
+                assert type(first) == nodes.Node, "Unexpected input node %r" % (first, )
+            else:
+                assert isinstance(first, nodes.NodeSum), "Unexpected node %r" % (first, )
+                for c, v in zip(first.coeffs, first.sources):
+                    assert v in prev, "%r refers to a node outside of the previous layer" % (first, )
+                    pl.weights[ni, prev[v]] += c
+                pl.bias[ni] = first.scalar
+            pl.lower[ni], pl.upper[ni] = _limit(first)
+            pl.names[ni] = first.name
+
+            act = ns[-1]
+            pl.actLower[ni], pl.actUpper[ni] = _limit(act)
+            pl.actNames[ni] = act.name
+            if len(ns) == 1:
+                pl.modes[ni] = IDENTITY
+            elif isinstance(act, nodes.NodeReLU):
+                assert act.input is first
+                pl.modes[ni] = RELU
+                pl.relaxed[ni] = act.relaxed
+            elif type(act) == nodes.Node:
+                l, u = act.limit
+                pl.modes[ni] = CONST if (l is not None and l == u) else FREE
+            else:
+                assert False, "Unknown node type %r" % (act, )
+
+        prev = {ns[-1]: ni for ni, ns in enumerate(layer)}
+        layers.append(pl)
+
+    return layers
+
+# A ViewNetwork stored as a list of PackedLayer.
+# Nodes are created only when `layers` is first accessed ("materialized"), from then on
+# the nodes are the network and the packed layers are no longer used.
+# `duplicate`, `clip.clipNetwork` and `amend.modify` work on the packed layers
+# as long as the network was not materialized.
+class ArrayNetwork(views.ViewNetwork):
+    def __init__(self, layers):
+        self.packed = layers
+        self._layers = None
+        self.sanity()
+
+    # Creates an ArrayNetwork from a ViewNetwork
+    @staticmethod
+    def fromNetwork(net):
+        layers = [l.duplicate() for l in pack(net)]
+        return ArrayNetwork(layers)
+
+    def materialized(self):
+        return self._layers is not None
+
+    @property
+    def layers(self):
+        if self._layers is None:
+            layers, previous = [], None
+            for l in self.packed:
+                layers.append(l.materialize(previous))
+                previous = [ns[-1] for ns in layers[-1]]
+            self._layers = layers
+            self.packed = None
+        return self._layers
+
+    @layers.setter
+    def layers(self, layers):
+        self._layers = layers
+        self.packed = None
+
+    def sanity(self):
+        if self.materialized(): return super().sanity()
+
+        assert self.packed[0].isInput()
+        for previous, l in zip(self.packed, self.packed[1:]):
+            assert not l.isInput() and l.weights.shape == (l.size(), previous.size())
+
+    def layerCount(self):
+        if self.materialized(): return super().layerCount()
+        return len(self.packed)
+
+    def layerSize(self, layer):
+        if self.materialized(): return super().layerSize(layer)
+        return self.packed[layer].size()
+
+    def duplicate(self, suffix=""):
+        if self.materialized(): return super().duplicate(suffix)
+        return ArrayNetwork([l.duplicate(suffix) for l in self.packed])
@@ -4,17 +4,102 @@
 # ViewNetwork - More strict model with layers and without equations
 #
 
+from redy.framework.nodes import NodeSum
+
+# Translates the connections of `nodes` (see `Node.translate`).
+# Nodes sharing their sources (e.g. a layer) keep sharing them
+def translateNodes(nodes, trans):
+    shared = {}
+    for n in nodes:
+        if isinstance(n, NodeSum):
+            if id(n.sources) not in shared: shared[id(n.sources)] = tuple(map(trans, n.sources))
+            n.sources = shared[id(n.sources)]
+        else:
+            n.translate(trans)
+
+# Asserts every node in `nodes` (a set) is connected only to nodes in `nodes`.
+# Sources shared by several nodes (e.g. a layer) are checked once
+def assertClosed(nodes):
+    checked = set()
+    for node in nodes:
+        if isinstance(node, NodeSum):
+            if id(node.sources) in checked: continue
+            checked.add(id(node.sources))
+            assert nodes.issuperset(node.sources), node
+        else:
+            assert nodes.issuperset(node.connectedTo()), node
+
+# Note: views may share nodes with other views (e.g. queries created by
+# `redundancy.RedundancyTest` share the nodes of unmodified layers with its
+# cached copies of the network, and with each other).
+# Use `duplicate` before changing the nodes of a view in place.
 class ViewIO(object):
     def __init__(self, nodes, inputs, outputs, equations):
         self.nodes = nodes
         self.inputs = inputs
         self.outputs = outputs
         self.equations = equations
+        self.invalidate()
         self.sanity()
     
     def sanity(self):
-        assert all((x in self.nodes) for x in self.inputs+self.outputs)
-        assert all((v in self.nodes) for e in self.equations for c,v in e.terms)
+        nodes = self.nodes if isinstance(self.nodes, (set, frozenset)) else set(self.nodes)
+        assert all((x in nodes) for x in self.inputs+self.outputs)
+        assert all((v in nodes) for e in self.equations for c,v in e.terms)
+
+    # Returns a copy of the view, with new nodes and equations
+    def duplicate(self, suffix=""):
+        nodesTable = { n: n.duplicate() for n in self.nodes }
+        for n in nodesTable.values():
+            if n.name is not None: n.name += suffix
+        trans = lambda n: nodesTable.get(n, n)
+        translateNodes(nodesTable.values(), trans)
+
+        equations = [e.duplicate() for e in self.equations]
+        [e.translate(trans) for e in equations]
+
+        nodes = list(nodesTable.values())
+        if isinstance(self.nodes, (set, frozenset)): nodes = set(nodes)
+        return ViewIO(nodes, [trans(n) for n in self.inputs], [trans(n) for n in self.outputs], equations)
+
+    # Drops the cached adjacency index and order. Call after changing
+    # the nodes (or their connections) of the view
+    def invalidate(self):
+        self._successors = None
+        self._order = None
+
+    # Nodes which `node` is connected to (its inputs)
+    def predecessors(self, node):
+        return node.connectedTo()
+
+    # Nodes of the view which are connected to `node` (its consumers)
+    # The index of all nodes is built once, and cached (see `invalidate`)
+    def successors(self, node):
+        if self._successors is None:
+            successors = {n: [] for n in self.nodes}
+            for n in self.nodes:
+                for v in n.connectedTo():
+                    if v in successors: successors[v].append(n)
+            self._successors = successors
+        return self._successors.get(node, [])
+
+    # Returns the nodes of the view in topological order (every node after
+    # the nodes it is connected to), cached (see `invalidate`)
+    def topologicalOrder(self):
+        if self._order is not None: return self._order
+
+        nodes = list(self.nodes)
+        inView = set(nodes)
+        missing = {n: len(set(v for v in n.connectedTo() if v in inView)) for n in nodes}
+        order = [n for n in nodes if missing[n] == 0]
+        for node in order:
+            for n in set(self.successors(node)):
+                missing[n] -= 1
+                if missing[n] == 0: order.append(n)
+        assert len(order) == len(nodes), "The view has a cycle"
+
+        self._order = order
+        return order
 
 class ViewNetwork(object):
     def __init__(self, layers):
@@ -22,11 +107,7 @@ class ViewNetwork(object):
         self.sanity()
 
     def sanity(self):
-        nodes = set(self.nodes())
-        for l in self.layers:
-            for n in l:
-                for node in n:
-                    assert nodes.issuperset(node.connectedTo())
+        assertClosed(set(self.nodes()))
 
     def layer(self, layerId):
         assert 0 <= layerId < self.layerCount()
@@ -46,8 +127,7 @@ class ViewNetwork(object):
         for n in nodesTable.values():
             if n.name is not None: n.name += suffix
         trans = nodesTable.get
-
-        [n.translate(trans) for n in nodesTable.values()]
+        translateNodes(nodesTable.values(), trans)
         nLayers = [[[trans(n) for n in ns] for ns in l] for l in self.layers]
 
         return ViewNetwork(nLayers)
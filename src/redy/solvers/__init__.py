@@ -0,0 +1,15 @@
+#
+# Solvers for Redy queries (ViewIO)
+# A solver is a callable `solver(view, timeout)` which returns (verdict, counterexample, stats)
+#  - `verdict` - one of the verdicts below
+#  - `counterexample` - for SAT, the input values (in the order of `view.inputs`), otherwise None
+#  - `stats` - dict of solver specific statistics
+# `timeout` is in seconds (None for no timeout)
+#
+
+SAT = "sat"
+UNSAT = "unsat"
+TIMEOUT = "timeout"
+UNKNOWN = "unknown"     # Solver gave up (for incomplete solvers)
+ERROR = "error"
+CANCELLED = "cancelled"
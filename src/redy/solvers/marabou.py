@@ -0,0 +1,24 @@
+#
+# Solving queries using Marabou (maraboupy is loaded on first use)
+#
+
+from redy import solvers
+
+# Solves `view` using Marabou. See `redy.solvers`
+# `options` - optional Marabou options (see `Marabou.createOptions`), overrides `timeout`
+def solve(view, timeout=None, options=None):
+    from maraboupy import Marabou
+    from redy.convert import export_marabou
+
+    mnn = export_marabou.export_marabou(view)
+    if options is None:
+        options = Marabou.createOptions(timeoutInSeconds=int(timeout or 0), verbosity=0)
+    vals, stats = mnn.solve(options=options, verbose=False)
+
+    result = {
+        "totalTime": stats.getTotalTime(),
+        "numSplits": stats.getNumSplits(),
+    }
+    if stats.hasTimedOut(): return solvers.TIMEOUT, None, result
+    if len(vals) == 0: return solvers.UNSAT, None, result
+    return solvers.SAT, [vals[mnn.translate[n]] for n in view.inputs], result
@@ -0,0 +1,108 @@
+#
+# Solving queries as a big-M MILP in-process, using SciPy's HiGHS
+# (SciPy is loaded on first use). A complete solver, suited for small (e.g. clipped) queries.
+#
+
+import time
+
+import numpy as np
+
+from redy import solvers
+from redy.framework import nodes, equations
+from redy.features import bounds
+
+# Encodes `view` as MILP constraints given bounds of its nodes (see `bounds.linearBounds`)
+# Every node is a variable (in the order of `order`), and every unstable ReLU/Abs
+# gets a binary phase variable. Relaxed ReLUs get the triangle relaxation.
+# Returns (A, rowLower, rowUpper, varLower, varUpper, integrality), or None if
+# some unstable activation is not bounded (so it has no big-M encoding)
+def _encode(view, order, nodeBounds):
+    from scipy import sparse
+
+    trans = {n: i for i, n in enumerate(order)}
+    varLower = [nodeBounds[n][0] for n in order]
+    varUpper = [nodeBounds[n][1] for n in order]
+    integrality = [0] * len(order)
+    entries, rowLower, rowUpper = [], [], []
+    def row(coeffs, lower, upper):
+        r = len(rowLower)
+        entries.extend((r, trans[v] if isinstance(v, nodes.Node) else v, c) for v, c in coeffs)
+        rowLower.append(lower)
+        rowUpper.append(upper)
+    def phase():
+        varLower.append(0.)
+        varUpper.append(1.)
+        integrality.append(1)
+        return len(varLower) - 1
+
+    for n in order:
+        if isinstance(n, nodes.NodeSum):
+            row([(v, c) for c, v in n.inputs] + [(n, -1.)], -n.scalar, -n.scalar)
+        elif isinstance(n, (nodes.NodeReLU, nodes.NodeAbs)):
+            x = n.input
+            l, u = nodeBounds[x]
+            relu = isinstance(n, nodes.NodeReLU)
+            if l >= 0:
+                row([(n, 1.), (x, -1.)], 0., 0.)
+                continue
+            if u <= 0:
+                if not relu: row([(n, 1.), (x, 1.)], 0., 0.)
+                continue # An inactive ReLU is bounded to 0
+            if not (np.isfinite(l) and np.isfinite(u)): return None
+
+            row([(n, 1.), (x, -1.)], 0., np.inf)
+            if relu and n.relaxed:
+                # n <= u * (x - l) / (u - l)
+                row([(n, 1.), (x, -u / (u - l))], -np.inf, -u * l / (u - l))
+            elif relu:
+                # n <= x - l * (1 - d), n <= u * d
+                d = phase()
+                row([(n, 1.), (x, -1.), (d, -l)], -np.inf, -l)
+                row([(n, 1.), (d, -u)], -np.inf, 0.)
+            else:
+                # n >= -x, n <= x - 2l * (1 - d), n <= -x + 2u * d
+                d = phase()
+                row([(n, 1.), (x, 1.)], 0., np.inf)
+                row([(n, 1.), (x, -1.), (d, -2 * l)], -np.inf, -2 * l)
+                row([(n, 1.), (x, 1.), (d, -2 * u)], -np.inf, 0.)
+        elif type(n) == nodes.Node:
+            pass
+        else:
+            assert False, "Unknown node type %r" % (n, )
+
+    for e in view.equations:
+        lower = -np.inf if e.comparator == equations.Equation.Comparator.LE else e.scalar
+        upper = np.inf if e.comparator == equations.Equation.Comparator.GE else e.scalar
+        row([(v, c) for c, v in e.terms], lower, upper)
+
+    r, v, c = zip(*entries) if len(entries) > 0 else ((), (), ())
+    A = sparse.csr_matrix((c, (r, v)), shape=(len(rowLower), len(varLower)))
+    return A, np.array(rowLower), np.array(rowUpper), np.array(varLower), np.array(varUpper), np.array(integrality)
+
+# Solves `view` as a MILP. See `redy.solvers`
+# The big-M constants come from `bounds.linearBounds`, so the inputs should be bounded
+# (UNKNOWN is returned if some unstable activation is not bounded)
+def solve(view, timeout=None):
+    from scipy.optimize import milp, LinearConstraint, Bounds
+
+    start = time.time()
+    lb = bounds.linearBounds(view)
+    if not lb.feasible: return solvers.UNSAT, None, {"bounds": True}
+
+    order = view.topologicalOrder()
+    model = _encode(view, order, lb.bounds)
+    if model is None: return solvers.UNKNOWN, None, {"error": "Unbounded activation"}
+    A, rowLower, rowUpper, varLower, varUpper, integrality = model
+
+    options = {}
+    if timeout is not None: options["time_limit"] = max(0., timeout - (time.time() - start))
+    res = milp(np.zeros(A.shape[1]), constraints=LinearConstraint(A, rowLower, rowUpper),
+               bounds=Bounds(varLower, varUpper), integrality=integrality, options=options)
+
+    stats = {"binaries": int(integrality.sum()), "nodes": res.get("mip_node_count")}
+    if res.status == 0:
+        trans = {n: i for i, n in enumerate(order)}
+        return solvers.SAT, [float(res.x[trans[n]]) for n in view.inputs], stats
+    if res.status == 2: return solvers.UNSAT, None, stats
+    if res.status == 1: return solvers.TIMEOUT, None, stats
+    return solvers.ERROR, None, dict(stats, error=res.message)
@@ -0,0 +1,31 @@
+#
+# Combining solvers - trying several solvers on the same query
+#
+
+import time
+
+from redy import solvers
+
+# A solver (see `redy.solvers`) which runs the solvers of `chain` one after the other, each with the
+# time left, until one of them returns SAT or UNSAT.
+# e.g. Portfolio(sampling.solve, milp.solve, marabou.solve) - a cheap incomplete pass,
+# then the in-process MILP (for small queries), then Marabou
+# `budgets` - optional list of the maximal seconds of every solver (None for the time left)
+class Portfolio(object):
+    def __init__(self, *chain, budgets=None):
+        assert len(chain) > 0, "No solvers"
+        self.solvers = chain
+        self.budgets = budgets or [None] * len(chain)
+        assert len(self.budgets) == len(self.solvers)
+
+    def __call__(self, view, timeout=None):
+        start = time.time()
+        verdict, counterexample, stats = solvers.UNKNOWN, None, {}
+        for i, (solver, budget) in enumerate(zip(self.solvers, self.budgets)):
+            left = None if timeout is None else timeout - (time.time() - start)
+            if left is not None and left <= 0: return solvers.TIMEOUT, None, dict(stats, solver=i)
+            if budget is not None: left = budget if left is None else min(left, budget)
+
+            verdict, counterexample, stats = solver(view, left)
+            if verdict in [solvers.SAT, solvers.UNSAT]: break
+        return verdict, counterexample, dict(stats, solver=i)
@@ -0,0 +1,31 @@
+#
+# Incomplete solver which looks for a satisfying input by sampling the input box.
+# Never returns UNSAT. Useful as a stand-in when Marabou is not available,
+# or as a cheap first pass.
+#
+
+import time
+
+from redy import solvers
+from redy.convert import export_evaluate
+from redy.features import screen
+
+# Solves `view` by sampling. See `redy.solvers`
+# `samples` - number of inputs to sample in every round
+# `rounds` - maximal number of rounds (if `timeout` is not reached first)
+def solve(view, timeout=None, samples=10000, rounds=1, seed=None):
+    start = time.time()
+    ev = export_evaluate.export_evaluate(view)
+
+    box = [n.limit for n in view.inputs]
+    assert all((l is not None and u is not None) for l, u in box), "Input is not bounded"
+
+    for i in range(rounds):
+        inputs = screen.sampleBox(box, samples, None if seed is None else seed + i)
+        valid = ev.batchValidate(ev.batchEvaluate(inputs)).valid
+        if valid.any():
+            return solvers.SAT, inputs[valid.argmax()].tolist(), {"samples": (i+1)*samples}
+        if timeout is not None and time.time() - start > timeout:
+            return solvers.TIMEOUT, None, {"samples": (i+1)*samples}
+
+    return solvers.UNKNOWN, None, {"samples": rounds*samples}
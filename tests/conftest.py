@@ -0,0 +1,8 @@
+#
+# Tests run against the sources in `src` (as the examples do)
+#
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,66 @@
+import functools
+
+import numpy as np
+
+from redy import solvers
+from redy.convert import import_nnet
+from redy.features import redundancy, dispatch, bank, bounds, clip
+from redy.solvers import sampling
+from benchmark_pipeline import random_nnet
+
+def _net(seed=0):
+    net = import_nnet.import_nnet(random_nnet(2, 6, seed=seed))
+    bounds.symbolicBounds(net)
+    return net
+
+def _checks(rt, rng=clip.Range()):
+    return [((2, n, f), rt.getStateCheck((2, n, f), rng)) for n in range(6) for f in ["inactive", "active"]]
+
+def test_witness_and_discharge():
+    net = _net()
+    b = bank.CounterexampleBank(net)
+    queries = dict(_checks(redundancy.RedundancyTest(net, 1e-4)))
+    b.add(np.random.default_rng(0).uniform(-1, 1, (200, 5)))
+    remaining, witnesses = b.discharge(queries)
+    assert len(witnesses) > 0 and len(remaining) + len(witnesses) == len(queries)
+    for key, x in witnesses.items():
+        assert sampling.solve(queries[key])[0] == solvers.SAT
+        assert b.witness(queries[key], [x]) == x
+
+def test_other_sizes_are_skipped():
+    net = _net()
+    b = bank.CounterexampleBank(net)
+    assert b.add([[0.] * 3]) == 0 and len(b) == 0
+    b.add([[0.] * 5])
+    rt = redundancy.RedundancyTest(net, 1e-4)
+    view = rt.getStateCheck((2, 0, "active"), clip.Range(firstLayer=1, firstMode=1))
+    assert len(view.inputs) != 5
+    assert b.witness(view) is None
+    assert not b.record(solvers.SAT, [0.] * len(view.inputs))
+
+def test_dispatcher_with_clipped_queries():
+    net = _net()
+    rt = redundancy.RedundancyTest(net, 1e-4)
+    queries = _checks(rt) + [((n, "clipped"), v) for n, v in _checks(rt, clip.Range(firstLayer=1, firstMode=1))]
+    solver = functools.partial(sampling.solve, samples=500, seed=0)
+    d = dispatch.Dispatcher(solver, workers=2, timeout=20, bank=bank.CounterexampleBank(net))
+    records = list(d.dispatch(iter(queries)))
+    assert len(records) == len(queries)
+    assert all(r.verdict in [solvers.SAT, solvers.UNKNOWN] for r in records)
+
+def test_shared_file(tmp_path):
+    net, other = _net(0), _net(1)
+    path = str(tmp_path / "bank.jsonl")
+    b1, b2 = bank.CounterexampleBank(net, path=path), bank.CounterexampleBank(net, path=path)
+    b3 = bank.CounterexampleBank(other, path=path)
+    b1.add([[0.1] * 5, [0.2] * 5])
+    b2.add([[0.3] * 5])
+    b3.add([[0.4] * 5])
+    b1.add([[0.1] * 5])
+    assert sorted(bank.CounterexampleBank(net, path=path).inputs[:, 0].tolist()) == [0.1, 0.2, 0.3]
+    assert bank.CounterexampleBank(other, path=path).inputs.tolist() == [[0.4] * 5]
+    assert len(bank.CounterexampleBank(net, "01", path=path)) == 0
+
+    # A partially written line is skipped
+    with open(path, "a") as fp: fp.write('["1_')
+    assert len(bank.CounterexampleBank(net, path=path)) == 3
@@ -0,0 +1,22 @@
+from redy.convert import import_nnet
+from benchmark_pipeline import random_nnet, measure, benchmark
+
+def test_random_nnet():
+    net = import_nnet.import_nnet(random_nnet(3, 7, inputs=4, outputs=2, seed=5))
+    assert [net.layerSize(l) for l in range(net.layerCount())] == [4, 7, 7, 7, 2]
+    assert random_nnet(3, 7, seed=5) == random_nnet(3, 7, seed=5) != random_nnet(3, 7, seed=6)
+
+def test_measure_setup_is_not_shared():
+    inputs = []
+    def f(x):
+        assert len(x) == 0
+        x.append(1)
+        inputs.append(x)
+    measure(f, lambda: [])
+    assert len(inputs) == 2 and inputs[0] is not inputs[1]
+
+def test_benchmark():
+    results = benchmark(2, 6, repeat=1, samples=10)
+    for stage in ["import", "duplicate", "clip", "modify", "join", "query", "export_ipq", "export_evaluate", "forward_evaluate", "batch_evaluate"]:
+        assert results[stage + "_seconds"] > 0 and results[stage + "_peak_bytes"] > 0
+    assert results["neurons"] == 5 + 12 + 5
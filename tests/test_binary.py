@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet, export_batch, export_evaluate, binary
+from redy.features import redundancy, clip, amend, screen
+from redy.framework import canonical, nodes, views, equations, packed
+from benchmark_pipeline import random_nnet
+
+NEURONS = [(2, 1, "inactive"), (3, 0, "active")]
+
+def _net():
+    return import_nnet.import_nnet(random_nnet(4, 6))
+
+def _names(obj):
+    ns = obj.nodes() if isinstance(obj, views.ViewNetwork) else obj.nodes
+    return sorted(str(n.name) for n in ns)
+
+def _roundTrip(obj, path):
+    binary.export_binary(obj, str(path))
+    return binary.import_binary(str(path))
+
+def test_network_round_trip(tmp_path):
+    net = _net()
+    x = screen.sampleBox(screen.inputBox(net), 100, 0)
+    networks = [
+        net,
+        clip.clipNetwork(_net(), clip.Range(firstLayer=1, firstMode=1, lastLayer=3, lastMode=1)),
+        amend.modify(_net(), {(1, 0): "active", (2, 1): "inactive", (2, 2): "nofunc"}),
+    ]
+    for i, original in enumerate(networks):
+        loaded = _roundTrip(original, tmp_path / ("%d.bin" % i))
+        assert isinstance(loaded, packed.ArrayNetwork) and not loaded.materialized()
+
+        # Arrays are read-only maps of the file
+        weights = loaded.packed[1].weights
+        assert isinstance(weights, np.memmap) and not weights.flags.writeable
+        if i == 0:
+            assert np.array_equal(export_batch.export_batch(loaded).forwardEvaluate(x), export_batch.export_batch(net).forwardEvaluate(x))
+
+        assert canonical.fingerprintNetwork(loaded) == canonical.fingerprintNetwork(original)
+        assert loaded.materialized() and _names(loaded) == _names(original)
+
+def test_view_round_trip(tmp_path):
+    rt = redundancy.RedundancyTest(_net(), 1e-4)
+    queries = [
+        rt.getComparedExact(NEURONS, "gt", 0),
+        rt.getJoined(NEURONS),
+        rt.getStateCheck((3, 2, "active")),
+        rt.getComparedExact(NEURONS, "lt", 1, clip.Range(firstLayer=1, firstMode=1)),
+    ]
+    for i, view in enumerate(queries):
+        loaded = _roundTrip(view, tmp_path / ("%d.bin" % i))
+        assert canonical.fingerprint(loaded) == canonical.fingerprint(view)
+        assert _names(loaded) == _names(view)
+        assert len(loaded.inputs) == len(view.inputs) and len(loaded.equations) == len(view.equations)
+        assert not set(loaded.nodes) & set(view.nodes)
+
+        # Layers of sums still share their sources
+        sums = [n for n in loaded.nodes if isinstance(n, nodes.NodeSum)]
+        shared = lambda v: len(set(id(n.sources) for n in v.nodes if isinstance(n, nodes.NodeSum)))
+        assert shared(loaded) == shared(view) < len(sums)
+
+        x = screen.sampleBox([(-1., 1.)] * len(view.inputs), 100, 0)
+        results = []
+        for v in [view, loaded]:
+            ev = export_evaluate.export_evaluate(v)
+            values = ev.batchEvaluate(x)
+            results.append((values[:, ev.outputVars], ev.batchValidate(values).valid))
+        assert np.array_equal(results[0][0], results[1][0], equal_nan=True)
+        assert np.array_equal(results[0][1], results[1][1])
+
+def test_view_nodes(tmp_path):
+    x = nodes.Node()
+    x.limit, x.name = (-1., None), "x"
+    s = nodes.NodeSum()
+    s.inputs, s.scalar = [(2., x)], 0.5
+    r, a = nodes.NodeReLU(), nodes.NodeAbs()
+    r.input, r.relaxed, a.input = s, True, s
+    e = equations.Equation([(1., r), (-1., a)], equations.Equation.Comparator.LE, 0.25)
+    view = views.ViewIO({x, s, r, a}, [x], [r, a], [e])
+
+    loaded = _roundTrip(view, tmp_path / "v.bin")
+    assert isinstance(loaded.nodes, set)
+    lx, la = loaded.inputs[0], loaded.outputs[1]
+    lr = loaded.outputs[0]
+    assert lx.limit == (-1., None) and lx.name == "x"
+    assert isinstance(lr, nodes.NodeReLU) and lr.relaxed and isinstance(la, nodes.NodeAbs)
+    assert lr.input is la.input and lr.input.inputs == ((2., lx), ) and lr.input.scalar == 0.5
+    le = loaded.equations[0]
+    assert le.terms == [(1., lr), (-1., la)] and le.comparator == e.comparator and le.scalar == 0.25
+
+def test_not_binary(tmp_path):
+    path = tmp_path / "net.nnet"
+    path.write_text(random_nnet(2, 3))
+    with pytest.raises(AssertionError, match="Not a Redy binary"):
+        binary.import_binary(str(path))
@@ -0,0 +1,77 @@
+import numpy as np
+
+from redy.convert import import_nnet
+from redy.features import bounds, amend, clip, screen
+from redy.framework import packed
+from benchmark_pipeline import random_nnet
+
+def _net(seed=0):
+    return import_nnet.import_nnet(random_nnet(3, 8, seed=seed))
+
+def _modified(seed=0):
+    return amend.modify(_net(seed), {(1, 0): "active", (2, 1): "inactive", (2, 2): "nofunc"})
+
+# Per layer (pre, post) activations of `count` sampled inputs (see `screen.observe`)
+def _sampled(net, count=5000, box=None):
+    from redy.convert import export_batch
+    x = screen.sampleBox(box or screen.inputBox(net), count, 0)
+    _, layers = export_batch.export_batch(net).forwardEvaluate(x, returnLayers=True)
+    return layers
+
+# Values of nofunc neurons (and of what depends on them) are free, and evaluate to NaN
+def _within(values, lower, upper):
+    return (np.isnan(values) | ((values >= lower - 1e-9) & (values <= upper + 1e-9))).all()
+
+def _contains(result, sampled):
+    for (lower, upper, actLower, actUpper), (pre, post) in zip(result, sampled):
+        assert _within(pre, lower, upper) and _within(post, actLower, actUpper)
+
+def test_intervals_contain_samples():
+    for net in [_net(), _modified(), clip.clipNetwork(_net(), clip.Range(lastLayer=3, lastMode=1))]:
+        _contains(bounds.intervals(packed.pack(net)), _sampled(net))
+
+def test_intervals_box():
+    net = _net()
+    box = [(0., 0.5)] * 5
+    result = bounds.intervals(packed.pack(net), box)
+    assert (result[0][0] == 0.).all() and (result[0][1] == 0.5).all()
+    _contains(result, _sampled(net, box=box))
+
+def test_interval_bounds_update():
+    net = _net()
+    stable = bounds.intervalBounds(net)
+    sampled = _sampled(net)
+    for l, n in stable.active: assert (sampled[l][0][:, n] >= 0).all()
+    for l, n in stable.inactive: assert (sampled[l][0][:, n] <= 0).all()
+    for l, layer in enumerate(net.layers[1:], 1):
+        for n, ns in enumerate(layer):
+            lower, upper = ns[0].limit
+            assert lower <= sampled[l][0][:, n].min() + 1e-9 and upper >= sampled[l][0][:, n].max() - 1e-9
+
+    # Tightening again does not loosen the limits
+    limits = [ns[0].limit for layer in net.layers for ns in layer]
+    bounds.intervalBounds(net)
+    assert limits == [ns[0].limit for layer in net.layers for ns in layer]
+
+def test_symbolic_contains_samples():
+    for net in [_net(1), _modified(1)]:
+        _contains(bounds.symbolic(packed.pack(net)), _sampled(net))
+
+def test_symbolic_tighter_than_intervals():
+    layers = packed.pack(_net(2))
+    for (l1, u1, _, _), (l2, u2, _, _) in zip(bounds.intervals(layers), bounds.symbolic(layers)):
+        assert (l2 >= l1 - 1e-9).all() and (u2 <= u1 + 1e-9).all()
+    last = zip(bounds.intervals(layers)[-1][:2], bounds.symbolic(layers)[-1][:2])
+    assert any((np.abs(a - b) > 1e-6).any() for a, b in last)
+
+def test_symbolic_clipped():
+    # Layers 1-3 of the network, starting from the ReLUs of layer 1 (bounded by `symbolicBounds`)
+    net = _net(3)
+    bounds.symbolicBounds(net)
+    clipped = clip.clipNetwork(net.duplicate(), clip.Range(firstLayer=1, firstMode=1, lastLayer=3, lastMode=0))
+    stable = bounds.symbolicBounds(clipped)
+    sampled = _sampled(net)
+    sampled = [(sampled[1][1], sampled[1][1])] + sampled[2:3] + [(sampled[3][0], sampled[3][0])]
+    _contains(bounds.symbolic(packed.pack(clipped)), sampled)
+    for l, n in stable.active: assert (sampled[l][0][:, n] >= 0).all()
+    for l, n in stable.inactive: assert (sampled[l][0][:, n] <= 0).all()
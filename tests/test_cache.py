@@ -0,0 +1,59 @@
+import os
+import time
+
+from redy import solvers
+from redy.convert import import_nnet
+from redy.features import redundancy, cache, dispatch
+from benchmark_pipeline import random_nnet
+
+def _test():
+    return redundancy.RedundancyTest(import_nnet.import_nnet(random_nnet(2, 6)), 1e-4)
+
+def _solve(view, timeout):
+    return solvers.SAT, [0.] * len(view.inputs), {"solved": True}
+
+def test_put_get(tmp_path):
+    rt = _test()
+    c = cache.QueryCache(str(tmp_path))
+    view = rt.getStateCheck((1, 0, "active"))
+    assert c.get(view) is None
+    assert c.put(view, solvers.SAT, [1, 2, 3, 4, 5], {"n": 1})
+    # Equal queries (built again, with other nodes) share the entry
+    assert c.get(rt.getStateCheck((1, 0, "active"))) == (solvers.SAT, [1., 2., 3., 4., 5.], {"n": 1})
+    assert c.get(rt.getStateCheck((1, 0, "inactive"))) is None
+    assert cache.QueryCache(str(tmp_path)).get(view)[0] == solvers.SAT
+
+def test_only_definite_results(tmp_path):
+    c = cache.QueryCache(str(tmp_path))
+    view = _test().getStateCheck((1, 0, "active"))
+    for verdict in [solvers.TIMEOUT, solvers.UNKNOWN, solvers.ERROR, solvers.CANCELLED]:
+        assert not c.put(view, verdict, None, {})
+    assert c.get(view) is None
+
+def test_eviction(tmp_path):
+    rt = _test()
+    views = [rt.getStateCheck((1, n, "active")) for n in range(6)]
+    c = cache.QueryCache(str(tmp_path), maxBytes=10 ** 9)
+    for i, view in enumerate(views):
+        c.put(view, solvers.UNSAT, None, {})
+        f = c._file(c.key(view))
+        os.utime(f, (time.time() - 100 + i, time.time() - 100 + i))
+    c.maxBytes = sum(os.path.getsize(c._file(c.key(v))) for v in views[3:])
+    c.evict()
+    assert [c.get(v) is not None for v in views] == [False] * 3 + [True] * 3
+
+    # Entries older than maxAge (by their files) are not returned, and are evicted
+    c.maxAge = 96.5
+    assert [c.get(v) is not None for v in views] == [False] * 4 + [True] * 2
+    c.evict()
+    c.maxAge = None
+    assert [c.get(v) is not None for v in views] == [False] * 4 + [True] * 2
+
+def test_dispatcher(tmp_path):
+    rt = _test()
+    queries = [(n, rt.getStateCheck((1, n, "active"))) for n in range(3)]
+    c = cache.QueryCache(str(tmp_path))
+    first = list(dispatch.Dispatcher(_solve, workers=2, cache=c).dispatch(queries))
+    assert all(r.stats.get("solved") and not r.stats.get("cached") for r in first)
+    second = list(dispatch.Dispatcher(_solve, workers=2, cache=c).dispatch(queries))
+    assert all(r.stats.get("cached") and r.verdict == solvers.SAT for r in second)
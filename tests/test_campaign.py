@@ -0,0 +1,72 @@
+import json
+import pytest
+
+from redy import solvers
+from redy.convert import import_nnet
+from redy.features import campaign, dispatch, amend
+from redy.framework import canonical
+from redy.solvers import sampling
+from benchmark_pipeline import random_nnet
+
+# Stand-in for a complete solver - UNSAT when sampling finds nothing
+def _solve(view, timeout):
+    verdict, counterexample, stats = sampling.solve(view, timeout, samples=2000, seed=0)
+    return (solvers.UNSAT if verdict == solvers.UNKNOWN else verdict), counterexample, stats
+
+# Neurons (2, 0) and (3, 2) of this network are found redundant
+def _net():
+    return import_nnet.import_nnet(random_nnet(3, 6, seed=1))
+
+def _campaign(path, net=None, epsilon=1e-4, **kwargs):
+    return campaign.Campaign(net or _net(), epsilon, str(path), dispatch.Dispatcher(_solve, workers=2), **kwargs)
+
+def test_run(tmp_path):
+    c = _campaign(tmp_path / "c.json")
+    modified = c.run()
+    assert len(modified) > 0 and c.remaining() == []
+    assert set(c.results) == set(c.candidates)
+    for candidate, r in c.results.items():
+        assert r["function"] == modified.get(candidate)
+        if r["function"] is not None:
+            assert all(v == solvers.UNSAT for v in r["verdicts"][r["function"]])
+
+    # The working network is the original with the modified neurons
+    expected = amend.modify(_net(), dict(modified))
+    assert canonical.fingerprintNetwork(c.network) == canonical.fingerprintNetwork(expected)
+    assert canonical.fingerprintNetwork(c.original) == canonical.fingerprintNetwork(_net())
+
+def test_resume(tmp_path):
+    full = _campaign(tmp_path / "full.json")
+    full.run()
+
+    path = tmp_path / "part.json"
+    part = _campaign(path)
+    part.run(limit=8)
+    assert len(part.results) == 8 and len(part.modified) == 1
+
+    resumed = _campaign(path)
+    assert resumed.modified == part.modified and set(resumed.results) == set(part.results)
+    assert resumed.remaining() == full.candidates[8:]
+    resumed.run()
+    assert resumed.modified == full.modified and len(full.modified) == 2
+    assert canonical.fingerprintNetwork(resumed.network) == canonical.fingerprintNetwork(full.network)
+
+def test_checkpoint(tmp_path):
+    path = tmp_path / "c.json"
+    _campaign(path).run(limit=2)
+    state = json.load(open(path))
+    assert state["version"] == campaign.CHECKPOINT_VERSION and len(state["results"]) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["c.json"]
+
+    with pytest.raises(AssertionError, match="another network"):
+        _campaign(path, import_nnet.import_nnet(random_nnet(3, 6, seed=2)))
+    with pytest.raises(AssertionError, match="epsilon"):
+        _campaign(path, epsilon=1e-3)
+
+def test_exact_check(tmp_path):
+    c = _campaign(tmp_path / "c.json", check=campaign.exactCheck([0, 1]), candidates=[(1, 0), (2, 3)])
+    c.run()
+    for r in c.results.values():
+        # Queries stop at the first one which is not UNSAT
+        for verdicts in r["verdicts"].values():
+            assert 0 < len(verdicts) <= 4 and all(v == solvers.UNSAT for v in verdicts[:-1])
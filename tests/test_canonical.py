@@ -0,0 +1,51 @@
+from redy.framework import nodes, views, canonical
+
+def _sum(terms, scalar=0., name=None):
+    n = nodes.NodeSum()
+    n.inputs = terms
+    n.scalar = scalar
+    n.name = name
+    return n
+
+def _input(name=None):
+    n = nodes.Node()
+    n.limit = (-1., 1.)
+    n.name = name
+    return n
+
+# A view with an output sum, and two sums which are not reachable from the outputs
+def _view(first, second, order=1, prefix=""):
+    a, b = _input(prefix + "a"), _input(prefix + "b")
+    out = _sum([(1., a), (1., b)], name=prefix + "out")
+    s1 = _sum([(first[0], a), (first[1], b)], name=prefix + "s1")
+    s2 = _sum([(second[0], a), (second[1], b)], name=prefix + "s2")
+    return views.ViewIO([a, b, out, s1, s2][::order], [a, b], [out], [])
+
+def test_fingerprint_ignores_names():
+    assert canonical.fingerprint(_view((1., 2.), (3., 4.))) == canonical.fingerprint(_view((1., 2.), (3., 4.), prefix="x_"))
+
+def test_fingerprint_sensitive_to_coefficient_swap():
+    a, b = _input(), _input()
+    out1 = _sum([(1., a), (2., b)])
+    out2 = _sum([(2., a), (1., b)])
+    v1 = views.ViewIO([a, b, out1], [a, b], [out1], [])
+    v2 = views.ViewIO([a, b, out2], [a, b], [out2], [])
+    assert canonical.fingerprint(v1) != canonical.fingerprint(v2)
+
+def test_merkle_distinguishes_permuted_coefficients():
+    a, b = _input(), _input()
+    s1 = _sum([(1., a), (2., b)])
+    s2 = _sum([(2., a), (1., b)])
+    hashes = canonical._merkle([s1, s2], {a: 0, b: 1})
+    assert hashes[s1] != hashes[s2]
+
+def test_unreachable_nodes_do_not_depend_on_node_order():
+    # Unreachable sums with permuted coefficients, listed in both orders
+    v1 = _view((1., 2.), (2., 1.), order=1)
+    v2 = _view((1., 2.), (2., 1.), order=-1)
+    assert canonical.serialize(v1) == canonical.serialize(v2)
+
+def test_dedup():
+    vs = [_view((1., 2.), (3., 4.)), _view((1., 2.), (3., 5.)), _view((1., 2.), (3., 4.), prefix="y")]
+    unique, index = canonical.dedup(vs)
+    assert len(unique) == 2 and index == [0, 1, 0]
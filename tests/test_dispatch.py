@@ -0,0 +1,64 @@
+import os
+import time
+
+from redy import solvers
+from redy.features import dispatch
+
+# Solvers get a number as the "view"
+def _echo(view, timeout):
+    return solvers.SAT if view % 2 == 0 else solvers.UNSAT, [view] if view % 2 == 0 else None, {"view": view}
+
+def _sleep(view, timeout):
+    time.sleep(view)
+    return solvers.UNSAT, None, {}
+
+def _raise(view, timeout):
+    raise ValueError("bad query")
+
+def _die(view, timeout):
+    os._exit(3)
+
+def test_dispatch():
+    records = list(dispatch.Dispatcher(_echo, workers=3).dispatch((("q%d" % i, i) for i in range(10))))
+    assert sorted(r.neuron for r in records) == sorted("q%d" % i for i in range(10))
+    for r in records:
+        i = int(r.neuron[1:])
+        assert r.verdict == (solvers.SAT if i % 2 == 0 else solvers.UNSAT) and r.stats["view"] == i and "time" in r.stats
+
+def test_timeout():
+    d = dispatch.Dispatcher(_sleep, workers=2, timeout=0.2, grace=0.1)
+    start = time.time()
+    records = {r.neuron: r for r in d.dispatch([("slow", 30), ("fast", 0)])}
+    assert time.time() - start < 5
+    assert records["slow"].verdict == solvers.TIMEOUT and records["fast"].verdict == solvers.UNSAT
+
+def test_timeout_per_query():
+    d = dispatch.Dispatcher(_sleep, workers=2, grace=0.1)
+    d.submit("slow", 30, timeout=0.2)
+    assert d.next().verdict == solvers.TIMEOUT and d.next() is None
+
+def test_errors():
+    assert dispatch.Dispatcher(_raise, workers=1).dispatch([("q", 0)]).__next__().verdict == solvers.ERROR
+    record = next(dispatch.Dispatcher(_die, workers=1).dispatch([("q", 0)]))
+    assert record.verdict == solvers.ERROR and record.stats["exitcode"] == 3
+
+def test_cancel():
+    d = dispatch.Dispatcher(_sleep, workers=1)
+    for i in range(3): d.submit(i, 30)
+    d._start()
+    assert d.cancel(0) and d.cancel(2) and not d.cancel(5)
+    d.cancelAll()
+    records = []
+    while True:
+        r = d.next()
+        if r is None: break
+        records.append(r)
+    assert sorted(r.neuron for r in records) == [0, 1, 2] and all(r.verdict == solvers.CANCELLED for r in records)
+    assert d.pending() == 0
+
+def test_closing_cancels():
+    d = dispatch.Dispatcher(_sleep, workers=2)
+    results = d.dispatch([(0, 0), (1, 30), (2, 30)])
+    assert next(results).neuron == 0
+    results.close()
+    assert len(d.running) == 0 and len(d.queue) == 0
@@ -0,0 +1,47 @@
+import numpy as np
+
+from redy.convert import import_nnet, export_batch, export_evaluate
+from redy.features import amend
+from benchmark_pipeline import random_nnet
+
+def _net():
+    return import_nnet.import_nnet(random_nnet(3, 6))
+
+def _reference(net, x):
+    view = net.toViewIO()
+    ev = export_evaluate.export_evaluate(view)
+    result = []
+    for row in x:
+        d = ev.forwardEvaluate(list(row), validate=False)
+        result.append([d.get(ev.translate[n], np.nan) for n in view.outputs])
+    return np.array(result)
+
+def test_matches_evaluator():
+    net = _net()
+    x = np.random.default_rng(0).uniform(-1, 1, (30, 5))
+    assert np.allclose(export_batch.export_batch(net).forwardEvaluate(x), _reference(net, x))
+
+def test_modified():
+    net = amend.modify(_net(), {(1, 0): "active", (2, 3): "inactive"})
+    x = np.random.default_rng(1).uniform(-1, 1, (30, 5))
+    out, layers = export_batch.export_batch(net).forwardEvaluate(x, returnLayers=True)
+    assert np.allclose(out, _reference(net, x))
+    assert (layers[2][1][:, 3] == 0).all()
+    assert np.allclose(layers[1][1][:, 0], layers[1][0][:, 0])
+
+def test_nofunc_is_undetermined():
+    net = amend.modify(_net(), {(2, 3): "nofunc"})
+    out, layers = export_batch.export_batch(net).forwardEvaluate(np.zeros((4, 5)), returnLayers=True)
+    assert np.isnan(layers[2][1][:, 3]).all() and not np.isnan(layers[2][1][:, :3]).any()
+
+def test_single_input():
+    ev = export_batch.export_batch(_net())
+    x = np.random.default_rng(2).uniform(-1, 1, (3, 5))
+    assert np.allclose(ev.forwardEvaluate(x[1]), ev.forwardEvaluate(x)[1])
+
+def test_in_limits():
+    net = _net()
+    ev = export_batch.export_batch(net)
+    x = np.random.default_rng(3).uniform(-2, 2, (200, 5))
+    _, layers = ev.forwardEvaluate(x, returnLayers=True)
+    assert (ev.inLimits(layers) == (np.abs(x) <= 1).all(axis=1)).all()
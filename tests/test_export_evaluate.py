@@ -0,0 +1,125 @@
+import random
+
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet, import_ipq, export_evaluate, export_batch
+from redy.framework import nodes, views
+from redy.features import redundancy, amend
+from benchmark_pipeline import random_nnet
+
+def _net():
+    return import_nnet.import_nnet(random_nnet(3, 6))
+
+def _outputs(ev, view, d):
+    return [d[ev.translate[n]] for n in view.outputs]
+
+def test_forward_evaluate():
+    net = _net()
+    view = net.toViewIO()
+    ev = export_evaluate.export_evaluate(view)
+    x = np.random.default_rng(0).uniform(-1, 1, (20, 5))
+    expected = export_batch.export_batch(net).forwardEvaluate(x)
+    for row, out in zip(x, expected):
+        assert np.allclose(_outputs(ev, view, ev.forwardEvaluate(list(row))), out)
+
+def test_schedule_does_not_depend_on_order():
+    view = redundancy.RedundancyTest(_net(), 1e-4).getJoined([(2, 1, "active"), (3, 0, "inactive")])
+    ev = export_evaluate.export_evaluate(view)
+    shuffled = export_evaluate.export_evaluate(view)
+    random.Random(0).shuffle(shuffled.equList)
+    random.Random(1).shuffle(shuffled.constraints)
+    shuffled.compile()
+    for row in np.random.default_rng(1).uniform(-1, 1, (10, len(view.inputs))):
+        assert ev.forwardEvaluate(list(row)) == shuffled.forwardEvaluate(list(row))
+
+def test_validation():
+    view = redundancy.RedundancyTest(_net(), 1e-4).getComparedExact([(2, 1, "inactive")], "gt", 0)
+    ev = export_evaluate.export_evaluate(view)
+    results = [ev.forwardEvaluate(list(row), returnValidation=True)[0]
+        for row in np.random.default_rng(2).uniform(-1, 1, (200, len(view.inputs)))]
+    # The modified and original networks differ for some inputs (which satisfy the query), not for all
+    assert any(results) and not all(results)
+
+def test_undetermined():
+    net = amend.modify(_net(), {(2, 3): "nofunc"})
+    view = net.toViewIO()
+    ev = export_evaluate.export_evaluate(view)
+    free = net.layers[2][3][-1]
+    assert free in ev.undeterminedNodes()
+    assert all(n in ev.undeterminedNodes() for n in view.outputs)
+    valid, d = ev.forwardEvaluate([0.] * 5, returnValidation=True)
+    assert not valid and ev.translate[free] not in d
+
+def test_batch_matches_single():
+    view = redundancy.RedundancyTest(_net(), 1e-4).getJoined([(2, 1, "active"), (3, 0, "inactive")])
+    ev = export_evaluate.export_evaluate(view)
+    x = np.random.default_rng(3).uniform(-1, 1, (50, len(view.inputs)))
+    batch = ev.batchEvaluate(x)
+    for row, assignment in zip(x, batch):
+        d = ev.forwardEvaluate(list(row))
+        assert np.allclose([d[v] for v in range(ev.numVars)], assignment)
+    assert ev.batchValidate(batch).valid.all()
+
+def test_batch_validate_masks():
+    view = redundancy.RedundancyTest(_net(), 1e-4).getComparedExact([(2, 1, "inactive")], "gt", 0)
+    ev = export_evaluate.export_evaluate(view)
+    x = np.random.default_rng(4).uniform(-1, 1, (200, len(view.inputs)))
+    result = ev.batchValidate(ev.batchEvaluate(x))
+    expected = [ev.forwardEvaluate(list(row), returnValidation=True)[0] for row in x]
+    assert (result.valid == expected).all()
+    assert (result.equations.any(axis=1) == ~result.valid).all()
+    assert (result.worst[result.valid] <= export_evaluate.EPSILON).all() and (result.worst[~result.valid] > 0).all()
+
+def test_batch_violations():
+    ev = export_evaluate.export_evaluate(_net().toViewIO())
+    x = ev.batchEvaluate(np.random.default_rng(5).uniform(-1, 1, (4, 5)))
+    x[0, ev.inputVars[0]] = 2.
+    relu = ev.constraints[0]
+    x[1, relu[2]] = x[1, relu[1]] - 1.
+    x[2, ev.outputVars[0]] = np.nan
+    result = ev.batchValidate(x)
+    assert result.upperBounds[0].any() and result.constraints[1, 0] and result.undetermined[2]
+    assert result.valid.tolist() == [False, False, False, True]
+    assert result.worst[2] == np.inf
+
+def test_abs():
+    a, b = nodes.Node(), nodes.Node()
+    a.limit = b.limit = (-1., 1.)
+    s = nodes.NodeSum()
+    s.inputs, s.scalar = [(1., a), (-2., b)], 0.5
+    absolute, relu = nodes.NodeAbs(), nodes.NodeReLU()
+    absolute.input = relu.input = s
+    out = nodes.NodeSum()
+    out.inputs = [(1., absolute), (1., relu)]
+    view = views.ViewIO({a, b, s, absolute, relu, out}, [a, b], [out], [])
+    ev = export_evaluate.export_evaluate(view)
+    assert sorted(t for t, vb, vf in ev.constraints) == ["absoluteValue", "relu"]
+
+    x = np.random.default_rng(6).uniform(-1, 1, (50, 2))
+    pre = 0.5 + x[:, 0] - 2 * x[:, 1]
+    expected = np.abs(pre) + np.maximum(pre, 0)
+    assert np.allclose([ev.forwardEvaluate(list(row))[ev.translate[out]] for row in x], expected)
+    batch = ev.batchEvaluate(x)
+    assert np.allclose(batch[:, ev.translate[out]], expected) and ev.batchValidate(batch).valid.all()
+
+def test_query_abs_max():
+    from test_import_ipq import QUERY
+    ev = export_evaluate.query_evaluate(import_ipq.Query(QUERY))
+    assert ev.undetermined == []
+    x = np.random.default_rng(7).uniform(-1, 1, (100, 2))
+    expected = np.max([np.abs(x[:, 0] - x[:, 1]), np.maximum(x[:, 0] + x[:, 1] - 0.5, 0), x[:, 0]], axis=0)
+    batch = ev.batchEvaluate(x)
+    assert np.allclose(batch[:, 6], expected) and ev.batchValidate(batch).valid.all()
+    for row, value in zip(x[:10], expected):
+        assert np.isclose(ev.forwardEvaluate(list(row))[6], value)
+
+    # Increasing the max's input breaks both the abs and the max
+    batch[0, 3] += 10
+    batch[1, 6] += 0.1
+    result = ev.batchValidate(batch)
+    assert result.constraints[0].tolist() == [True, False, True]
+    assert result.constraints[1].tolist() == [False, False, True]
+    assert result.valid.tolist()[:3] == [False, False, True]
+    with pytest.raises(AssertionError, match="max"):
+        ev.validate({v: batch[1, v] for v in range(ev.numVars)})
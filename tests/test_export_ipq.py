@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet, import_ipq, export_ipq, export_evaluate, export_batch
+from redy.features import redundancy, amend
+from redy.framework import nodes, views
+from benchmark_pipeline import random_nnet
+
+def _net():
+    return import_nnet.import_nnet(random_nnet(3, 6))
+
+def _write(view):
+    f = io.StringIO()
+    table = export_ipq.export_ipq(view, f)
+    return f.getvalue(), table
+
+def _valid(ev, x):
+    return ev.batchValidate(ev.batchEvaluate(x)).valid
+
+def test_query_round_trip():
+    view = redundancy.RedundancyTest(_net(), 1e-4).getComparedExact([(2, 1, "inactive"), (3, 0, "active")], "gt", 0)
+    text, table = _write(view)
+    q = import_ipq.Query(text)
+    assert q.numVars == len(view.nodes) and q.inputVars[:len(view.inputs)] == [table[n] for n in view.inputs]
+    assert q.outputVars == [table[n] for n in view.outputs]
+    for n in view.nodes:
+        lower, upper = n.limit
+        assert q.lower[table[n]] == (-np.inf if lower is None else lower)
+        assert q.upper[table[n]] == (np.inf if upper is None else upper)
+
+    # The same inputs satisfy the query before and after
+    x = np.random.default_rng(0).uniform(-1, 1, (500, len(view.inputs)))
+    before = export_evaluate.export_evaluate(view)
+    after = export_evaluate.query_evaluate(q)
+    padded = np.hstack([x, np.zeros((len(x), len(q.inputVars) - len(view.inputs)))])
+    assert (_valid(before, x) == _valid(after, padded)).all() and _valid(before, x).any()
+
+def test_network_round_trip():
+    for net, strict in [(_net(), True), (amend.modify(_net(), {(1, 0): "active", (2, 3): "inactive"}), False)]:
+        back = import_ipq.import_ipq(_write(net.toViewIO())[0], strict=strict)
+        x = np.random.default_rng(1).uniform(-1, 1, (50, 5))
+        padded = np.hstack([x, np.zeros((50, len(back.layers[0]) - 5))])
+        bv = back.toViewIO()
+        ev = export_evaluate.export_evaluate(bv)
+        out = [[ev.forwardEvaluate(list(row))[ev.translate[n]] for n in bv.outputs] for row in padded]
+        assert np.allclose(export_batch.export_batch(net).forwardEvaluate(x), out)
+
+def test_abs_and_relaxed():
+    a = nodes.Node()
+    a.limit = (-1., 1.)
+    absolute, relu = nodes.NodeAbs(), nodes.NodeReLU()
+    absolute.input = relu.input = a
+    text, table = _write(views.ViewIO([a, absolute, relu], [a], [absolute], []))
+    assert import_ipq.Query(text).constraints == [("absoluteValue", table[a], table[absolute]), ("relu", table[a], table[relu])]
+    relu.relaxed = True
+    with pytest.raises(AssertionError):
+        _write(views.ViewIO([a, absolute, relu], [a], [absolute], []))
+
+def test_path_and_determinism(tmp_path):
+    view = _net().toViewIO()
+    export_ipq.export_ipq(view, str(tmp_path / "q.ipq"))
+    assert (tmp_path / "q.ipq").read_text() == _write(view)[0]
+
+def test_numbering_is_deterministic():
+    neurons = [(2, 1, "inactive"), (3, 0, "active")]
+    texts = set()
+    for i in range(3):
+        view = redundancy.RedundancyTest(_net(), 1e-4).getComparedExact(neurons, "gt", 0)
+        assert isinstance(view.nodes, set)
+        texts.add(_write(view)[0])
+        texts.add(_write(views.ViewIO(list(view.nodes)[::-1], view.inputs, view.outputs, view.equations))[0])
+    assert len(texts) == 1
@@ -0,0 +1,72 @@
+import io
+
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet, import_ipq, export_ipq, export_batch
+from benchmark_pipeline import random_nnet
+
+# x2 = x0 - x1, x3 = |x2|, x4 = x0 + x1, x5 = relu(x4), x6 = max(x3, x5, x0)
+QUERY = """7
+2
+2
+2
+3
+2
+0,0
+1,1
+1
+0,6
+0,-1
+1,-2
+0,1
+1,2
+0,0,0,0,1,1,-1,2,-1
+1,0,0.5,0,1,1,1,4,-1
+0,absoluteValue,3,2
+1,relu,5,4
+2,max,6,3,5,0
+"""
+
+def test_query():
+    q = import_ipq.Query(QUERY)
+    assert q.numVars == 7 and q.inputVars == [0, 1] and q.outputVars == [6]
+    assert dict(q.lowerBounds) == {0: -1., 1: -2.} and dict(q.upperBounds) == {0: 1., 1: 2.}
+    assert q.equList == ((0, 0., ((0, 1.), (1, -1.), (2, -1.))), (0, 0.5, ((0, 1.), (1, 1.), (4, -1.))))
+    assert q.constraints == [("absoluteValue", 2, 3), ("relu", 4, 5), ("max", [3, 5, 0], 6)]
+
+def test_query_sources(tmp_path):
+    path = tmp_path / "query.ipq"
+    path.write_text(QUERY)
+    for q in [import_ipq.Query(io.StringIO(QUERY)), import_ipq.Query(path=str(path))]:
+        assert q.equList == import_ipq.Query(QUERY).equList
+
+def test_query_views_are_read_only():
+    q = import_ipq.Query(QUERY)
+    with pytest.raises(TypeError):
+        q.lowerBounds[0] = 0.
+    with pytest.raises(AttributeError):
+        q.equList.append((0, 0., ()))
+    # Views are cached until `invalidate`
+    assert q.lowerBounds is q.lowerBounds and q.equList is q.equList
+    q.lower[0] = 0.
+    assert q.lowerBounds[0] == -1.
+    q.invalidate()
+    assert q.lowerBounds[0] == 0.
+
+def test_import_network():
+    net = import_nnet.import_nnet(random_nnet(3, 6))
+    f = io.StringIO()
+    export_ipq.export_ipq(net.toViewIO(), f)
+    back = import_ipq.import_ipq(f.getvalue())
+    assert [len(layer) for layer in back.layers] == [len(layer) for layer in net.layers]
+    x = np.random.default_rng(0).uniform(-1, 1, (100, 5))
+    assert np.allclose(export_batch.export_batch(net).forwardEvaluate(x), export_batch.export_batch(back).forwardEvaluate(x))
+
+def test_strict():
+    # x2 = x0 - x1, x3 = relu(x2), x4 = x3 + x5 - x5 is never defined, so the second
+    # equation has several unknown variables after x3 is defined
+    query = "6\n2\n2\n2\n1\n2\n0,0\n1,1\n1\n0,4\n0,-1\n1,-1\n0,1\n1,1\n" \
+        "0,0,0,0,1,1,-1,2,-1\n1,0,0,3,1,5,1,4,-1\n0,relu,3,2\n"
+    with pytest.raises(AssertionError, match="several unknown"):
+        import_ipq.import_ipq(query)
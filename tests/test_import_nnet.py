@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet
+from benchmark_pipeline import random_nnet
+
+def _weights(net):
+    return [[(list(ns[0].coeffs), ns[0].scalar) for ns in layer] for layer in net.layers[1:]]
+
+def test_data_file_and_path(tmp_path):
+    text = random_nnet(2, 4)
+    path = tmp_path / "net.nnet"
+    path.write_text(text)
+    nets = [import_nnet.import_nnet(text), import_nnet.import_nnet(io.StringIO(text)), import_nnet.import_nnet(path=str(path))]
+    assert _weights(nets[0]) == _weights(nets[1]) == _weights(nets[2])
+    assert _weights(nets[0]) == _weights(import_nnet.import_nnet(text, lazy=True))
+
+def test_weights():
+    text = random_nnet(1, 3, inputs=2, outputs=1)
+    net = import_nnet.import_nnet(text)
+    rows = [l for l in text.splitlines() if not l.startswith("//")][7:]
+    expected = [float(x) for x in rows[0].split(",")[:-1]]
+    assert np.allclose(list(net.layers[1][0][0].coeffs), expected)
+
+def test_path_is_not_data():
+    with pytest.raises(AssertionError):
+        import_nnet.import_nnet()
+    with pytest.raises(FileNotFoundError):
+        import_nnet.import_nnet(path="missing.nnet")
+
+def test_misaligned_rows():
+    lines = random_nnet(1, 3).splitlines()
+    # Move a value from the second weight row into the first (same total)
+    lines[8] += "0.5,"
+    lines[9] = ",".join(lines[9].split(",")[1:])
+    with pytest.raises(AssertionError):
+        import_nnet.import_nnet("\n".join(lines) + "\n")
+
+def test_extra_values():
+    lines = random_nnet(1, 3).splitlines()
+    lines[8] += "0.5,"
+    net = import_nnet.import_nnet("\n".join(lines) + "\n")
+    assert _weights(net) == _weights(import_nnet.import_nnet(random_nnet(1, 3)))
+
+def test_bad_values():
+    lines = random_nnet(1, 3).splitlines()
+    lines[8] = lines[8].replace(",", ",x", 1)
+    with pytest.raises(ValueError):
+        import_nnet.import_nnet("\n".join(lines) + "\n")
@@ -0,0 +1,82 @@
+import csv
+import json
+
+from redy import solvers
+from redy.convert import import_nnet, export_evaluate
+from redy.features import redundancy, dispatch
+from redy.framework import instrument
+from benchmark_pipeline import random_nnet
+
+NEURONS = [(2, 1, "inactive"), (3, 0, "active")]
+
+def _test():
+    return redundancy.RedundancyTest(import_nnet.import_nnet(random_nnet(4, 6)), 1e-4)
+
+def _solve(view, timeout):
+    return solvers.UNSAT, None, {}
+
+def test_inactive():
+    rt = _test()
+    recorder = instrument.Recorder()
+    export_evaluate.export_evaluate(rt.getComparedExact(NEURONS, "gt", 0))
+    with instrument.stage("outer") as s:
+        s.count(rt.network)
+    instrument.add("solve", "q", 1.)
+    assert recorder.records == [] and instrument._recorder is None
+
+def test_records():
+    rt = _test()
+    with instrument.Recorder() as recorder:
+        with instrument.query("q1"):
+            with instrument.stage("outer"):
+                view = rt.getComparedExact(NEURONS, "gt", 0)
+                export_evaluate.export_evaluate(view)
+        rt.getStateCheck((3, 2, "active"))
+    assert instrument._recorder is None
+
+    stages = [r["stage"] for r in recorder.records]
+    assert {"prep", "duplicateAndClip", "join", "sanity", "export_evaluate", "outer", "stateCheck"} <= set(stages)
+    # Stages are recorded when they end
+    assert stages.index("export_evaluate") < stages.index("outer") < stages.index("stateCheck")
+    for i, r in enumerate(recorder.records):
+        assert set(r) == set(instrument.FIELDS) and r["seconds"] >= 0
+        assert r["query"] == ("q1" if i <= stages.index("outer") else None)
+
+    ev = [r for r in recorder.records if r["stage"] == "export_evaluate"][0]
+    assert ev["parent"] == "outer" and ev["nodes"] == len(view.nodes) and ev["equations"] == len(view.equations)
+    outer = [r for r in recorder.records if r["stage"] == "outer"][0]
+    assert outer["parent"] is None and outer["nodes"] is None and outer["seconds"] >= ev["seconds"]
+
+def test_nested_recorders():
+    with instrument.Recorder() as outer:
+        with instrument.Recorder() as inner:
+            instrument.add("a", None, 1.)
+        instrument.add("b", None, 2.)
+    assert [r["stage"] for r in inner.records] == ["a"] and [r["stage"] for r in outer.records] == ["b"]
+    assert instrument._recorder is None
+
+def test_dispatch_solves():
+    with instrument.Recorder() as recorder:
+        list(dispatch.Dispatcher(_solve, workers=2).dispatch([("a", 1), ("b", 2)]))
+    solves = [r for r in recorder.records if r["stage"] == "solve"]
+    assert sorted(r["query"] for r in solves) == ["a", "b"]
+
+def test_aggregate_and_save(tmp_path):
+    recorder = instrument.Recorder()
+    recorder.add("solve", (1, 2), 2., nodes=10)
+    recorder.add("solve", (1, 3), 3., blocks=5)
+    recorder.add("join", None, 0.5, nodes=4, equations=1, relus=2)
+    assert recorder.aggregate() == {
+        "solve": {"count": 2, "seconds": 5., "maxSeconds": 3., "nodes": 10, "blocks": 5},
+        "join": {"count": 1, "seconds": 0.5, "maxSeconds": 0.5, "nodes": 4, "blocks": 0},
+    }
+
+    recorder.save(str(tmp_path / "stages.csv"))
+    rows = list(csv.DictReader(open(tmp_path / "stages.csv")))
+    assert [r["stage"] for r in rows] == ["solve", "solve", "join"] and list(rows[0]) == list(instrument.FIELDS)
+    assert rows[0]["query"] == "(1, 2)" and rows[2]["query"] == "" and rows[2]["relus"] == "2"
+
+    recorder.save(str(tmp_path / "stages.json"))
+    saved = json.load(open(tmp_path / "stages.json"))
+    assert saved["aggregate"] == recorder.aggregate() and len(saved["records"]) == 3
+    assert saved["records"][0]["query"] == [1, 2]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from redy.convert import import_nnet, export_batch
+from redy.features import milp, screen
+from benchmark_pipeline import random_nnet
+
+def _sampled(net, count=5000):
+    x = screen.sampleBox(screen.inputBox(net), count, 0)
+    _, layers = export_batch.export_batch(net).forwardEvaluate(x, returnLayers=True)
+    return [p for p, a in layers]
+
+def _check(bounds, sampled):
+    for l, p in enumerate(sampled):
+        lower = np.array([b[0] for b in bounds[l]])
+        upper = np.array([b[1] for b in bounds[l]])
+        assert (lower <= p.min(axis=0) + 1e-6).all(), l
+        assert (upper >= p.max(axis=0) - 1e-6).all(), l
+
+def test_milp_bounds_contain_samples():
+    net = import_nnet.import_nnet(random_nnet(2, 6, seed=1))
+    _check(milp.milpBounds(net.duplicate(), update=False), _sampled(net))
+
+def test_lp_bounds_looser():
+    net = import_nnet.import_nnet(random_nnet(2, 6, seed=2))
+    exact = milp.milpBounds(net.duplicate(), update=False)
+    relaxed = milp.milpBounds(net.duplicate(), lp=True, update=False)
+    _check(relaxed, _sampled(net))
+    for l in range(len(exact)):
+        for (le, ue), (lr, ur) in zip(exact[l], relaxed[l]):
+            assert lr <= le + 1e-6 and ur >= ue - 1e-6
+
+def test_timeout_bounds_sound():
+    net = import_nnet.import_nnet(random_nnet(4, 12, seed=3))
+    _check(milp.milpBounds(net.duplicate(), timeout=0.01, update=False), _sampled(net))
+
+def test_update_limits():
+    net = import_nnet.import_nnet(random_nnet(2, 6, seed=4))
+    bounds = milp.milpBounds(net)
+    for l in range(1, len(bounds)):
+        for ns, (lower, upper) in zip(net.layers[l], bounds[l]):
+            assert ns[0].limit[0] >= lower - 1e-9 and ns[0].limit[1] <= upper + 1e-9
@@ -0,0 +1,52 @@
+import pytest
+
+from redy.framework import nodes, views, equations
+
+def _sum(terms, scalar=0.):
+    n = nodes.NodeSum()
+    n.inputs = terms
+    n.scalar = scalar
+    return n
+
+def test_inputs():
+    a, b = nodes.Node(), nodes.Node()
+    s = _sum([(1., a), (-2., b)], 0.5)
+    assert s.inputs == ((1., a), (-2., b))
+    assert s.connectedTo() == [a, b]
+
+def test_inputs_are_read_only():
+    a, b = nodes.Node(), nodes.Node()
+    s = _sum([(1., a)])
+    with pytest.raises(AttributeError):
+        s.inputs.append((1., b))
+    with pytest.raises(TypeError):
+        s.inputs[0] = (2., a)
+    s.inputs = s.inputs + ((3., b), )
+    assert s.inputs == ((1., a), (3., b))
+
+def test_slots():
+    for cls in [nodes.Node, nodes.NodeSum, nodes.NodeReLU, nodes.NodeAbs]:
+        with pytest.raises(AttributeError):
+            cls().extra = 1
+    with pytest.raises(AttributeError):
+        equations.Equation([], equations.Equation.Comparator.EQ, 0).extra = 1
+
+def test_duplicate_shares_coefficients():
+    a, b = nodes.Node(), nodes.Node()
+    s = _sum([(1., a), (2., b)], 3.)
+    s.name, s.limit = "s", (-1., 1.)
+    d = s.duplicate()
+    assert d.inputs == s.inputs and d.scalar == 3. and d.name == "s" and d.limit == (-1., 1.)
+    assert d.coeffs is s.coeffs
+
+    # Translating the copy does not change the original
+    c = nodes.Node()
+    d.translate(lambda n: c if n is a else n)
+    assert d.inputs == ((1., c), (2., b)) and s.inputs == ((1., a), (2., b))
+
+def test_translate_keeps_shared_sources():
+    a, b, c = nodes.Node(), nodes.Node(), nodes.Node()
+    s1, s2 = _sum([(1., a), (2., b)]), nodes.NodeSum()
+    s2.coeffs, s2.sources = s1.coeffs, s1.sources
+    views.translateNodes([s1, s2], lambda n: c if n is a else n)
+    assert s1.sources is s2.sources and s1.sources == (c, b)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from redy.convert import import_nnet, export_batch
+from redy.features import clip, amend
+from redy.framework import canonical, packed
+from benchmark_pipeline import random_nnet
+
+TEXT = random_nnet(3, 5)
+
+def _names(net):
+    # Without the network prefix (which is counted per import)
+    return [[[None if n.name is None else n.name[n.name.index("_"):] for n in ns] for ns in layer] for layer in net.layers]
+
+def _both(f):
+    net, lazy = import_nnet.import_nnet(TEXT), import_nnet.import_nnet(TEXT, lazy=True)
+    net, lazy = f(net), f(lazy)
+    assert isinstance(lazy, packed.ArrayNetwork) and not lazy.materialized()
+    return net, lazy
+
+@pytest.mark.parametrize("rng", [
+    clip.Range(firstLayer=1, firstMode=1),
+    clip.Range(firstLayer=1, firstMode=0, lastLayer=2, lastMode=1),
+    clip.Range(firstLayer=2, firstMode=1, lastLayer=3, lastMode=0),
+])
+def test_clip(rng):
+    net, lazy = _both(lambda n: clip.clipNetwork(n.duplicate("_dup"), rng))
+    assert canonical.fingerprintNetwork(net) == canonical.fingerprintNetwork(lazy)
+    assert _names(net) == _names(lazy)
+
+def test_clip_keeps_boundary_names():
+    net = import_nnet.import_nnet(TEXT)
+    names = [ns[-1].name for ns in net.layers[1]]
+    clipped = clip.clipNetwork(net.duplicate(), clip.Range(firstLayer=1, firstMode=1))
+    assert [ns[0].name for ns in clipped.layers[0]] == names
+
+def test_modify():
+    neurons = {(1, 0): "active", (2, 1): "inactive", (2, 3): "nofunc"}
+    net, lazy = _both(lambda n: amend.modify(n.duplicate("_mod"), dict(neurons)))
+    assert canonical.fingerprintNetwork(net) == canonical.fingerprintNetwork(lazy)
+    assert _names(net) == _names(lazy)
+
+def test_duplicates_are_independent():
+    lazy = import_nnet.import_nnet(TEXT, lazy=True)
+    before = canonical.fingerprintNetwork(import_nnet.import_nnet(TEXT, lazy=True))
+    amend.modify(lazy.duplicate(), {(1, 0): "inactive"})
+    clip.clipNetwork(lazy.duplicate(), clip.Range(firstLayer=1, firstMode=1))
+    assert canonical.fingerprintNetwork(lazy) == before
+
+def test_evaluation():
+    net, lazy = _both(lambda n: n)
+    x = np.random.default_rng(0).uniform(-1, 1, (50, 5))
+    assert np.allclose(export_batch.export_batch(net).forwardEvaluate(x), export_batch.export_batch(lazy).forwardEvaluate(x))
@@ -0,0 +1,70 @@
+from redy.convert import import_nnet
+from redy.features import redundancy, bounds, clip
+from redy.features.subspace import apply_subspace
+from redy.framework import canonical
+from benchmark_pipeline import random_nnet
+
+NEURONS = [(2, 1, "inactive"), (3, 0, "active")]
+
+def _test():
+    net = import_nnet.import_nnet(random_nnet(4, 6))
+    return redundancy.RedundancyTest(net, 1e-4)
+
+def _queries(rt):
+    return [
+        canonical.fingerprint(rt.getComparedExact(NEURONS, "gt", 0)),
+        canonical.fingerprint(rt.getComparedExact(NEURONS, "lt", 1, clip.Range(firstLayer=1, firstMode=1))),
+        canonical.fingerprint(rt.getStateCheck((3, 2, "active"))),
+        canonical.fingerprint(rt.getModified(NEURONS, returnNetwork=True)[0].toViewIO()),
+    ]
+
+def test_tightening_duplicates_does_not_change_later_queries():
+    rt = _test()
+    expected = _queries(rt)
+
+    apply_subspace(rt.getComparedExact(NEURONS, "gt", 0).duplicate(), "01010")
+    apply_subspace(rt.getStateCheck((3, 2, "active")).duplicate(), "11111")
+    net, mod = rt.getModified(NEURONS, returnNetwork=True)
+    bounds.symbolicBounds(net.duplicate())
+    bounds.intervalBounds(mod.duplicate())
+    bounds.symbolicBounds(rt.getModified(NEURONS, clip.Range(firstLayer=1, firstMode=1)).duplicate())
+    assert _queries(rt) == expected
+    assert _queries(_test()) == expected
+
+def test_screened_subspace():
+    rt = _test()
+    expected = _queries(rt)
+    views, witnesses = rt.getScreenedStateChecks([(l, n, "active") for l in range(1, 4) for n in range(6)], subspace="01010", seed=0)
+    assert len(views) > 0
+    assert _queries(rt) == expected
+
+def test_unmodified_layers_are_shared():
+    rt = _test()
+    net, mod = rt.getModified([(3, 0, "active")], returnNetwork=True)
+    net2, mod2 = rt.getModified([(3, 1, "inactive")], returnNetwork=True)
+    same = lambda a, b: [x is y for x, y in zip(a, b)]
+
+    # The original network, and the layers (and neurons) before the modified neurons, are shared
+    assert all(same(net.nodes(), net2.nodes()))
+    for l in range(3):
+        assert all(same([n for ns in mod.layers[l] for n in ns], [n for ns in mod2.layers[l] for n in ns]))
+    assert same([ns[0] for ns in mod.layers[3]], [ns[0] for ns in mod2.layers[3]]) == [False, False, True, True, True, True]
+    assert not any(same([n for ns in mod.layers[4] for n in ns], [n for ns in mod2.layers[4] for n in ns]))
+
+    view = rt.getComparedExact([(3, 0, "active")], "gt", 0)
+    assert view.inputs == [ns[0] for ns in rt._base(0, 0)[0].layers[0]]
+
+def test_network_is_not_changed():
+    rt = _test()
+    before = canonical.fingerprintNetwork(rt.network)
+    bounds.symbolicBounds(rt.getModified(NEURONS).duplicate())
+    rt.getJoined(NEURONS)
+    assert canonical.fingerprintNetwork(rt.network) == before
+
+def test_invalidate():
+    rt = _test()
+    before = _queries(rt)
+    bounds.symbolicBounds(rt.network)
+    assert _queries(rt) == before
+    rt.invalidate()
+    assert _queries(rt) != before
@@ -0,0 +1,53 @@
+import os
+
+from redy.convert import import_nnet, export_evaluate
+from redy.features import redundancy, screen
+from redy.framework import canonical
+from redy.features.subspace import subspace_box
+
+ACAS5_9 = os.path.join(os.path.dirname(__file__), "..", "src", "examples_data", "acasxu", "ACASXU_experimental_v2a_5_9.nnet")
+NEURONS = [(l, n, f) for l in [1, 2] for n in range(50) for f in ["inactive", "active"]]
+
+def _test():
+    return redundancy.RedundancyTest(import_nnet.import_nnet(path=ACAS5_9), 1e-4)
+
+def _satisfies(view, x):
+    return export_evaluate.export_evaluate(view).forwardEvaluate(list(x), returnValidation=True)[0]
+
+def test_sample_box():
+    box = [(-1., 1.), (0., 2.), (3., 3.)]
+    x = screen.sampleBox(box, 500, seed=0)
+    assert x.shape == (500, 3) and (x >= [-1, 0, 3]).all() and (x <= [1, 2, 3]).all()
+    assert (x == screen.sampleBox(box, 500, seed=0)).all()
+
+def test_witnesses_satisfy_state_checks():
+    rt = _test()
+    views, witnesses = rt.getScreenedStateChecks(NEURONS, samples=2000, seed=0)
+    assert len(witnesses) > 0 and set(views) | set(witnesses) == set(NEURONS) and not set(views) & set(witnesses)
+    for neuron, x in witnesses.items():
+        assert _satisfies(rt.getStateCheck(neuron), x)
+
+def test_screened_views_are_state_checks():
+    rt = _test()
+    views, _ = rt.getScreenedStateChecks(NEURONS, samples=2000, seed=0)
+    assert len(views) > 0
+    for neuron, view in views.items():
+        assert canonical.fingerprint(view) == canonical.fingerprint(rt.getStateCheck(neuron))
+
+def test_screened_views_have_no_sampled_witness():
+    # The remaining queries have no witness among the samples
+    rt = _test()
+    views, _ = rt.getScreenedStateChecks(NEURONS, samples=2000, seed=0)
+    x = screen.sampleBox(screen.inputBox(rt.network), 2000, 0)
+    for view in views.values():
+        ev = export_evaluate.export_evaluate(view)
+        assert not ev.batchValidate(ev.batchEvaluate(x)).valid.any()
+
+def test_subspace():
+    rt = _test()
+    box = subspace_box(screen.inputBox(rt.network), "01010")
+    views, witnesses = rt.getScreenedStateChecks(NEURONS, samples=1000, subspace="01010", seed=0)
+    for neuron, x in witnesses.items():
+        assert all(l <= v <= u for v, (l, u) in zip(x, box))
+    for view in views.values():
+        assert [n.limit for n in view.inputs] == [tuple(b) for b in box]
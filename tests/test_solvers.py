@@ -0,0 +1,121 @@
+import time
+import pytest
+
+from redy import solvers
+from redy.convert import import_nnet, export_evaluate
+from redy.features import redundancy, split
+from redy.framework import nodes, views, equations
+from redy.solvers import milp, sampling, portfolio
+from benchmark_pipeline import random_nnet
+
+GE, LE = equations.Equation.Comparator.GE, equations.Equation.Comparator.LE
+
+def _valid(view, inputs):
+    ev = export_evaluate.export_evaluate(view)
+    return ev.batchValidate(ev.batchEvaluate(inputs)).valid
+
+def _queries():
+    rt = redundancy.RedundancyTest(import_nnet.import_nnet(random_nnet(2, 6, seed=1)), 1e-4)
+    for neuron in [(1, 0), (1, 3), (2, 1), (2, 4)]:
+        for f in ["inactive", "active"]:
+            for comparator in ["gt", "lt"]:
+                yield rt.getComparedExact([neuron + (f, )], comparator, 0)
+
+# y = |x0 - x1| (or relu), x in [-1, 1]^2, and the equation c*y (<=/>=) scalar
+def _view(cls, comparator, scalar, c=1., relaxed=False):
+    x0, x1 = nodes.Node(), nodes.Node()
+    x0.limit = x1.limit = (-1., 1.)
+    s = nodes.NodeSum()
+    s.inputs = [(1., x0), (-1., x1)]
+    y = cls()
+    y.input = s
+    if relaxed: y.relaxed = True
+    e = equations.Equation([(c, y), (0.25, x1)], comparator, scalar)
+    return views.ViewIO([x0, x1, s, y], [x0, x1], [y], [e])
+
+def test_milp_agrees_with_sampling():
+    verdicts = set()
+    for view in _queries():
+        verdict, counterexample, stats = milp.solve(view, 60)
+        verdicts.add(verdict)
+        if verdict == solvers.SAT:
+            assert _valid(view, [counterexample]).all()
+        else:
+            assert verdict == solvers.UNSAT
+            assert sampling.solve(view, samples=20000, seed=0)[0] == solvers.UNKNOWN
+    assert verdicts == {solvers.SAT, solvers.UNSAT}
+
+def test_milp_box():
+    # Counterexamples are in the input limits, and a box may have no solution
+    view = next(_queries())
+    verdict, counterexample, _ = milp.solve(split._restrict(view, [(0.9, 1.)] * 5))
+    assert verdict == solvers.SAT and all(0.9 - 1e-9 <= v <= 1. + 1e-9 for v in counterexample)
+    assert _valid(view, [counterexample]).all()
+    assert milp.solve(split._restrict(view, [(-1., -0.8)] * 5))[0] == solvers.UNSAT
+
+def test_milp_abs():
+    # |x0 - x1| + x1/4 >= 2.2 only near x0 = -1, x1 = 1
+    verdict, counterexample, _ = milp.solve(_view(nodes.NodeAbs, GE, 2.2))
+    assert verdict == solvers.SAT and _valid(_view(nodes.NodeAbs, GE, 2.2), [counterexample]).all()
+    assert milp.solve(_view(nodes.NodeAbs, GE, 2.3))[0] == solvers.UNSAT
+    # -|x0 - x1| + x1/4 >= 0.2 needs x0 close to x1 > 0.8
+    verdict, counterexample, _ = milp.solve(_view(nodes.NodeAbs, GE, 0.2, c=-1.))
+    assert verdict == solvers.SAT and counterexample[1] >= 0.8 - 1e-6
+    assert milp.solve(_view(nodes.NodeAbs, GE, 0.3, c=-1.))[0] == solvers.UNSAT
+
+def test_milp_relu():
+    assert milp.solve(_view(nodes.NodeReLU, GE, 2.2))[0] == solvers.UNSAT
+    verdict, counterexample, _ = milp.solve(_view(nodes.NodeReLU, LE, -0.2))
+    assert verdict == solvers.SAT and _valid(_view(nodes.NodeReLU, LE, -0.2), [counterexample]).all()
+    assert milp.solve(_view(nodes.NodeReLU, LE, -0.3))[0] == solvers.UNSAT
+
+def test_milp_relaxed():
+    # With x0 - x1 <= 0 the ReLU is 0, but its triangle relaxation allows up to (s + 2) / 2
+    exact = _view(nodes.NodeReLU, GE, 0.9, c=1.)
+    exact.equations.append(equations.Equation([(1., exact.nodes[2])], LE, 0.))
+    relaxed = _view(nodes.NodeReLU, GE, 0.9, c=1., relaxed=True)
+    relaxed.equations.append(equations.Equation([(1., relaxed.nodes[2])], LE, 0.))
+    assert milp.solve(exact)[0] == solvers.UNSAT
+    assert milp.solve(relaxed)[0] == solvers.SAT
+
+def test_marabou_is_optional():
+    from redy.convert import export_marabou
+    from redy.solvers import marabou
+    with pytest.raises(ImportError):
+        export_marabou.export_marabou(next(_queries()))
+
+# Solvers of the portfolio record their calls
+def _solver(verdict, calls, delay=0.):
+    def solve(view, timeout):
+        calls.append((verdict, timeout))
+        time.sleep(delay)
+        return verdict, None, {"verdict": verdict}
+    return solve
+
+def test_portfolio_order():
+    calls = []
+    p = portfolio.Portfolio(_solver(solvers.UNKNOWN, calls), _solver(solvers.UNSAT, calls), _solver(solvers.SAT, calls))
+    verdict, counterexample, stats = p("view", None)
+    assert verdict == solvers.UNSAT and stats == {"verdict": solvers.UNSAT, "solver": 1}
+    assert calls == [(solvers.UNKNOWN, None), (solvers.UNSAT, None)]
+
+    calls = []
+    p = portfolio.Portfolio(_solver(solvers.TIMEOUT, calls), _solver(solvers.ERROR, calls))
+    assert p("view")[0] == solvers.ERROR and len(calls) == 2
+
+def test_portfolio_budgets():
+    calls = []
+    p = portfolio.Portfolio(_solver(solvers.TIMEOUT, calls, 0.2), _solver(solvers.UNKNOWN, calls), budgets=[0.1, None])
+    p("view", 10)
+    assert calls[0][1] == 0.1 and 9 < calls[1][1] < 9.9
+
+    # No time left for the second solver
+    calls = []
+    p = portfolio.Portfolio(_solver(solvers.TIMEOUT, calls, 0.2), _solver(solvers.SAT, calls))
+    verdict, _, stats = p("view", 0.1)
+    assert verdict == solvers.TIMEOUT and stats["solver"] == 1 and len(calls) == 1
+
+    with pytest.raises(AssertionError):
+        portfolio.Portfolio(_solver(solvers.SAT, calls), budgets=[1., 2.])
+    with pytest.raises(AssertionError, match="No solvers"):
+        portfolio.Portfolio()
@@ -0,0 +1,108 @@
+from redy import solvers
+from redy.convert import import_nnet, export_evaluate
+from redy.features import redundancy, bounds, split, screen, dispatch
+from redy.solvers import sampling
+from benchmark_pipeline import random_nnet
+
+NEURONS = [(2, 1, "inactive"), (3, 0, "active")]
+
+def _test():
+    net = import_nnet.import_nnet(random_nnet(4, 6))
+    return net, redundancy.RedundancyTest(net, 1e-4)
+
+def _valid(view, inputs):
+    ev = export_evaluate.export_evaluate(view)
+    return ev.batchValidate(ev.batchEvaluate(inputs)).valid
+
+# A small box around the input where neuron (1, 0) is the most inactive,
+# where modifying it does not change the outputs
+def _stableBox(net):
+    x = screen.sampleBox(screen.inputBox(net), 200, 0)
+    x0 = x[screen.observe(net, x).pre[0][:, 0].argmin()]
+    return [(v - 0.01, v + 0.01) for v in x0]
+
+def test_linear_bounds_contain_samples():
+    net, rt = _test()
+    for view in [rt.getJoined(NEURONS), rt.getComparedExact(NEURONS, "gt", 0)]:
+        for box in [None, [(-0.5, 0.25)] * 5]:
+            lb = bounds.linearBounds(view, box)
+            assert lb.feasible
+            ev = export_evaluate.export_evaluate(view)
+            x = ev.batchEvaluate(screen.sampleBox(box or [n.limit for n in view.inputs], 2000, 0))
+            x = x[ev.batchValidate(x).valid]
+            for i, n in enumerate(view.nodes):
+                lower, upper = lb.bounds[n]
+                assert (x[:, i] >= lower - 1e-9).all() and (x[:, i] <= upper + 1e-9).all(), n
+
+def test_linear_bounds_box():
+    net, rt = _test()
+    view = rt.getJoined(NEURONS)
+    lb = bounds.linearBounds(view, [(0., 0.5)] * 5)
+    assert all(lb.bounds[n] == (0., 0.5) for n in view.inputs)
+    assert not bounds.linearBounds(view, [(2., 3.)] * 5).feasible
+
+def test_split_sat():
+    net, rt = _test()
+    view = rt.getComparedExact(NEURONS, "gt", 0)
+    verdict, root = split.splitSearch(view, seed=0)
+    assert verdict == solvers.SAT and root.coverage() < 1.
+    found = [r for r in root.leaves() if r.verdict == solvers.SAT]
+    assert len(found) == 1 and found[0].method == "sample"
+    assert _valid(view, [found[0].counterexample]).all()
+
+def test_split_unsat():
+    net, rt = _test()
+    box = _stableBox(net)
+    for mode in ["inactive", "active"]:
+        for comparator in ["gt", "lt"]:
+            view = rt.getComparedExact([(1, 0, mode)], comparator, 0)
+            assert not _valid(view, screen.sampleBox(box, 2000, 1)).any()
+            verdict, root = split.splitSearch(view, box=box, seed=0)
+            assert verdict == solvers.UNSAT and root.coverage() == 1.
+            assert all(r.verdict == solvers.UNSAT and r.method == "bounds" for r in root.leaves())
+
+def test_split_depth():
+    net, rt = _test()
+    view = rt.getComparedExact(NEURONS, "gt", 0)
+    verdict, root = split.splitSearch(view, samples=0, maxDepth=3)
+    assert verdict in [solvers.UNKNOWN, solvers.UNSAT]
+    leaves = root.leaves()
+    assert all(r.depth() <= 3 for r in leaves)
+    assert all(r.method == "bounds" and r.verdict in [solvers.UNKNOWN, solvers.UNSAT] for r in leaves)
+    assert root.coverage() == sum(0.5 ** r.depth() for r in leaves if r.verdict == solvers.UNSAT)
+
+def test_split_dispatcher():
+    net, rt = _test()
+    view = rt.getComparedExact(NEURONS, "gt", 0)
+    d = dispatch.Dispatcher(sampling.solve, workers=2, timeout=30)
+    verdict, root = split.splitSearch(view, d, samples=0, splitDepth=1)
+    assert verdict == solvers.SAT
+    found = [r for r in root.leaves() if r.verdict == solvers.SAT]
+    assert len(found) >= 1 and all(r.method == "solver" and r.depth() == 1 for r in found)
+    for r in found:
+        assert _valid(view, [r.counterexample]).all()
+        assert all(l <= v <= u for v, (l, u) in zip(r.counterexample, r.box))
+    assert d.next() is None
+
+def test_region():
+    root = split.Region([(0., 1.), (0., 2.)])
+    a, b = root.split(1)
+    assert a.box == [(0., 1.), (0., 1.)] and b.box == [(0., 1.), (1., 2.)] and b.path == ((1, 1), )
+    a.decide(solvers.UNSAT, "bounds")
+    b1, b2 = b.split(0)
+    b1.decide(solvers.UNSAT, "solver")
+    b2.decide(solvers.TIMEOUT, "solver")
+    assert root.resolve() == solvers.TIMEOUT and b.verdict == solvers.TIMEOUT
+    assert root.coverage() == 0.75
+    b2.decide(solvers.UNSAT, "solver")
+    assert root.resolve() == solvers.UNSAT and root.coverage() == 1.
+    b1.decide(solvers.SAT, "solver", [0.2, 1.3])
+    assert root.resolve() == solvers.SAT
+
+    assert str(root).splitlines() == [
+        "Region(root: sat) ",
+        "  Region(x1<: unsat) bounds",
+        "  Region(x1>: sat) ",
+        "    Region(x1> x0<: sat) solver",
+        "    Region(x1> x0>: unsat) solver",
+    ]
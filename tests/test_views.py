@@ -0,0 +1,107 @@
+import pytest
+
+from redy.convert import import_nnet
+from redy.convert.mitigations import reachable_from_input, constant_nodes
+from redy.features import redundancy
+from redy.framework import nodes, views, equations
+from benchmark_pipeline import random_nnet
+
+EQ = equations.Equation.Comparator.EQ
+
+def _sum(terms):
+    n = nodes.NodeSum()
+    n.inputs = terms
+    return n
+
+def _relu(node):
+    n = nodes.NodeReLU()
+    n.input = node
+    return n
+
+def _constant(value):
+    n = nodes.Node()
+    n.limit = (value, value)
+    return n
+
+# Fixed point of the reachability rules, computed naively
+def _reachable(view):
+    reached = set(view.inputs)
+    changed = True
+    while changed:
+        changed = False
+        for n in view.nodes:
+            if n not in reached and any(v in reached for v in n.connectedTo()):
+                reached.add(n)
+                changed = True
+        for e in view.equations:
+            terms = set(n for _, n in e.terms)
+            if e.comparator == EQ and len(terms - reached) == 1:
+                reached |= terms
+                changed = True
+    return reached
+
+def test_adjacency():
+    a, b = nodes.Node(), nodes.Node()
+    s = _sum([(1., a), (2., b)])
+    r = _relu(s)
+    t = _sum([(1., r), (1., a)])
+    view = views.ViewIO([t, r, s, b, a], [a, b], [t], [])
+
+    assert view.predecessors(s) == [a, b]
+    assert set(view.successors(a)) == {s, t}
+    assert view.successors(t) == []
+    order = view.topologicalOrder()
+    assert sorted(map(id, order)) == sorted(map(id, view.nodes))
+    assert all(order.index(v) < order.index(n) for n in order for v in n.connectedTo())
+
+    # The index is cached until `invalidate`
+    u = _relu(a)
+    view.nodes.append(u)
+    assert u not in view.successors(a)
+    view.invalidate()
+    assert u in view.successors(a)
+    assert u in view.topologicalOrder()
+
+def test_cycle():
+    a = nodes.Node()
+    s = _sum([(1., a)])
+    r = _relu(s)
+    s.inputs = [(1., r)]
+    view = views.ViewIO([a, s, r], [a], [r], [])
+    with pytest.raises(AssertionError):
+        view.topologicalOrder()
+
+def test_reachable_through_equations():
+    x = nodes.Node()
+    c1, c2, c3 = _constant(1.), _constant(2.), _constant(3.)
+    s = _sum([(1., x), (1., c3)])
+    e = equations.Equation([(1., s), (-1., c1)], EQ, 0.)
+    view = views.ViewIO([x, c1, c2, c3, s], [x], [s], [e])
+
+    # s is reached from x, so the equation reaches c1. c3 only feeds s
+    reached = reachable_from_input(view)
+    assert set(reached) == _reachable(view) == {x, s, c1}
+    assert len(reached) == len(set(reached))
+    assert set(constant_nodes(view)) == {c2, c3}
+
+    r = _relu(c2)
+    r.limit = (0., 2.)
+    view.nodes.append(r)
+    view.invalidate()
+    with pytest.raises(AssertionError):
+        constant_nodes(view)
+
+def test_reachable_on_queries():
+    rt = redundancy.RedundancyTest(import_nnet.import_nnet(random_nnet(4, 6)), 1e-4)
+    neurons = [(2, 1, "inactive"), (3, 0, "active")]
+    for view in [rt.getComparedExact(neurons, "gt", 0), rt.getJoined(neurons), rt.getStateCheck((3, 2, "active"))]:
+        assert set(reachable_from_input(view)) == _reachable(view)
+
+def test_deep_view():
+    layers = [nodes.Node()]
+    for i in range(100000):
+        layers.append(_relu(layers[-1]) if i % 2 else _sum([(1., layers[-1])]))
+    view = views.ViewIO(layers[::-1], [layers[0]], [layers[-1]], [])
+    assert view.topologicalOrder() == layers
+    assert len(reachable_from_input(view)) == len(layers)
+    assert constant_nodes(view) == []